@@ -131,8 +131,6 @@ class SecurityAuditMiddleware(MiddlewareMixin):
                                  for pattern in self.dangerous_patterns]
     
     def __call__(self, request):
-        start_time = time.time()
-        
         # Prüfe auf verdächtige Patterns
         self.check_malicious_patterns(request)
         
@@ -140,14 +138,9 @@ class SecurityAuditMiddleware(MiddlewareMixin):
         if request.path.startswith('/admin/'):
             self.log_admin_access(request)
         
-        response = self.get_response(request)
-        
-        # Logge Response-Zeit für Performance-Monitoring
-        response_time = time.time() - start_time
-        if response_time > 5:  # Langsame Requests loggen
-            logger.warning(f'Slow request: {request.path} - {response_time:.2f}s')
-        
-        return response
+        # Langsame Requests loggt monitoring.middleware.MetricsMiddleware
+        # anhand der Latenz-Baseline der jeweiligen View
+        return self.get_response(request)
     
     def check_malicious_patterns(self, request):
         """Prüft auf verdächtige Patterns in Request-Daten"""
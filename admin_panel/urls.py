@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from .views import custom_login, dashboard_redirect, custom_logout, dashboard
+from monitoring.metrics import metrics_view
 
 # Disable Django admin login redirect
 admin.site.login = custom_login
@@ -30,4 +31,5 @@ urlpatterns = [
     path('django-admin/', admin.site.urls),  # Keep Django admin as fallback
     path('monitoring/', include('monitoring.urls')),
     path('business/', include('business.urls')),
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape endpoint
 ]
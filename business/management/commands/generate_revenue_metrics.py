@@ -1,6 +1,6 @@
 """
 Management command to generate revenue metrics for analytics.
-Should be run daily via cron job.
+Runs daily via manage.py run_scheduler (or a cron job).
 """
 
 from django.core.management.base import BaseCommand
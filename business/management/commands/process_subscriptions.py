@@ -1,6 +1,6 @@
 """
 Management command to process subscription renewals, cancellations, and status updates.
-Should be run daily via cron job.
+Runs daily via manage.py run_scheduler (or a cron job).
 """
 
 from django.core.management.base import BaseCommand
@@ -0,0 +1,229 @@
+"""
+Alert state engine
+Deduplicates active alerts, suppresses repeated raises and applies
+hysteresis and flap detection to downtime alerts
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from .models import Alert, SystemHealth
+
+logger = logging.getLogger('monitoring')
+
+DOWN_STATUSES = ('offline', 'error')
+
+
+class AlertStateEngine:
+    """
+    Tracks which conditions currently have an active alert
+
+    Every alert carries a dedup key (platform and alert type, for custom
+    alerts also the title); the database
+    allows one active alert per key, so concurrent workers cannot create
+    duplicates. Known states are kept in a local dict for
+    `suppression_seconds`: raising an alert that is known to be active, or
+    clearing one that is known to be inactive, needs no query. Changes to
+    alerts bump a version key in the shared cache, which makes the other
+    workers drop their local state.
+
+    Downtime uses the recent health history of each platform: an alert is
+    raised after `raise_after` failed checks in a row and resolved after
+    `clear_after` successful ones. A platform whose status changed at least
+    `flap_threshold` times within the last `flap_window` checks is flapping;
+    its alert is raised immediately and kept open until it is stable.
+    """
+
+    VERSION_KEY = 'monitoring:alert_state_version'
+
+    def __init__(self, suppression_seconds: float = None, raise_after: int = None, clear_after: int = None,
+                 flap_window: int = None, flap_threshold: int = None):
+        self.suppression_seconds = suppression_seconds or getattr(settings, 'ALERT_SUPPRESSION_SECONDS', 300)
+        self.raise_after = raise_after or getattr(settings, 'ALERT_DOWNTIME_RAISE_AFTER', 2)
+        self.clear_after = clear_after or getattr(settings, 'ALERT_DOWNTIME_CLEAR_AFTER', 2)
+        self.flap_window = flap_window or getattr(settings, 'ALERT_FLAP_WINDOW', 10)
+        self.flap_threshold = flap_threshold or getattr(settings, 'ALERT_FLAP_THRESHOLD', 4)
+        self.check_interval = getattr(settings, 'ALERT_STATE_CHECK_INTERVAL', 5)
+
+        self._known = {}    # dedup_key -> (expires_at, active Alert or None)
+        self._history = {}  # platform_id -> deque of bools (True = up)
+        self._lock = threading.Lock()
+        self._version = None
+        self._next_check = 0.0
+
+    def raise_alert(self, platform, alert_type: str, title: str, message: str, severity: str = 'medium',
+                    related_error=None, dedup_key: str = None) -> Tuple[Optional[Alert], bool]:
+        """
+        Create an alert unless one is already active for the condition
+
+        An existing active alert gets the new message, unless it was raised
+        within the suppression window (then nothing is written at all).
+
+        Returns:
+            Tuple of (active alert, created)
+        """
+        dedup_key = dedup_key or Alert.default_dedup_key(platform.id, alert_type, title)
+
+        known = self._lookup(dedup_key)
+        if known:
+            return known, False
+
+        alert = Alert.objects.filter(dedup_key=dedup_key, status='active').first()
+        created = False
+
+        if alert is None:
+            try:
+                with transaction.atomic():
+                    alert = Alert.objects.create(
+                        platform=platform,
+                        alert_type=alert_type,
+                        title=title,
+                        message=message,
+                        severity=severity,
+                        related_error=related_error,
+                        dedup_key=dedup_key
+                    )
+                created = True
+            except IntegrityError:
+                # Another worker raised the same condition first
+                alert = Alert.objects.filter(dedup_key=dedup_key, status='active').first()
+                if alert is None:
+                    raise
+
+        if not created and alert.message != message:
+            alert.message = message
+            alert.save(update_fields=['message'])
+
+        self._remember(dedup_key, alert)
+        return alert, created
+
+    def clear(self, platform, alert_type: str, resolved_by: str = 'System', dedup_key: str = None) -> int:
+        """
+        Resolve the active alert of a condition
+
+        Returns:
+            Number of resolved alerts
+        """
+        dedup_key = dedup_key or Alert.build_dedup_key(platform.id, alert_type)
+
+        with self._lock:
+            self._check_version()
+            entry = self._known.get(dedup_key)
+            if entry and entry[1] is None and entry[0] > time.monotonic():
+                return 0
+
+        resolved = 0
+        for alert in Alert.objects.filter(dedup_key=dedup_key, status='active'):
+            alert.resolve(resolved_by)
+            resolved += 1
+
+        self._remember(dedup_key, None)
+        return resolved
+
+    def observe_health(self, platform_id: int, status: str, checked_at=None) -> Dict:
+        """
+        Add a health check to the history of a platform
+
+        The history is seeded from SystemHealth on first use, so hysteresis
+        also works for short-lived processes.
+
+        Args:
+            platform_id: Checked platform
+            status: Health status of the check
+            checked_at: Time of the check; older stored checks seed the history
+
+        Returns:
+            Dict with failures and successes (in a row), transitions and flapping
+        """
+        with self._lock:
+            history = self._history.get(platform_id)
+
+        if history is None:
+            history = self._load_history(platform_id, checked_at)
+
+        with self._lock:
+            history = self._history.setdefault(platform_id, history)
+            history.append(status not in DOWN_STATUSES)
+            checks = list(history)
+
+        up = checks[-1]
+        streak = 0
+        for value in reversed(checks):
+            if value != up:
+                break
+            streak += 1
+
+        transitions = sum(1 for previous, current in zip(checks, checks[1:]) if previous != current)
+        return {
+            'failures': 0 if up else streak,
+            'successes': streak if up else 0,
+            'transitions': transitions,
+            'checks': len(checks),
+            'flapping': transitions >= self.flap_threshold,
+        }
+
+    def should_raise_downtime(self, state: Dict) -> bool:
+        return state['failures'] >= self.raise_after or (state['failures'] > 0 and state['flapping'])
+
+    def should_clear_downtime(self, state: Dict) -> bool:
+        return state['successes'] >= self.clear_after and not state['flapping']
+
+    def invalidate(self, dedup_key: str = None):
+        """Forget local state (of one key) and make all other workers reload"""
+        version = uuid.uuid4().hex
+        with self._lock:
+            if dedup_key:
+                self._known.pop(dedup_key, None)
+            else:
+                self._known.clear()
+            self._version = version
+        cache.set(self.VERSION_KEY, version, None)
+
+    def _lookup(self, dedup_key: str) -> Optional[Alert]:
+        """Active alert of a key if it is known and still suppressed"""
+        with self._lock:
+            self._check_version()
+            entry = self._known.get(dedup_key)
+            if entry and entry[1] is not None and entry[0] > time.monotonic():
+                return entry[1]
+        return None
+
+    def _remember(self, dedup_key: str, alert: Optional[Alert]):
+        with self._lock:
+            self._known[dedup_key] = (time.monotonic() + self.suppression_seconds, alert)
+
+    def _check_version(self):
+        """Drop all local state if another worker changed alerts (lock held)"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+
+        version = cache.get(self.VERSION_KEY)
+        if version is None:
+            cache.add(self.VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(self.VERSION_KEY)
+
+        if version != self._version:
+            self._known.clear()
+            self._version = version
+
+    def _load_history(self, platform_id: int, before=None) -> deque:
+        checks = SystemHealth.objects.filter(platform_id=platform_id)
+        if before:
+            checks = checks.filter(checked_at__lt=before)
+        statuses = checks.order_by('-checked_at').values_list('status', flat=True)[:self.flap_window - 1]
+        return deque(
+            (status not in DOWN_STATUSES for status in reversed(list(statuses))),
+            maxlen=self.flap_window
+        )
+
+
+# Global alert state engine instance
+alert_state = AlertStateEngine()
@@ -1,13 +1,13 @@
 import smtplib
 import json
-import requests
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from django.conf import settings
 from django.template.loader import render_to_string
-from django.utils import timezone
-from .models import Alert, Platform, ErrorLog, MonitoringSettings
+from .models import Alert, Platform, MonitoringSettings
+from .http_client import get_session
+from .alert_state import alert_state
 
 
 logger = logging.getLogger('monitoring')
@@ -16,47 +16,43 @@ logger = logging.getLogger('monitoring')
 class AlertManager:
     """Manages real-time alerts for critical system issues"""
     
-    def __init__(self):
-        self.settings = MonitoringSettings.get_settings()
+    @property
+    def monitoring_settings(self):
+        """Current monitoring settings (cached, see MonitoringSettings.get_settings)"""
+        return MonitoringSettings.get_settings()
     
-    def create_alert(self, platform, alert_type, title, message, severity='medium', related_error=None):
-        """Create a new alert and trigger notifications"""
+    def create_alert(self, platform, alert_type, title, message, severity='medium', related_error=None, dedup_key=None):
+        """Create a new alert and trigger notifications (returns the active alert)"""
+        alert, created = self.raise_alert(platform, alert_type, title, message, severity, related_error, dedup_key)
+        return alert
+    
+    def raise_alert(self, platform, alert_type, title, message, severity='medium', related_error=None, dedup_key=None):
+        """
+        Create an alert unless the condition already has an active one
+        
+        Returns:
+            Tuple of (alert, created); (None, False) on failure
+        """
         try:
-            # Check if similar alert already exists and is active
-            existing_alert = Alert.objects.filter(
-                platform=platform,
-                alert_type=alert_type,
-                status='active'
-            ).first()
-            
-            if existing_alert:
-                # Update existing alert
-                existing_alert.message = message
-                existing_alert.save()
-                logger.info(f'Updated existing alert: {existing_alert.id}')
-                return existing_alert
-            
-            # Create new alert
-            alert = Alert.objects.create(
-                platform=platform,
-                alert_type=alert_type,
-                title=title,
-                message=message,
-                severity=severity,
-                related_error=related_error
+            alert, created = alert_state.raise_alert(
+                platform, alert_type, title, message, severity, related_error, dedup_key
             )
             
+            if not created:
+                logger.debug(f'Alert already active: {alert.id}')
+                return alert, False
+            
             logger.info(f'Created new alert: {alert.id} - {title}')
             
             # Trigger notifications based on severity
             if severity in ['high', 'critical']:
                 self._send_notifications(alert)
             
-            return alert
+            return alert, True
             
         except Exception as e:
             logger.error(f'Failed to create alert: {e}')
-            return None
+            return None, False
     
     def resolve_alert(self, alert_id, resolved_by="System"):
         """Mark an alert as resolved"""
@@ -70,30 +66,30 @@ class AlertManager:
             return False
     
     def _send_notifications(self, alert):
-        """Send notifications via configured channels"""
-        notification_methods = []
-        
-        # Send email notifications
-        if self.settings.email_notifications:
-            if self._send_email_notification(alert):
-                notification_methods.append('email')
+        """Queue notifications via configured channels (sent by the notification worker)"""
+        from .notifications import notification_dispatcher
         
-        # Send Slack notifications
-        if self.settings.slack_notifications and self.settings.slack_webhook_url:
-            if self._send_slack_notification(alert):
-                notification_methods.append('slack')
+        entries = notification_dispatcher.enqueue(alert)
+        logger.info(f'Notifications queued for alert {alert.id}: {[entry.channel for entry in entries]}')
+    
+    def send_to_channel(self, channel, alerts):
+        """Send one message for one or more alerts; used by the notification worker"""
+        if channel == 'email':
+            if len(alerts) == 1:
+                return self._send_email_notification(alerts[0])
+            return self._send_email_digest(alerts)
         
-        # Update alert with notification status
-        alert.notification_sent = True
-        alert.notification_methods = notification_methods
-        alert.save()
+        if channel == 'slack':
+            if len(alerts) == 1:
+                return self._send_slack_notification(alerts[0])
+            return self._send_slack_digest(alerts)
         
-        logger.info(f'Notifications sent for alert {alert.id}: {notification_methods}')
+        raise ValueError(f'Unknown notification channel: {channel}')
     
     def _send_email_notification(self, alert):
         """Send email notification"""
         try:
-            if not self.settings.notification_emails:
+            if not self.monitoring_settings.notification_emails:
                 logger.warning('No notification emails configured')
                 return False
             
@@ -104,7 +100,7 @@ class AlertManager:
             email_context = {
                 'alert': alert,
                 'platform': alert.platform,
-                'settings': self.settings,
+                'settings': self.monitoring_settings,
                 'dashboard_url': 'http://127.0.0.1:8003'  # Should be configurable
             }
             
@@ -115,7 +111,7 @@ class AlertManager:
             msg = MIMEMultipart('alternative')
             msg['Subject'] = subject
             msg['From'] = 'admin@renditefuchs.de'
-            msg['To'] = ', '.join(self.settings.notification_emails)
+            msg['To'] = ', '.join(self.monitoring_settings.notification_emails)
             
             msg.attach(MIMEText(text_content, 'plain', 'utf-8'))
             msg.attach(MIMEText(html_content, 'html', 'utf-8'))
@@ -126,7 +122,7 @@ class AlertManager:
             
             # For now, just log the email content
             logger.info(f'EMAIL SUBJECT: {subject}')
-            logger.info(f'EMAIL RECIPIENTS: {self.settings.notification_emails}')
+            logger.info(f'EMAIL RECIPIENTS: {self.monitoring_settings.notification_emails}')
             logger.info(f'EMAIL CONTENT: {text_content}')
             
             return True
@@ -135,100 +131,158 @@ class AlertManager:
             logger.error(f'Failed to send email notification: {e}')
             return False
     
-    def _send_slack_notification(self, alert):
-        """Send Slack notification via webhook"""
+    def _send_email_digest(self, alerts):
+        """Send one email for several alerts"""
         try:
-            if not self.settings.slack_webhook_url:
+            if not self.monitoring_settings.notification_emails:
+                logger.warning('No notification emails configured')
                 return False
             
-            # Determine emoji and color based on severity
-            severity_config = {
-                'low': {'emoji': '🔵', 'color': '#36a3f7'},
-                'medium': {'emoji': '🟡', 'color': '#ffc107'},
-                'high': {'emoji': '🟠', 'color': '#fd7e14'},
-                'critical': {'emoji': '🔴', 'color': '#dc3545'}
-            }
+            subject = f'🚨 RenditeFuchs: {len(alerts)} neue Warnungen'
+            lines = [
+                f'[{alert.get_severity_display()}] {alert.platform.name}: {alert.title}\n    {alert.message}'
+                for alert in alerts
+            ]
+            text_content = '\n\n'.join(lines)
             
-            config = severity_config.get(alert.severity, severity_config['medium'])
+            msg = MIMEText(text_content, 'plain', 'utf-8')
+            msg['Subject'] = subject
+            msg['From'] = 'admin@renditefuchs.de'
+            msg['To'] = ', '.join(self.monitoring_settings.notification_emails)
             
-            # Environment emoji
-            env_emoji = '🟧' if alert.platform.environment == 'test' else '🟩' if alert.platform.environment == 'live' else '🔵'
+            # For now, just log the email content (see _send_email_notification)
+            logger.info(f'EMAIL SUBJECT: {subject}')
+            logger.info(f'EMAIL RECIPIENTS: {self.monitoring_settings.notification_emails}')
+            logger.info(f'EMAIL CONTENT: {text_content}')
             
-            # Prepare Slack message
-            slack_payload = {
-                'text': f'{config["emoji"]} RenditeFuchs Alert: {alert.title}',
-                'attachments': [
-                    {
-                        'color': config['color'],
-                        'fields': [
-                            {
-                                'title': 'Platform',
-                                'value': f'{env_emoji} {alert.platform.name}',
-                                'short': True
-                            },
-                            {
-                                'title': 'Schweregrad',
-                                'value': alert.get_severity_display(),
-                                'short': True
-                            },
-                            {
-                                'title': 'Alert Typ',
-                                'value': alert.get_alert_type_display(),
-                                'short': True
-                            },
-                            {
-                                'title': 'Zeit',
-                                'value': alert.created_at.strftime('%d.%m.%Y %H:%M'),
-                                'short': True
-                            },
-                            {
-                                'title': 'Nachricht',
-                                'value': alert.message,
-                                'short': False
-                            }
-                        ],
-                        'footer': 'RenditeFuchs Monitoring',
-                        'footer_icon': 'https://renditefuchs.de/static/images/logo.png'
-                    }
-                ]
-            }
+            return True
             
-            # Send to Slack
-            response = requests.post(
-                self.settings.slack_webhook_url,
-                json=slack_payload,
-                timeout=10
+        except Exception as e:
+            logger.error(f'Failed to send email digest: {e}')
+            return False
+    
+    def _send_slack_notification(self, alert):
+        """Send Slack notification via webhook"""
+        try:
+            config = self.SLACK_SEVERITY_CONFIG.get(alert.severity, self.SLACK_SEVERITY_CONFIG['medium'])
+            return self._post_slack(
+                f'{config["emoji"]} RenditeFuchs Alert: {alert.title}',
+                [self._slack_attachment(alert)]
             )
-            
-            if response.status_code == 200:
-                logger.info(f'Slack notification sent for alert: {alert.id}')
-                return True
-            else:
-                logger.error(f'Slack notification failed: {response.status_code}')
-                return False
-                
         except Exception as e:
             logger.error(f'Failed to send Slack notification: {e}')
             return False
     
-    def check_error_thresholds(self, platform):
-        """Check if error thresholds are exceeded and create alerts"""
+    def _send_slack_digest(self, alerts):
+        """Send one Slack message for several alerts"""
         try:
-            from datetime import timedelta
-            
-            # Check error rate in last hour
-            last_hour = timezone.now() - timedelta(hours=1)
-            recent_errors = ErrorLog.objects.filter(
-                platform=platform,
-                last_seen__gte=last_hour,
-                is_resolved=False
+            worst = max(alerts, key=lambda alert: self.SEVERITY_ORDER.get(alert.severity, 1))
+            config = self.SLACK_SEVERITY_CONFIG.get(worst.severity, self.SLACK_SEVERITY_CONFIG['medium'])
+            return self._post_slack(
+                f'{config["emoji"]} RenditeFuchs: {len(alerts)} neue Warnungen',
+                [self._slack_attachment(alert) for alert in alerts]
             )
+        except Exception as e:
+            logger.error(f'Failed to send Slack digest: {e}')
+            return False
+    
+    # Emoji and color per severity for Slack messages
+    SLACK_SEVERITY_CONFIG = {
+        'low': {'emoji': '🔵', 'color': '#36a3f7'},
+        'medium': {'emoji': '🟡', 'color': '#ffc107'},
+        'high': {'emoji': '🟠', 'color': '#fd7e14'},
+        'critical': {'emoji': '🔴', 'color': '#dc3545'}
+    }
+    
+    SEVERITY_ORDER = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+    
+    def _slack_attachment(self, alert):
+        """Slack attachment describing one alert"""
+        config = self.SLACK_SEVERITY_CONFIG.get(alert.severity, self.SLACK_SEVERITY_CONFIG['medium'])
+        
+        # Environment emoji
+        env_emoji = '🟧' if alert.platform.environment == 'test' else '🟩' if alert.platform.environment == 'live' else '🔵'
+        
+        return {
+            'color': config['color'],
+            'fields': [
+                {
+                    'title': 'Platform',
+                    'value': f'{env_emoji} {alert.platform.name}',
+                    'short': True
+                },
+                {
+                    'title': 'Schweregrad',
+                    'value': alert.get_severity_display(),
+                    'short': True
+                },
+                {
+                    'title': 'Alert Typ',
+                    'value': alert.get_alert_type_display(),
+                    'short': True
+                },
+                {
+                    'title': 'Zeit',
+                    'value': alert.created_at.strftime('%d.%m.%Y %H:%M'),
+                    'short': True
+                },
+                {
+                    'title': 'Nachricht',
+                    'value': alert.message,
+                    'short': False
+                }
+            ],
+            'footer': 'RenditeFuchs Monitoring',
+            'footer_icon': 'https://renditefuchs.de/static/images/logo.png'
+        }
+    
+    def _post_slack(self, text, attachments):
+        """Post a message to the Slack webhook"""
+        if not self.monitoring_settings.slack_webhook_url:
+            return False
+        
+        response = get_session('notifications').post(
+            self.monitoring_settings.slack_webhook_url,
+            json={'text': text, 'attachments': attachments},
+            timeout=10
+        )
+        
+        if response.status_code == 200:
+            logger.info(f'Slack notification sent: {text}')
+            return True
+        
+        logger.error(f'Slack notification failed: {response.status_code}')
+        return False
+    
+    def check_error_thresholds(self, platform, critical_errors=None):
+        """
+        Check if error thresholds are exceeded and create alerts
+        
+        Args:
+            platform: Platform the errors belong to
+            critical_errors: Critical ErrorLog entries just recorded, oldest first
+        """
+        try:
+            from .error_rates import error_rate_tracker
             
-            error_count = recent_errors.count()
-            critical_errors = recent_errors.filter(severity='critical').count()
+            # Occurrences in the sliding window (in memory, no COUNT query)
+            error_count = error_rate_tracker.count(platform.id)
+            threshold = self.monitoring_settings.error_rate_threshold
             
-            # High error rate threshold
-            if error_count >= self.settings.error_rate_threshold:
+            # High error rate threshold: errors per request in percent if
+            # request totals are reported, otherwise the plain error count
+            error_rate = error_rate_tracker.error_rate(platform.id, error_count)
+            if error_rate is not None:
+                if error_rate >= threshold:
+                    requests_total = error_rate_tracker.request_count(platform.id)
+                    self.create_alert(
+                        platform=platform,
+                        alert_type='high_error_rate',
+                        title=f'Hohe Fehlerrate: {platform.name}',
+                        message=f'Fehlerrate {error_rate:.1f}% ({error_count} Fehler / {requests_total} Anfragen in der letzten Stunde)',
+                        severity='high'
+                    )
+            elif error_count >= threshold:
                 self.create_alert(
                     platform=platform,
                     alert_type='high_error_rate',
@@ -237,14 +291,14 @@ class AlertManager:
                     severity='high'
                 )
             
-            # Critical error threshold
-            if critical_errors > 0:
-                latest_critical = recent_errors.filter(severity='critical').first()
+            # One alert for the most recent critical error (no need to look it up again)
+            if critical_errors:
+                latest_critical = critical_errors[-1]
                 self.create_alert(
                     platform=platform,
                     alert_type='critical_error',
                     title=f'Kritischer Fehler: {platform.name}',
-                    message=f'Kritischer Fehler erkannt: {latest_critical.message}',
+                    message=latest_critical.message,
                     severity='critical',
                     related_error=latest_critical
                 )
@@ -252,44 +306,61 @@ class AlertManager:
         except Exception as e:
             logger.error(f'Failed to check error thresholds for {platform.name}: {e}')
     
-    def check_downtime_alerts(self, platform, health_status):
-        """Check if platform is down and create downtime alerts"""
+    def check_downtime_alerts(self, platform, health_status, checked_at=None):
+        """
+        Raise or resolve downtime alerts with hysteresis
+        
+        Returns:
+            The newly created alert or None
+        """
         try:
+            state = alert_state.observe_health(platform.id, health_status, checked_at)
+            
             if health_status in ['offline', 'error']:
-                self.create_alert(
+                if not alert_state.should_raise_downtime(state):
+                    return None
+                
+                message = f'Platform ist {health_status} und nicht erreichbar'
+                if state['flapping']:
+                    message += f' (instabil: {state["transitions"]} Statuswechsel in den letzten {state["checks"]} Prüfungen)'
+                
+                alert, created = self.raise_alert(
                     platform=platform,
                     alert_type='downtime',
                     title=f'Platform Ausfall: {platform.name}',
-                    message=f'Platform ist {health_status} und nicht erreichbar',
+                    message=message,
                     severity='critical' if health_status == 'offline' else 'high'
                 )
-            else:
-                # Platform is back online, resolve downtime alerts
-                downtime_alerts = Alert.objects.filter(
-                    platform=platform,
-                    alert_type='downtime',
-                    status='active'
-                )
-                
-                for alert in downtime_alerts:
-                    alert.resolve("System - Platform wieder online")
+                return alert if created else None
+            
+            # Platform is back online, resolve downtime alerts once it is stable
+            if alert_state.should_clear_downtime(state):
+                alert_state.clear(platform, 'downtime', "System - Platform wieder online")
                     
         except Exception as e:
             logger.error(f'Failed to check downtime alerts for {platform.name}: {e}')
+        return None
     
     def check_response_time_alerts(self, platform, response_time):
-        """Check if response time exceeds thresholds"""
+        """
+        Check if response time exceeds thresholds
+        
+        Returns:
+            The newly created alert or None
+        """
         try:
-            if response_time and response_time > self.settings.response_time_threshold:
-                self.create_alert(
+            if response_time and response_time > self.monitoring_settings.response_time_threshold:
+                alert, created = self.raise_alert(
                     platform=platform,
                     alert_type='slow_response',
                     title=f'Langsame Antwortzeit: {platform.name}',
-                    message=f'Antwortzeit ({response_time:.0f}ms) überschreitet Grenzwert ({self.settings.response_time_threshold:.0f}ms)',
+                    message=f'Antwortzeit ({response_time:.0f}ms) überschreitet Grenzwert ({self.monitoring_settings.response_time_threshold:.0f}ms)',
                     severity='medium'
                 )
+                return alert if created else None
         except Exception as e:
             logger.error(f'Failed to check response time alerts for {platform.name}: {e}')
+        return None
 
 
 # Global alert manager instance
@@ -308,23 +379,22 @@ def create_platform_alert(platform_slug, alert_type, title, message, severity='m
 
 def process_error_alert(error_log):
     """Process error log and create appropriate alerts"""
-    alert_manager.check_error_thresholds(error_log.platform)
-    
-    # Create specific alert for critical errors
-    if error_log.severity == 'critical':
-        alert_manager.create_alert(
-            platform=error_log.platform,
-            alert_type='critical_error',
-            title=f'Kritischer Fehler: {error_log.platform.name}',
-            message=error_log.message,
-            severity='critical',
-            related_error=error_log
-        )
+    critical_errors = [error_log] if error_log.severity == 'critical' else None
+    alert_manager.check_error_thresholds(error_log.platform, critical_errors)
+
+
+def process_error_alerts(platform, critical_errors=None):
+    """Process a batch of errors from one platform and create appropriate alerts"""
+    alert_manager.check_error_thresholds(platform, critical_errors)
 
 
 def process_health_check_alert(platform, health_result):
-    """Process health check result and create appropriate alerts"""
-    alert_manager.check_downtime_alerts(platform, health_result['status'])
+    """Process health check result and create appropriate alerts (returns the new alerts)"""
+    created = [alert_manager.check_downtime_alerts(
+        platform, health_result['status'], health_result.get('checked_at')
+    )]
+    
+    if 'response_time' in health_result and health_result['status'] == 'online':
+        created.append(alert_manager.check_response_time_alerts(platform, health_result['response_time']))
     
-    if 'response_time' in health_result:
-        alert_manager.check_response_time_alerts(platform, health_result['response_time'])
\ No newline at end of file
+    return [alert for alert in created if alert]
\ No newline at end of file
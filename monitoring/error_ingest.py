@@ -0,0 +1,267 @@
+"""
+Buffered error ingestion
+Collects incoming error events in memory and writes them in batches
+"""
+
+import atexit
+import logging
+import threading
+from typing import Dict, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Platform, ErrorLog
+from . import summary
+from .error_rates import error_rate_tracker
+from . import metrics
+
+logger = logging.getLogger('monitoring')
+
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+
+
+class ErrorIngestBuffer:
+    """
+    In-memory queue for error events
+
+    Events are grouped by fingerprint as they arrive. A background thread
+    flushes the buffer every few seconds with one upsert per fingerprint
+    and evaluates alerts once per platform and flush.
+    """
+
+    def __init__(self, flush_interval: float = None, max_pending: int = None):
+        self.flush_interval = flush_interval or getattr(settings, 'ERROR_INGEST_FLUSH_INTERVAL', 2)
+        self.max_pending = max_pending or getattr(settings, 'ERROR_INGEST_MAX_PENDING', 10000)
+        self.max_attempts = getattr(settings, 'ERROR_INGEST_MAX_ATTEMPTS', 3)
+        self.dropped = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker = None
+        self._stopped = threading.Event()
+
+    def submit(self, event: Dict, count: int = 1) -> bool:
+        """
+        Queue an error event
+
+        Args:
+            event: Error data as sent to the webhook (with platform_id)
+            count: Number of occurrences this event represents
+
+        Returns:
+            True if the event was queued, False if the buffer is full
+        """
+        key = self.fingerprint(event)
+        now = timezone.now()
+
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry:
+                entry['count'] += count
+                entry['last_seen'] = now
+                # Keep the highest severity seen for this fingerprint
+                severity = event.get('severity', 'medium')
+                if SEVERITY_RANK.get(severity, 1) > SEVERITY_RANK.get(entry['severity'], 1):
+                    entry['severity'] = severity
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += count
+                metrics.count_error_events(event.get('severity', 'medium'), False, count)
+                return False
+            else:
+                self._pending[key] = {
+                    'event': event,
+                    'severity': event.get('severity', 'medium'),
+                    'count': count,
+                    'last_seen': now,
+                }
+
+        error_rate_tracker.record(event.get('platform_id'), event.get('severity', 'medium'), count)
+        metrics.count_error_events(event.get('severity', 'medium'), True, count)
+        self._ensure_worker()
+        return True
+
+    def fingerprint(self, event: Dict) -> str:
+        """Key used to group identical events"""
+        return ErrorLog.build_fingerprint(
+            event.get('platform_id'),
+            event.get('error_type', 'other'),
+            event.get('message', ''),
+        )
+
+    def flush(self) -> int:
+        """
+        Write all pending events to the database
+
+        Returns:
+            Number of fingerprints written
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+
+            if not pending:
+                return 0
+
+            with summary.deferred_updates():
+                touched = self._write(pending)
+
+            logger.info(f"Flushed {len(pending)} error fingerprints for {len(touched)} platforms")
+            return len(pending)
+
+    def _write(self, pending: Dict) -> Dict:
+        """Upsert pending entries and evaluate alerts per platform"""
+        platform_ids = {entry['event'].get('platform_id') for entry in pending.values()}
+        platforms = Platform.objects.in_bulk(platform_ids)
+
+        touched = {}
+        failed = {}
+        for fingerprint, entry in pending.items():
+            platform = platforms.get(entry['event'].get('platform_id'))
+            if not platform:
+                continue
+
+            try:
+                critical_error = self._upsert(platform, fingerprint, entry)
+            except Exception as e:
+                logger.error(f"Failed to store error for {platform.name}: {e}")
+                failed[fingerprint] = entry
+                continue
+
+            # Increments use queryset.update(), which sends no signals
+            summary.errors_changed(platform.id)
+
+            critical_errors = touched.setdefault(platform.id, (platform, []))[1]
+            if critical_error:
+                critical_errors.append(critical_error)
+
+        # Evaluate alerts once per platform instead of once per event
+        from .alert_system import process_error_alerts
+
+        for platform, critical_errors in touched.values():
+            try:
+                process_error_alerts(platform, critical_errors)
+            except Exception as e:
+                logger.error(f"Alert processing failed for {platform.name}: {e}")
+
+        if failed:
+            self._requeue(failed)
+        return touched
+
+    def _requeue(self, failed: Dict):
+        """
+        Put entries that could not be written back for the next flush
+
+        Entries are merged into events queued in the meantime. After
+        max_attempts failed writes the occurrences are counted as dropped.
+        """
+        with self._lock:
+            for fingerprint, entry in failed.items():
+                entry['attempts'] = entry.get('attempts', 0) + 1
+                if entry['attempts'] >= self.max_attempts:
+                    logger.error(f"Giving up on error {fingerprint} after {entry['attempts']} attempts")
+                    self.dropped += entry['count']
+                    metrics.count_error_events(entry['severity'], False, entry['count'])
+                    continue
+
+                newer = self._pending.get(fingerprint)
+                if newer:
+                    entry['count'] += newer['count']
+                    entry['last_seen'] = newer['last_seen']
+                    if SEVERITY_RANK.get(newer['severity'], 1) > SEVERITY_RANK.get(entry['severity'], 1):
+                        entry['severity'] = newer['severity']
+                self._pending[fingerprint] = entry
+
+    def _upsert(self, platform: Platform, fingerprint: str, entry: Dict) -> Optional[ErrorLog]:
+        """
+        Increment the unresolved error with this fingerprint or create it
+
+        Returns:
+            The error log if the event is critical, otherwise None
+        """
+        event = entry['event']
+        existing = ErrorLog.objects.filter(fingerprint=fingerprint, is_resolved=False)
+
+        if not self._increment(existing, entry):
+            try:
+                with transaction.atomic():
+                    error_log = ErrorLog.objects.create(
+                        platform=platform,
+                        error_type=event.get('error_type', 'other'),
+                        severity=entry['severity'],
+                        message=event.get('message', ''),
+                        stack_trace=event.get('stack_trace', ''),
+                        url_path=event.get('url_path', ''),
+                        user_agent=event.get('user_agent', ''),
+                        ip_address=event.get('ip_address'),
+                        user_id=event.get('user_id', ''),
+                        request_data=event.get('request_data', {}),
+                        environment_data=event.get('environment_data', {}),
+                        count=entry['count'],
+                        fingerprint=fingerprint,
+                    )
+                return error_log if error_log.severity == 'critical' else None
+            except IntegrityError:
+                # Another worker created the row in the meantime
+                self._increment(existing, entry)
+
+        if entry['severity'] == 'critical':
+            return existing.first()
+        return None
+
+    def _increment(self, queryset, entry: Dict) -> int:
+        """Add the buffered occurrences to an existing row"""
+        return queryset.update(
+            count=F('count') + entry['count'],
+            last_seen=entry['last_seen']
+        )
+
+    def get_platform_id(self, slug: str) -> Optional[int]:
+        """Resolve a platform slug without a database query per event"""
+        if not slug:
+            return None
+
+        cache_key = f'monitoring:platform_slug:{slug}'
+        platform_id = cache.get(cache_key)
+        if platform_id is None:
+            platform_id = Platform.objects.filter(slug=slug).values_list('id', flat=True).first() or 0
+            cache.set(cache_key, platform_id, 60)
+        return platform_id or None
+
+    def stop(self):
+        """Stop the worker and write remaining events"""
+        self._stopped.set()
+        try:
+            self.flush()
+            error_rate_tracker.checkpoint()
+        except Exception as e:
+            logger.error(f"Final error flush failed: {e}")
+
+    def _ensure_worker(self):
+        """Start the flush thread on first use"""
+        if self._worker and self._worker.is_alive():
+            return
+
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='error-ingest', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        """Flush loop of the background thread"""
+        while not self._stopped.wait(self.flush_interval):
+            close_old_connections()
+            try:
+                self.flush()
+                error_rate_tracker.checkpoint_if_due()
+            except Exception as e:
+                logger.error(f"Error flush failed: {e}")
+            finally:
+                close_old_connections()
+
+
+# Global error ingest buffer instance
+error_buffer = ErrorIngestBuffer()
+atexit.register(error_buffer.stop)
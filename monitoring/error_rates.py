@@ -0,0 +1,190 @@
+"""
+Sliding-window error rates
+Counts error occurrences per platform and severity in one-minute buckets
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, Optional
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import ErrorRateBucket, PerformanceMetric
+
+logger = logging.getLogger('monitoring')
+
+
+class ErrorRateTracker:
+    """
+    Sliding one-hour error counts per platform and severity
+
+    Each process counts new events in memory (`record`, O(1)) and adds
+    them to ErrorRateBucket rows at every checkpoint. The checkpoint also
+    reloads the last hour from the database, so counts include the other
+    workers and survive restarts; they lag behind other processes by at
+    most one checkpoint interval.
+
+    Reading a count (`count`) sums at most one bucket per minute of the
+    window, independent of the number of events.
+    """
+
+    def __init__(self, window_minutes: int = None, checkpoint_interval: float = None,
+                 bucket_retention_hours: int = None):
+        self.window_minutes = window_minutes or getattr(settings, 'ERROR_RATE_WINDOW_MINUTES', 60)
+        self.checkpoint_interval = checkpoint_interval or getattr(settings, 'ERROR_RATE_CHECKPOINT_INTERVAL', 30)
+        self.bucket_retention_hours = bucket_retention_hours or getattr(settings, 'ERROR_RATE_BUCKET_RETENTION_HOURS', 24)
+        self.requests_ttl = getattr(settings, 'ERROR_RATE_REQUESTS_TTL', 60)
+
+        # (platform_id, severity) -> {minute: count}
+        self._base = defaultdict(dict)   # loaded from the last checkpoint
+        self._delta = defaultdict(dict)  # recorded here since then
+        self._in_flight = {}             # delta being written by a checkpoint
+        self._requests = {}              # platform_id -> (expires_at, total)
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self._loaded = False
+        self._next_checkpoint = 0.0
+
+    def record(self, platform_id: int, severity: str, count: int = 1, timestamp: float = None):
+        """Count error occurrences"""
+        minute = int((timestamp or time.time()) // 60)
+        with self._lock:
+            bucket = self._delta[(platform_id, severity)]
+            bucket[minute] = bucket.get(minute, 0) + count
+
+    def count(self, platform_id: int, severities: Iterable[str] = None, minutes: int = None) -> int:
+        """
+        Occurrences within the window
+
+        Args:
+            platform_id: Platform to count
+            severities: Only these severities (default: all)
+            minutes: Window length (default: window_minutes)
+        """
+        self._ensure_loaded()
+
+        minutes = min(minutes or self.window_minutes, self.window_minutes)
+        oldest = int(time.time() // 60) - minutes + 1
+        severities = severities or ('low', 'medium', 'high', 'critical')
+
+        total = 0
+        with self._lock:
+            for severity in severities:
+                key = (platform_id, severity)
+                for buckets in (self._base.get(key), self._in_flight.get(key), self._delta.get(key)):
+                    if buckets:
+                        total += sum(count for minute, count in buckets.items() if minute >= oldest)
+        return total
+
+    def error_rate(self, platform_id: int, error_count: int = None) -> Optional[float]:
+        """
+        Errors per request in percent over the window
+
+        Request totals come from PerformanceMetric rows overlapping the
+        window. Returns None if no request data exists for the platform.
+        """
+        requests_total = self.request_count(platform_id)
+        if not requests_total:
+            return None
+
+        if error_count is None:
+            error_count = self.count(platform_id)
+        return error_count / requests_total * 100
+
+    def request_count(self, platform_id: int) -> int:
+        """Requests reported in PerformanceMetric for the window (cached briefly)"""
+        now = time.monotonic()
+        cached = self._requests.get(platform_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        since = timezone.now() - timedelta(minutes=self.window_minutes)
+        total = PerformanceMetric.objects.filter(
+            platform_id=platform_id, period_end__gt=since
+        ).aggregate(total=Sum('total_requests'))['total'] or 0
+
+        self._requests[platform_id] = (now + self.requests_ttl, total)
+        return total
+
+    def checkpoint_if_due(self):
+        if time.monotonic() >= self._next_checkpoint:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Write recorded counts to the database and reload the window"""
+        with self._checkpoint_lock:
+            with self._lock:
+                delta, self._delta = self._delta, defaultdict(dict)
+                self._in_flight = delta
+
+            try:
+                self._write(delta)
+            except Exception as e:
+                logger.error(f'Error rate checkpoint failed: {e}')
+                # Keep the counts for the next attempt
+                with self._lock:
+                    self._in_flight = {}
+                    for key, buckets in delta.items():
+                        for minute, count in buckets.items():
+                            self._delta[key][minute] = self._delta[key].get(minute, 0) + count
+                return
+
+            self._load()
+            self._prune()
+            self._next_checkpoint = time.monotonic() + self.checkpoint_interval
+
+    def _write(self, delta: Dict):
+        for (platform_id, severity), buckets in delta.items():
+            for minute, count in buckets.items():
+                minute_start = datetime.fromtimestamp(minute * 60, tz=dt_timezone.utc)
+                existing = ErrorRateBucket.objects.filter(
+                    platform_id=platform_id, severity=severity, minute_start=minute_start
+                )
+                if existing.update(count=F('count') + count):
+                    continue
+                try:
+                    with transaction.atomic():
+                        ErrorRateBucket.objects.create(
+                            platform_id=platform_id, severity=severity,
+                            minute_start=minute_start, count=count
+                        )
+                except IntegrityError:
+                    # Another worker created the bucket in the meantime
+                    existing.update(count=F('count') + count)
+
+    def _load(self):
+        """Replace the base counts with the last window from the database"""
+        since = timezone.now() - timedelta(minutes=self.window_minutes)
+        rows = ErrorRateBucket.objects.filter(minute_start__gte=since).values_list(
+            'platform_id', 'severity', 'minute_start', 'count'
+        )
+
+        base = defaultdict(dict)
+        for platform_id, severity, minute_start, count in rows:
+            base[(platform_id, severity)][int(minute_start.timestamp() // 60)] = count
+
+        with self._lock:
+            self._base = base
+            self._in_flight = {}
+            self._loaded = True
+
+    def _prune(self):
+        cutoff = timezone.now() - timedelta(hours=self.bucket_retention_hours)
+        ErrorRateBucket.objects.filter(minute_start__lt=cutoff).delete()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        try:
+            self._load()
+        except Exception as e:
+            logger.error(f'Failed to load error rate checkpoints: {e}')
+            self._loaded = True
+
+
+# Global error rate tracker instance
+error_rate_tracker = ErrorRateTracker()
@@ -0,0 +1,345 @@
+"""
+Concurrent health check engine
+Probes all active platforms in parallel and stores the results in one batch
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Tuple
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+from .models import Platform, SystemHealth
+from .http_client import get_session
+from . import summary
+from . import metrics
+
+logger = logging.getLogger('monitoring')
+
+
+class HealthCheckEngine:
+    """
+    Runs health probes for many platforms concurrently
+
+    Probes run on a bounded thread pool and share one keep-alive session.
+    Response times are measured to the first byte, so connection setup on
+    our side does not count towards a platform's latency.
+    A round never takes longer than the global deadline; platforms that
+    have not answered by then are recorded as offline.
+    """
+
+    def __init__(self, max_workers: int = None, request_timeout: float = None, deadline: float = None):
+        self.max_workers = max_workers or getattr(settings, 'HEALTH_CHECK_MAX_WORKERS', 10)
+        self.request_timeout = request_timeout or getattr(settings, 'HEALTH_CHECK_TIMEOUT', 10)
+        self.deadline = deadline or getattr(settings, 'HEALTH_CHECK_DEADLINE', 15)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool shared by all rounds"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='health-check'
+                )
+            return self._executor
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session sized to the thread pool"""
+        # No retries: a failing probe is a result, not something to hide
+        return get_session('health', pool_maxsize=self.max_workers, retries=0)
+
+    def run_round(self, platforms=None, process_alerts: bool = True) -> List[Tuple[Platform, Dict]]:
+        """
+        Probe all given platforms concurrently and store the results
+
+        Args:
+            platforms: Platforms to check (default: all active platforms)
+            process_alerts: Whether to run alert processing for each result
+
+        Returns:
+            List of (platform, health_result) tuples in platform order
+        """
+        if platforms is None:
+            platforms = Platform.objects.filter(is_active=True)
+        platforms = list(platforms)
+
+        if not platforms:
+            return []
+
+        # Never wait longer for a single request than for the whole round
+        timeout = min(self.request_timeout, self.deadline)
+        futures = {
+            platform.id: self.executor.submit(self.probe, platform, timeout)
+            for platform in platforms
+        }
+
+        done, not_done = wait(futures.values(), timeout=self.deadline)
+
+        results = []
+        for platform in platforms:
+            future = futures[platform.id]
+            if future in done:
+                try:
+                    health_result = future.result()
+                except Exception as e:
+                    health_result = self._result('error', 0, error_message=str(e))
+            else:
+                future.cancel()
+                health_result = self._result(
+                    'offline', self.deadline * 1000,
+                    error_message='Health check deadline exceeded'
+                )
+            results.append((platform, health_result))
+
+            total_ms = health_result.get('timings', {}).get('total_ms') or health_result['response_time']
+            metrics.observe_health_probe(platform.slug, health_result['status'], total_ms / 1000)
+
+        if not_done:
+            logger.warning(f'{len(not_done)} health checks exceeded the {self.deadline}s deadline')
+
+        self._store_results(results)
+        health_snapshot.store(results)
+
+        if process_alerts:
+            from .alert_system import process_health_check_alert
+
+            for platform, health_result in results:
+                try:
+                    process_health_check_alert(platform, health_result)
+                except Exception as e:
+                    logger.error(f'Alert processing failed for {platform.name}: {e}')
+
+        return results
+
+    def check_platform(self, platform: Platform, process_alerts: bool = True) -> Dict:
+        """Probe a single platform (convenience wrapper around run_round)"""
+        return self.run_round([platform], process_alerts=process_alerts)[0][1]
+
+    def probe(self, platform: Platform, timeout: float) -> Dict:
+        """
+        Perform the HTTP probe for one platform
+
+        Runs on a worker thread, so it must not touch the database.
+        """
+        start_time = time.time()
+
+        try:
+            health_url = f"{platform.url.rstrip('/')}{platform.health_endpoint}"
+            response = self.session.get(health_url, timeout=timeout)
+            timings = getattr(response, 'timings', {})
+            response_time = timings.get('ttfb_ms') or (time.time() - start_time) * 1000  # Convert to milliseconds
+
+            # Determine status based on response
+            if response.status_code == 200:
+                status = 'online'
+                error_message = ''
+            elif response.status_code in [500, 502, 503, 504]:
+                status = 'error'
+                error_message = f'HTTP {response.status_code}'
+            else:
+                status = 'warning'
+                error_message = f'HTTP {response.status_code}'
+
+            health_result = self._result(status, response_time, response.status_code, error_message)
+            health_result['timings'] = {
+                name: round(value, 2) for name, value in timings.items() if value is not None
+            }
+            return health_result
+
+        except requests.exceptions.Timeout:
+            return self._result('offline', (time.time() - start_time) * 1000, error_message='Connection timeout')
+
+        except requests.exceptions.ConnectionError:
+            return self._result('offline', (time.time() - start_time) * 1000, error_message='Connection failed')
+
+        except Exception as e:
+            return self._result('error', (time.time() - start_time) * 1000, error_message=str(e))
+
+    def _store_results(self, results: List[Tuple[Platform, Dict]]):
+        """Write all results of a round with a single bulk insert"""
+        health_checks = [
+            SystemHealth(
+                platform=platform,
+                status=health_result['status'],
+                response_time=health_result['response_time'],
+                status_code=health_result.get('status_code'),
+                error_message=health_result.get('error_message', '')
+            )
+            for platform, health_result in results
+        ]
+
+        try:
+            SystemHealth.objects.bulk_create(health_checks)
+        except Exception as e:
+            logger.error(f'Failed to store health check results: {e}')
+            return
+
+        for (platform, health_result), health_check in zip(results, health_checks):
+            health_result['checked_at'] = health_check.checked_at or timezone.now()
+
+        try:
+            # bulk_create sends no post_save signals
+            summary.record_health(health_checks)
+        except Exception as e:
+            logger.error(f'Failed to update platform summaries: {e}')
+
+    def _result(self, status: str, response_time: float, status_code: int = None, error_message: str = '') -> Dict:
+        """Build a health result dictionary"""
+        return {
+            'status': status,
+            'response_time': response_time,
+            'status_code': status_code,
+            'error_message': error_message,
+            'checked_at': timezone.now(),
+        }
+
+
+class HealthSnapshot:
+    """
+    Latest health result per platform, kept in the Django cache
+
+    Readers get cached results together with their age. Entries older than
+    the TTL are still served, but trigger a background refresh of the stale
+    platforms; only one refresh runs at a time across all workers.
+    """
+
+    key_prefix = 'monitoring:health_snapshot'
+
+    def __init__(self, engine: HealthCheckEngine, ttl: int = None):
+        self.engine = engine
+        self.ttl = ttl or getattr(settings, 'HEALTH_SNAPSHOT_TTL', 60)
+
+    def store(self, results: List[Tuple[Platform, Dict]]):
+        """Store round results in the cache"""
+        entries = {
+            self._key(platform.id): dict(health_result)
+            for platform, health_result in results
+        }
+        try:
+            # Keep entries well past their TTL so stale data can still be shown
+            cache.set_many(entries, timeout=self.ttl * 10)
+        except Exception as e:
+            logger.error(f'Failed to store health snapshot: {e}')
+
+    def get(self, platforms=None, refresh_stale: bool = True) -> List[Tuple[Platform, Dict]]:
+        """
+        Read cached results for the given platforms
+
+        Args:
+            platforms: Platforms to read (default: all active platforms)
+            refresh_stale: Start a background refresh for stale platforms
+
+        Returns:
+            List of (platform, health_result) tuples; each result carries
+            'age_seconds' and 'stale'
+        """
+        if platforms is None:
+            platforms = Platform.objects.filter(is_active=True)
+        platforms = list(platforms)
+
+        try:
+            entries = cache.get_many([self._key(platform.id) for platform in platforms])
+        except Exception as e:
+            logger.error(f'Failed to read health snapshot: {e}')
+            entries = {}
+
+        now = timezone.now()
+        results = []
+        stale_platforms = []
+        cold_results = []
+
+        for platform in platforms:
+            health_result = entries.get(self._key(platform.id))
+
+            if health_result is None:
+                health_result = self._from_database(platform)
+                if health_result['checked_at']:
+                    cold_results.append((platform, dict(health_result)))
+
+            if health_result['checked_at']:
+                age_seconds = (now - health_result['checked_at']).total_seconds()
+            else:
+                age_seconds = None
+
+            stale = age_seconds is None or age_seconds > self.ttl
+            if stale:
+                stale_platforms.append(platform)
+
+            health_result.update({
+                'age_seconds': round(age_seconds, 1) if age_seconds is not None else None,
+                'stale': stale,
+            })
+            results.append((platform, health_result))
+
+        if cold_results:
+            self.store(cold_results)
+
+        if refresh_stale and stale_platforms:
+            self.refresh_async(stale_platforms)
+
+        return results
+
+    def refresh_async(self, platforms) -> bool:
+        """
+        Refresh the given platforms on a background thread
+
+        Returns:
+            True if a refresh was started, False if one is already running
+        """
+        lock_key = f'{self.key_prefix}:refreshing'
+        if not cache.add(lock_key, True, timeout=int(self.engine.deadline) + 5):
+            return False
+
+        def refresh():
+            try:
+                self.engine.run_round(platforms)
+            except Exception as e:
+                logger.error(f'Background health refresh failed: {e}')
+            finally:
+                cache.delete(lock_key)
+                connections.close_all()
+
+        threading.Thread(target=refresh, name='health-snapshot-refresh', daemon=True).start()
+        return True
+
+    def is_refreshing(self) -> bool:
+        """Check if a background refresh is in progress"""
+        return bool(cache.get(f'{self.key_prefix}:refreshing'))
+
+    def _from_database(self, platform: Platform) -> Dict:
+        """Fall back to the latest stored health check (cold cache)"""
+        latest_health = platform.health_checks.first()
+        if not latest_health:
+            return {
+                'status': 'unknown',
+                'response_time': None,
+                'status_code': None,
+                'error_message': '',
+                'checked_at': None,
+            }
+
+        return {
+            'status': latest_health.status,
+            'response_time': latest_health.response_time,
+            'status_code': latest_health.status_code,
+            'error_message': latest_health.error_message,
+            'checked_at': latest_health.checked_at,
+        }
+
+    def _key(self, platform_id: int) -> str:
+        return f'{self.key_prefix}:{platform_id}'
+
+
+# Global health check engine instance
+health_engine = HealthCheckEngine()
+
+# Global health snapshot instance
+health_snapshot = HealthSnapshot(health_engine)
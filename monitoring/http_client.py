@@ -0,0 +1,168 @@
+"""
+Shared outbound HTTP layer
+Pooled keep-alive sessions with retries and per-phase request timings
+"""
+
+import time
+import logging
+import threading
+from typing import Dict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+logger = logging.getLogger('monitoring')
+
+_timings = threading.local()
+
+
+def _reset_timings():
+    _timings.data = {'connect_ms': 0.0, 'tls_ms': 0.0, 'ttfb_ms': None}
+
+
+def _record(name: str, value: float):
+    if not hasattr(_timings, 'data'):
+        _reset_timings()
+    _timings.data[name] = value
+
+
+def get_timings() -> Dict:
+    """Timings of the last request made on this thread"""
+    return dict(getattr(_timings, 'data', {}))
+
+
+class TimedConnectionMixin:
+    """
+    Records TCP connect, TLS handshake and time-to-first-byte
+
+    Reused keep-alive connections report 0 for connect and TLS time.
+    """
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        self._tcp_connect_ms = (time.perf_counter() - start) * 1000
+        _record('connect_ms', self._tcp_connect_ms)
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        self._tcp_connect_ms = 0.0
+        super().connect()
+        if isinstance(self, HTTPSConnection):
+            _record('tls_ms', max(0.0, (time.perf_counter() - start) * 1000 - self._tcp_connect_ms))
+
+    def request(self, *args, **kwargs):
+        super().request(*args, **kwargs)
+        self._request_sent_at = time.perf_counter()
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        sent_at = getattr(self, '_request_sent_at', None)
+        if sent_at is not None:
+            _record('ttfb_ms', (time.perf_counter() - sent_at) * 1000)
+        return response
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter with per-host connection pools and request timings
+
+    Every response gets a `timings` attribute with connect_ms, tls_ms,
+    ttfb_ms and total_ms.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        _reset_timings()
+        start = time.perf_counter()
+        response = super().send(request, *args, **kwargs)
+
+        timings = get_timings()
+        timings['total_ms'] = (time.perf_counter() - start) * 1000
+        if timings.get('ttfb_ms') is None:
+            timings['ttfb_ms'] = timings['total_ms']
+        response.timings = timings
+        return response
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def build_session(pool_connections: int = None, pool_maxsize: int = None,
+                  retries: int = None, backoff_factor: float = None) -> requests.Session:
+    """
+    Create a session with pooled keep-alive connections
+
+    Args:
+        pool_connections: Number of hosts to keep pools for
+        pool_maxsize: Connections kept per host
+        retries: Retries for connection errors and 502/503/504 responses
+        backoff_factor: Exponential backoff between retries (seconds)
+    """
+    if retries is None:
+        retries = getattr(settings, 'HTTP_CLIENT_RETRIES', 2)
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor if backoff_factor is not None else getattr(settings, 'HTTP_CLIENT_BACKOFF', 0.5),
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False,
+    )
+
+    adapter = TimedHTTPAdapter(
+        pool_connections=pool_connections or getattr(settings, 'HTTP_CLIENT_POOL_CONNECTIONS', 20),
+        pool_maxsize=pool_maxsize or getattr(settings, 'HTTP_CLIENT_POOL_MAXSIZE', 10),
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(name: str = 'default', **options) -> requests.Session:
+    """
+    Get a shared session by name
+
+    The options are only used when the session is created; use a separate
+    name for callers that need different pool or retry settings.
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = build_session(**options)
+                _sessions[name] = session
+    return session
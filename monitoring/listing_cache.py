@@ -0,0 +1,316 @@
+"""
+Remote directory listing cache
+Serves repeated listings of the server file view from memory and revalidates
+them against the directory's modification time with a single SFTP stat;
+pages through and streams listings of huge directories
+"""
+
+import base64
+import heapq
+import json
+import logging
+import posixpath
+import stat
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from django.conf import settings
+
+logger = logging.getLogger('monitoring')
+
+
+def normalize_path(path: str) -> str:
+    return posixpath.normpath(path or '/')
+
+
+def build_entry(path: str, item) -> Dict:
+    """Listing entry of the file API for the SFTPAttributes of one item"""
+    return {
+        'name': item.filename,
+        'path': posixpath.join(path, item.filename),
+        'size': item.st_size,
+        'modified': datetime.fromtimestamp(item.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+        'permissions': oct(item.st_mode)[-3:],
+        'owner': item.st_uid,
+        'group': item.st_gid,
+        'type': 'directory' if stat.S_ISDIR(item.st_mode) else 'file',
+    }
+
+
+def listing_order(entry: Dict) -> Tuple:
+    """Default order: directories first, each group by name"""
+    return (entry['type'] != 'directory', entry['name'].lower())
+
+
+def build_entries(path: str, attrs) -> List[Dict]:
+    """
+    Listing entries as returned by the file API
+
+    Args:
+        path: Listed directory
+        attrs: SFTPAttributes of its entries
+
+    Returns:
+        Entry dicts, directories first, each group sorted by name
+    """
+    return sorted((build_entry(path, item) for item in attrs), key=listing_order)
+
+
+# Sortable fields of a listing page; names break ties, so keys are unique
+SORT_FIELDS = {
+    'name': lambda entry: entry['name'].lower(),
+    'size': lambda entry: entry['size'],
+    'modified': lambda entry: entry['modified'],
+}
+
+
+class _Descending:
+    """Key wrapper that reverses the order of the wrapped value"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def encode_cursor(sort: str, order: str, key: List) -> str:
+    data = json.dumps({'sort': sort, 'order': order, 'key': key}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> List:
+    """Key of the last entry of the previous page; ValueError if invalid"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        key = data['key']
+        valid = data['sort'] == sort and data['order'] == order and isinstance(key, list) and len(key) == 3
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not valid:
+        raise ValueError('Cursor does not match sort order')
+    return key
+
+
+def select_page(entries: Iterable[Dict], sort: str = 'name', order: str = 'asc', prefix: str = '',
+                cursor: Optional[str] = None, limit: int = 100) -> Dict:
+    """
+    One page of a listing, directories first
+
+    Keyset pagination: the cursor holds the sort key of the last entry
+    returned, so pages stay consistent while entries are added or removed.
+    The entries are consumed in a single pass and only `limit` of them are
+    kept, so a page of a streamed 100k entry listing needs O(limit) memory.
+
+    Args:
+        entries: Listing entries in any order
+        sort: 'name', 'size' or 'modified'
+        order: 'asc' or 'desc'
+        prefix: Only entries whose name starts with it (case-insensitive)
+        cursor: next_cursor of the previous page
+        limit: Page size
+
+    Returns:
+        Dict with items, total_items (matching the prefix) and next_cursor
+    """
+    field = SORT_FIELDS[sort]
+    descending = order == 'desc'
+    prefix = prefix.lower()
+
+    def raw_key(entry):
+        return [int(entry['type'] != 'directory'), field(entry), entry['name']]
+
+    def sort_key(raw):
+        group, value, name = raw
+        return (group, _Descending((value, name))) if descending else (group, value, name)
+
+    after = sort_key(decode_cursor(cursor, sort, order)) if cursor else None
+    matched = 0
+
+    def candidates():
+        nonlocal matched
+        for entry in entries:
+            if prefix and not entry['name'].lower().startswith(prefix):
+                continue
+            matched += 1
+            if after is None or after < sort_key(raw_key(entry)):
+                yield entry
+
+    page = heapq.nsmallest(limit + 1, candidates(), key=lambda entry: sort_key(raw_key(entry)))
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    return {
+        'items': page,
+        'total_items': matched,
+        'next_cursor': encode_cursor(sort, order, raw_key(page[-1])) if has_more else None,
+    }
+
+
+class DirectoryListingCache:
+    """
+    Per-process cache of remote directory listings
+
+    A listing younger than `ttl` seconds is served without touching the
+    server. Older listings are revalidated with one stat of the directory:
+    creating, deleting or renaming an entry changes the directory's mtime,
+    so an unchanged mtime means the cached listing is still complete.
+    (Changes of a file's size or mtime inside the directory do not touch
+    the directory and show up after the next full listing.)
+
+    SFTP reports mtimes in whole seconds; a directory modified in the
+    second it was listed may change again without a visible mtime change,
+    so such listings are only trusted for the TTL. Our own write, delete,
+    upload and mkdir operations invalidate the affected entries at once;
+    other worker processes pick the change up through the mtime.
+
+    Directories with more than `max_items` entries are not cached; they
+    are streamed from the server for every request.
+    """
+
+    def __init__(self, ttl: float = None, max_entries: int = None, max_items: int = None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'DIRECTORY_CACHE_TTL', 5)
+        self.max_entries = max_entries or getattr(settings, 'DIRECTORY_CACHE_MAX_ENTRIES', 256)
+        self.max_items = max_items or getattr(settings, 'DIRECTORY_CACHE_MAX_ITEMS', 20000)
+        self._entries = OrderedDict()   # (target, path) -> {'items', 'mtime', 'checked_at'}
+        self._lock = threading.Lock()
+
+    def fresh(self, target: Tuple, path: str) -> Optional[List[Dict]]:
+        """Cached listing younger than the TTL (no SFTP client needed), else None"""
+        with self._lock:
+            entry = self._entries.get((target, normalize_path(path)))
+        if entry is not None and time.monotonic() - entry['checked_at'] < self.ttl:
+            return entry['items']
+        return None
+
+    def lookup(self, sftp, target: Tuple, path: str) -> Tuple[Optional[List[Dict]], int]:
+        """
+        Cached listing, revalidated with a stat once the TTL has passed
+
+        Args:
+            sftp: SFTP client connected to the target
+            target: Server the client is connected to (see ssh_target)
+            path: Directory to list
+
+        Returns:
+            Tuple of (cached entries or None, directory mtime or None if
+            served within the TTL); raises FileNotFoundError and
+            PermissionError of the stat
+        """
+        key = (target, normalize_path(path))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None and now - entry['checked_at'] < self.ttl:
+            return entry['items'], None
+
+        # stat before listing: a change during the listing leaves a newer mtime
+        mtime = sftp.stat(path).st_mtime
+        if entry is not None and entry['mtime'] is not None and entry['mtime'] == mtime:
+            entry['checked_at'] = now
+            return entry['items'], mtime
+        return None, mtime
+
+    def store(self, target: Tuple, path: str, items: List[Dict], mtime: int):
+        """Cache a listing read after a stat that returned `mtime`"""
+        if len(items) > self.max_items:
+            return
+
+        racy = mtime >= int(time.time()) - 1
+        key = (target, normalize_path(path))
+        with self._lock:
+            self._entries[key] = {'items': items, 'mtime': None if racy else mtime, 'checked_at': time.monotonic()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def list(self, sftp, target: Tuple, path: str) -> Tuple[List[Dict], bool]:
+        """
+        Listing of a remote directory, from the cache if still valid
+
+        Args:
+            sftp: SFTP client connected to the target
+            target: Server the client is connected to (see ssh_target)
+            path: Directory to list
+
+        Returns:
+            Tuple of (entries, served_from_cache)
+        """
+        items, mtime = self.lookup(sftp, target, path)
+        if items is not None:
+            return items, True
+
+        items = build_entries(path, sftp.listdir_attr(path))
+        self.store(target, path, items, mtime)
+        return items, False
+
+    def stream(self, sftp, target: Tuple, path: str, mtime: int) -> Iterator[Dict]:
+        """
+        Entries of a directory in server order, as the server sends them
+
+        Uses SFTP's incremental readdir, so the first entries arrive before
+        the directory has been read completely. A complete listing of at
+        most `max_items` entries is cached afterwards.
+
+        Args:
+            sftp: SFTP client connected to the target
+            target: Server the client is connected to
+            path: Directory to list
+            mtime: Directory mtime from the stat of lookup()
+        """
+        items = []
+        for item in sftp.listdir_iter(path):
+            entry = build_entry(path, item)
+            if items is not None:
+                items.append(entry)
+                if len(items) > self.max_items:
+                    items = None
+            yield entry
+
+        if items is not None:
+            items.sort(key=listing_order)
+            self.store(target, path, items, mtime)
+
+    def invalidate(self, target: Tuple, path: str, subtree: bool = False):
+        """
+        Drop the cached listing of a directory
+
+        Args:
+            target: Server of the directory
+            path: Directory whose entries changed
+            subtree: Also drop all directories below it (deleted directories)
+        """
+        path = normalize_path(path)
+        prefix = path.rstrip('/') + '/'
+
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] != target:
+                    continue
+                if key[1] == path or (subtree and key[1].startswith(prefix)):
+                    del self._entries[key]
+
+    def invalidate_entry(self, target: Tuple, path: str):
+        """Drop the listing containing a created, changed or deleted path"""
+        path = normalize_path(path)
+        self.invalidate(target, posixpath.dirname(path))
+        self.invalidate(target, path, subtree=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global listing cache instance
+directory_cache = DirectoryListingCache()
@@ -0,0 +1,106 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+from monitoring.models import ErrorLog
+from monitoring.summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Compute fingerprints for existing error logs and merge duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of error logs per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Run without making changes (preview mode)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING('🔍 PREVIEW MODE - Keine Änderungen werden durchgeführt')
+            )
+
+        pending = ErrorLog.objects.filter(fingerprint__isnull=True)
+        self.stdout.write(f'🔄 Computing fingerprints for {pending.count()} error logs...')
+
+        updated = 0
+        merged = 0
+        last_id = 0
+
+        # Unresolved fingerprint -> id of the row that keeps it
+        keepers = {}
+
+        while True:
+            batch = list(
+                pending.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'platform_id', 'error_type', 'message', 'is_resolved',
+                      'count', 'first_seen', 'last_seen')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            to_update = []
+            for error_log in batch:
+                error_log.fingerprint = ErrorLog.build_fingerprint(
+                    error_log.platform_id, error_log.error_type, error_log.message
+                )
+
+                if error_log.is_resolved:
+                    to_update.append(error_log)
+                    continue
+
+                keeper_id = keepers.get(error_log.fingerprint)
+                if keeper_id is None:
+                    keeper_id = ErrorLog.objects.filter(
+                        fingerprint=error_log.fingerprint,
+                        is_resolved=False
+                    ).values_list('id', flat=True).first()
+
+                if keeper_id is None:
+                    keepers[error_log.fingerprint] = error_log.id
+                    to_update.append(error_log)
+                    continue
+
+                # Fold the duplicate into the row that already owns the fingerprint
+                merged += 1
+                keepers[error_log.fingerprint] = keeper_id
+                if not dry_run:
+                    ErrorLog.objects.filter(id=keeper_id).update(
+                        count=F('count') + error_log.count,
+                        first_seen=Least('first_seen', error_log.first_seen),
+                        last_seen=Greatest('last_seen', error_log.last_seen),
+                    )
+                    ErrorLog.objects.filter(id=error_log.id).update(
+                        fingerprint=error_log.fingerprint,
+                        is_resolved=True,
+                        resolved_at=timezone.now(),
+                        resolved_by='System - Duplikat zusammengeführt',
+                    )
+
+            if not dry_run:
+                ErrorLog.objects.bulk_update(to_update, ['fingerprint'])
+            updated += len(to_update)
+
+            self.stdout.write(f'   {updated + merged} processed...')
+
+        if merged and not dry_run:
+            # Merged duplicates were resolved with queryset.update()
+            rebuild_summaries()
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('✅ Fingerprint backfill abgeschlossen:'))
+        self.stdout.write(f'   • Fingerprints gesetzt: {updated}')
+        self.stdout.write(f'   • Duplikate zusammengeführt: {merged}')
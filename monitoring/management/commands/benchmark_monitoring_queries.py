@@ -0,0 +1,292 @@
+import os
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from monitoring.models import Platform, ErrorLog, Alert, PlatformSummary
+from monitoring.queries import annotate_platform_overview
+
+# Indexes under test: dropped for the "before" run, which is rolled back
+BENCHMARK_INDEXES = {
+    ErrorLog: ['errorlog_unresolved_type_idx', 'errorlog_unresolved_idx'],
+    Alert: ['alert_active_type_idx', 'alert_active_idx'],
+}
+
+BENCHMARK_SLUG_PREFIX = 'benchmark-'
+
+# Database names treated as disposable; others need --i-know
+SCRATCH_DATABASE_PREFIXES = ('test_', 'scratch', 'benchmark')
+
+
+def is_scratch_database() -> bool:
+    """Whether the default database is a scratch copy the benchmark may alter"""
+    name = str(connection.settings_dict['NAME'] or '')
+    if name in getattr(settings, 'MONITORING_BENCHMARK_DATABASES', []):
+        return True
+    if connection.vendor == 'sqlite' and (name == ':memory:' or 'mode=memory' in name):
+        return True
+    return os.path.basename(name).lower().startswith(SCRATCH_DATABASE_PREFIXES)
+
+
+class Command(BaseCommand):
+    help = 'Seed monitoring tables and compare query plans and timings with and without the hot-query indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--platforms',
+            type=int,
+            default=20,
+            help='Number of benchmark platforms (default: 20)',
+        )
+        parser.add_argument(
+            '--errors',
+            type=int,
+            default=2000000,
+            help='Number of error logs to seed (default: 2000000)',
+        )
+        parser.add_argument(
+            '--alerts',
+            type=int,
+            default=200000,
+            help='Number of alerts to seed (default: 200000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per query, the median is reported (default: 5)',
+        )
+        parser.add_argument(
+            '--skip-seed',
+            action='store_true',
+            help='Reuse benchmark data from a previous --keep run',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the seeded data after the benchmark',
+        )
+        parser.add_argument(
+            '--no-explain',
+            action='store_true',
+            help='Only print timings',
+        )
+        parser.add_argument(
+            '--i-know',
+            action='store_true',
+            help='Run against a database that is not a scratch copy (drops live indexes while it runs)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'mysql':
+            raise CommandError('Der Vorher-Lauf braucht transaktionale DDL (PostgreSQL oder SQLite)')
+
+        # DROP INDEX locks the tables exclusively until the rollback, and the
+        # seed writes millions of rows; never do that to production by accident
+        if not is_scratch_database() and not options['i_know']:
+            raise CommandError(
+                f'Datenbank "{connection.settings_dict["NAME"]}" ist keine Scratch-Datenbank '
+                f'(Name beginnt mit {", ".join(SCRATCH_DATABASE_PREFIXES)} oder MONITORING_BENCHMARK_DATABASES). '
+                'Mit --i-know trotzdem ausführen.'
+            )
+
+        self.repeat = options['repeat']
+        self.explain = not options['no_explain']
+
+        if not options['skip_seed']:
+            self.seed(options['platforms'], options['errors'], options['alerts'])
+
+        platforms = list(Platform.objects.filter(slug__startswith=BENCHMARK_SLUG_PREFIX))
+        if not platforms:
+            raise CommandError('Keine Benchmark-Daten vorhanden (ohne --skip-seed ausführen)')
+
+        self.analyze()
+
+        try:
+            self.stdout.write('')
+            self.stdout.write('📉 VORHER (ohne neue Indizes)')
+            self.stdout.write('=' * 50)
+            before = self.run_without_indexes(platforms)
+
+            self.stdout.write('')
+            self.stdout.write('📈 NACHHER (mit Indizes)')
+            self.stdout.write('=' * 50)
+            after = self.run_queries(platforms)
+
+            self.stdout.write('')
+            self.stdout.write('📊 Vergleich (Median in ms)')
+            self.stdout.write('-' * 50)
+            for name in after:
+                speedup = before[name] / after[name] if after[name] else 0
+                self.stdout.write(f'   {name:<28} {before[name]:>9.2f} → {after[name]:>9.2f}  ({speedup:.1f}x)')
+        finally:
+            if not options['keep']:
+                self.cleanup()
+
+    def seed(self, platform_count, error_count, alert_count):
+        """Insert benchmark rows with bulk_create (no signals)"""
+        self.cleanup()
+        self.stdout.write(f'🌱 Seeding {platform_count} Plattformen, {error_count} Fehler, {alert_count} Warnungen...')
+
+        Platform.objects.bulk_create([
+            Platform(
+                name=f'Benchmark {i}',
+                slug=f'{BENCHMARK_SLUG_PREFIX}{i}',
+                url=f'http://benchmark-{i}.invalid',
+                is_active=False,
+            )
+            for i in range(platform_count)
+        ])
+        platforms = list(Platform.objects.filter(slug__startswith=BENCHMARK_SLUG_PREFIX))
+
+        now = timezone.now()
+        error_types = [choice for choice, _ in ErrorLog.ERROR_TYPE_CHOICES]
+        severities = ['low'] * 4 + ['medium'] * 3 + ['high'] * 2 + ['critical']
+        alert_types = [choice for choice, _ in Alert.ALERT_TYPE_CHOICES]
+        # One active alert per dedup key, as enforced by alert_active_dedup_uniq
+        active_keys = set()
+
+        start = time.monotonic()
+        batch_size = 10000
+
+        for offset in range(0, error_count, batch_size):
+            batch = []
+            for i in range(offset, min(offset + batch_size, error_count)):
+                seen = now - timedelta(seconds=random.randint(0, 90 * 86400))
+                batch.append(ErrorLog(
+                    platform=random.choice(platforms),
+                    error_type=random.choice(error_types),
+                    severity=random.choice(severities),
+                    message=f'Benchmark error {i % 5000}',
+                    # Most errors get resolved eventually
+                    is_resolved=random.random() < 0.9,
+                    first_seen=seen,
+                    last_seen=seen,
+                ))
+            ErrorLog.objects.bulk_create(batch)
+
+        for offset in range(0, alert_count, batch_size):
+            batch = []
+            for i in range(offset, min(offset + batch_size, alert_count)):
+                platform = random.choice(platforms)
+                alert_type = random.choice(alert_types)
+                dedup_key = Alert.build_dedup_key(platform.id, alert_type)
+                active = random.random() < 0.05 and dedup_key not in active_keys
+                if active:
+                    active_keys.add(dedup_key)
+                batch.append(Alert(
+                    platform=platform,
+                    alert_type=alert_type,
+                    title=f'Benchmark alert {i}',
+                    message='Benchmark',
+                    severity=random.choice(severities),
+                    status='active' if active else 'resolved',
+                    dedup_key=dedup_key,
+                ))
+            Alert.objects.bulk_create(batch)
+
+        self.stdout.write(f'   Seed abgeschlossen in {time.monotonic() - start:.1f}s')
+
+    def analyze(self):
+        """Refresh planner statistics after seeding"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def run_without_indexes(self, platforms):
+        """Drop the indexes in a transaction, run the queries and roll back"""
+        with transaction.atomic():
+            # Plain DROP INDEX: both PostgreSQL and SQLite roll it back
+            with connection.cursor() as cursor:
+                for names in BENCHMARK_INDEXES.values():
+                    for name in names:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+            results = self.run_queries(platforms)
+            transaction.set_rollback(True)
+        return results
+
+    def get_queries(self, platform):
+        """Hot query shapes, as issued by the application"""
+        last_hour = timezone.now() - timedelta(hours=1)
+        unresolved_last_hour = ErrorLog.objects.filter(platform=platform, last_seen__gte=last_hour, is_resolved=False)
+
+        return {
+            'error_type_lookup': lambda: ErrorLog.objects.filter(
+                platform=platform, error_type='database', is_resolved=False
+            ).first(),
+            'threshold_error_count': lambda: unresolved_last_hour.count(),
+            'threshold_critical_count': lambda: unresolved_last_hour.filter(severity='critical').count(),
+            'dashboard_overview': lambda: list(annotate_platform_overview(
+                Platform.objects.filter(slug__startswith=BENCHMARK_SLUG_PREFIX)
+            )),
+            'create_alert_lookup': lambda: Alert.objects.filter(
+                dedup_key=Alert.build_dedup_key(platform.id, 'downtime'), status='active'
+            ).first(),
+            'active_alerts_list': lambda: list(
+                Alert.objects.filter(status='active').order_by('-created_at')[:5]
+            ),
+        }
+
+    def get_explain_querysets(self, platform):
+        last_hour = timezone.now() - timedelta(hours=1)
+        return {
+            'error_type_lookup': ErrorLog.objects.filter(
+                platform=platform, error_type='database', is_resolved=False
+            ).order_by('-last_seen')[:1],
+            'threshold_error_count': ErrorLog.objects.filter(
+                platform=platform, last_seen__gte=last_hour, is_resolved=False
+            ).values('pk'),
+            'threshold_critical_count': ErrorLog.objects.filter(
+                platform=platform, last_seen__gte=last_hour, is_resolved=False, severity='critical'
+            ).values('pk'),
+            'dashboard_overview': annotate_platform_overview(
+                Platform.objects.filter(slug__startswith=BENCHMARK_SLUG_PREFIX)
+            ),
+            'create_alert_lookup': Alert.objects.filter(
+                dedup_key=Alert.build_dedup_key(platform.id, 'downtime'), status='active'
+            ).order_by('-created_at')[:1],
+            'active_alerts_list': Alert.objects.filter(status='active').order_by('-created_at')[:5],
+        }
+
+    def run_queries(self, platforms):
+        """Time each query shape and print its plan"""
+        results = {}
+        sample = platforms[:5]
+
+        for name in self.get_queries(platforms[0]):
+            timings = []
+            for _ in range(self.repeat):
+                for platform in sample:
+                    query = self.get_queries(platform)[name]
+                    start = time.perf_counter()
+                    query()
+                    timings.append((time.perf_counter() - start) * 1000)
+
+            results[name] = statistics.median(timings)
+            self.stdout.write(f'⏱️  {name}: {results[name]:.2f} ms (Median aus {len(timings)})')
+
+            if self.explain:
+                plan = self.get_explain_querysets(platforms[0])[name].explain()
+                for line in plan.splitlines():
+                    self.stdout.write(f'      {line}')
+
+        return results
+
+    def cleanup(self):
+        """Remove benchmark data without loading it through the ORM"""
+        platform_ids = list(
+            Platform.objects.filter(slug__startswith=BENCHMARK_SLUG_PREFIX).values_list('id', flat=True)
+        )
+        if not platform_ids:
+            return
+
+        # _raw_delete skips the collector, which would load millions of rows
+        # because of the summary signal handlers
+        Alert.objects.filter(platform_id__in=platform_ids)._raw_delete(connection.alias)
+        ErrorLog.objects.filter(platform_id__in=platform_ids)._raw_delete(connection.alias)
+        PlatformSummary.objects.filter(platform_id__in=platform_ids).delete()
+        Platform.objects.filter(id__in=platform_ids).delete()
+        self.stdout.write('🧹 Benchmark-Daten entfernt')
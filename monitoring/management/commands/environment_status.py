@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from monitoring.models import Platform, SystemHealth, ErrorLog, Alert
+from monitoring.summary import get_platform_summaries
 from datetime import timedelta
 
 
@@ -47,27 +48,8 @@ class Command(BaseCommand):
         current_env = None
         env_stats = {'test': [], 'live': [], 'local': []}
         
-        for platform in platforms:
-            # Get latest health check
-            latest_health = platform.health_checks.first()
-            
-            # Get error count in last 24h
-            last_24h = timezone.now() - timedelta(hours=24)
-            error_count = platform.errors.filter(
-                last_seen__gte=last_24h,
-                is_resolved=False
-            ).count()
-            
-            # Get active alerts
-            active_alerts = platform.alerts.filter(status='active').count()
-            
-            platform_info = {
-                'platform': platform,
-                'health': latest_health,
-                'error_count_24h': error_count,
-                'active_alerts': active_alerts,
-            }
-            
+        for platform_info in get_platform_summaries(platforms):
+            platform = platform_info['platform']
             if platform.environment in env_stats:
                 env_stats[platform.environment].append(platform_info)
         
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand
+from monitoring.retention import POLICIES, RetentionEngine
+
+
+class Command(BaseCommand):
+    help = 'Delete monitoring data past the retention periods in MonitoringSettings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=list(POLICIES),
+            help='Only purge these data types',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Primary key range per DELETE (default: 5000)',
+        )
+        parser.add_argument(
+            '--archive',
+            action='store_true',
+            help='Write expired rows to compressed .jsonl.gz files before deleting',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            type=str,
+            default=None,
+            help='Directory for archive files',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count expired rows',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        engine = RetentionEngine(batch_size=options['batch_size'], archive_dir=options['archive_dir'])
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING('🔍 PREVIEW MODE - Keine Änderungen werden durchgeführt')
+            )
+
+        self.stdout.write('🧹 Bereinige abgelaufene Monitoring-Daten...')
+
+        results = engine.purge_all(options['only'], archive=options['archive'], dry_run=dry_run)
+
+        total_rows = 0
+        total_bytes = 0
+        for name, result in results.items():
+            if result['cutoff'] is None:
+                self.stdout.write(f'   • {name}: übersprungen (keine Aufbewahrungsfrist oder Rollup ausstehend)')
+                continue
+
+            total_rows += result['rows']
+            total_bytes += result['bytes']
+
+            if dry_run:
+                self.stdout.write(f"   • {name}: {result['rows']} Einträge vor {result['cutoff']:%Y-%m-%d %H:%M}")
+                continue
+
+            line = (
+                f"   • {name}: {result['rows']} gelöscht in {result['batches']} Batches, "
+                f"{result['rows_per_second']} Zeilen/s, {self.format_bytes(result['bytes'])}"
+            )
+            if result['archive_path']:
+                line += f" → {result['archive_path']}"
+            self.stdout.write(line)
+
+            if result['error']:
+                self.stdout.write(self.style.ERROR(f"     Fehler: {result['error']}"))
+
+        self.stdout.write('')
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f'✅ {total_rows} Einträge würden gelöscht'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {total_rows} Einträge gelöscht, {self.format_bytes(total_bytes)} freigegeben'
+            ))
+
+    def format_bytes(self, size):
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if size < 1024:
+                return f'{size:.1f} {unit}'
+            size /= 1024
+        return f'{size:.1f} TB'
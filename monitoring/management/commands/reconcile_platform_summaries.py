@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from monitoring.models import Platform
+from monitoring.summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard summaries from health checks, errors and alerts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--platform',
+            type=str,
+            help='Only reconcile the platform with this slug',
+        )
+
+    def handle(self, *args, **options):
+        platforms = Platform.objects.all()
+        if options['platform']:
+            platforms = platforms.filter(slug=options['platform'])
+
+        self.stdout.write('🔄 Reconciling platform summaries...')
+        count = rebuild_summaries(platforms)
+        self.stdout.write(self.style.SUCCESS(f'✅ {count} Plattform-Übersichten aktualisiert'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from monitoring.rollups import RESOLUTIONS, rollup_health, prune_rollups, prune_raw_health
+
+
+class Command(BaseCommand):
+    help = 'Aggregate health checks into 1m/1h/1d rollups and prune old data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resolution',
+            type=str,
+            choices=list(RESOLUTIONS),
+            help='Only build rollups of this resolution',
+        )
+        parser.add_argument(
+            '--no-prune',
+            action='store_true',
+            help='Do not delete raw checks and rollups past their retention',
+        )
+
+    def handle(self, *args, **options):
+        resolutions = [options['resolution']] if options['resolution'] else list(RESOLUTIONS)
+
+        self.stdout.write('📊 Building health check rollups...')
+        for resolution in resolutions:
+            written = rollup_health(resolution)
+            self.stdout.write(f'   • {resolution}: {written} Buckets geschrieben')
+
+        if options['no_prune']:
+            return
+
+        deleted = prune_rollups()
+        for resolution, count in deleted.items():
+            if count:
+                self.stdout.write(f'   • {resolution}: {count} alte Buckets gelöscht')
+
+        raw_deleted = prune_raw_health()
+        self.stdout.write(self.style.SUCCESS(f'✅ Rollup abgeschlossen ({raw_deleted} Rohdaten gelöscht)'))
@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from monitoring.models import Platform, Alert, MonitoringSettings
-from monitoring.views import perform_health_check
+from monitoring.models import Platform
+from monitoring.health_checks import health_engine
+from monitoring.alert_system import process_health_check_alert
 import logging
 
 logger = logging.getLogger('monitoring')
@@ -19,12 +20,10 @@ class Command(BaseCommand):
         parser.add_argument(
             '--create-alerts',
             action='store_true',
-            help='Create alerts for failed health checks',
+            help='Report alerts created for failed health checks (alerts are always evaluated)',
         )
 
     def handle(self, *args, **options):
-        settings = MonitoringSettings.get_settings()
-        
         # Get platforms to check
         if options['platform']:
             platforms = Platform.objects.filter(slug=options['platform'], is_active=True)
@@ -41,12 +40,13 @@ class Command(BaseCommand):
         results = {}
         alerts_created = 0
         
-        for platform in platforms:
+        # Probe all platforms concurrently, alerts are processed below
+        round_results = health_engine.run_round(platforms, process_alerts=False)
+        
+        for platform, health_result in round_results:
             self.stdout.write(f'   Checking {platform.name}...', ending='')
             
             try:
-                # Perform health check
-                health_result = perform_health_check(platform)
                 results[platform.name] = health_result
                 
                 # Determine status symbol
@@ -62,47 +62,12 @@ class Command(BaseCommand):
                     f' {status_symbol} {health_result["status"]} ({response_time:.0f}ms)'
                 )
                 
-                # Create alerts if enabled and status is problematic
-                if options['create_alerts'] and health_result['status'] in ['offline', 'error']:
-                    # Check if similar alert already exists
-                    existing_alert = Alert.objects.filter(
-                        platform=platform,
-                        alert_type='downtime',
-                        status='active'
-                    ).first()
-                    
-                    if not existing_alert:
-                        Alert.objects.create(
-                            platform=platform,
-                            alert_type='downtime',
-                            title=f'{platform.name} is {health_result["status"]}',
-                            message=f'Platform health check failed: {health_result.get("error_message", "Unknown error")}',
-                            severity='critical' if health_result['status'] == 'offline' else 'high'
-                        )
-                        alerts_created += 1
-                        self.stdout.write(f'     🔔 Alert created')
-                
-                # Check response time threshold
-                if (response_time > settings.response_time_threshold and 
-                    health_result['status'] == 'online'):
-                    
+                # Deduplicated alerts with downtime hysteresis (see monitoring.alert_state)
+                for alert in process_health_check_alert(platform, health_result):
+                    alerts_created += 1
                     if options['create_alerts']:
-                        existing_alert = Alert.objects.filter(
-                            platform=platform,
-                            alert_type='slow_response',
-                            status='active'
-                        ).first()
-                        
-                        if not existing_alert:
-                            Alert.objects.create(
-                                platform=platform,
-                                alert_type='slow_response',
-                                title=f'{platform.name} slow response time',
-                                message=f'Response time ({response_time:.0f}ms) exceeds threshold ({settings.response_time_threshold:.0f}ms)',
-                                severity='medium'
-                            )
-                            alerts_created += 1
-                            self.stdout.write(f'     🐌 Slow response alert created')
+                        icon = '🐌' if alert.alert_type == 'slow_response' else '🔔'
+                        self.stdout.write(f'     {icon} Alert created: {alert.title}')
                 
             except Exception as e:
                 self.stdout.write(f' ❌ Error: {e}')
@@ -0,0 +1,104 @@
+import signal
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from monitoring.models import SchedulerJob
+from monitoring.scheduler import scheduler
+
+
+class Command(BaseCommand):
+    help = 'Run health checks, rollups, retention and business jobs on their intervals'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run all due jobs once and exit',
+        )
+        parser.add_argument(
+            '--job',
+            type=str,
+            action='append',
+            help='Run this job now and exit (can be given several times)',
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='Show jobs, intervals and duration statistics',
+        )
+
+    def handle(self, *args, **options):
+        if options['list']:
+            self.list_jobs()
+            return
+
+        if options['job']:
+            unknown = set(options['job']) - set(scheduler.jobs)
+            if unknown:
+                raise CommandError(f'Unbekannte Jobs: {", ".join(sorted(unknown))}')
+            scheduler.initialize()
+            for name in options['job']:
+                self.report(name, scheduler.run_job(name))
+            return
+
+        if options['once']:
+            scheduler.initialize()
+            started = scheduler.run_pending(wait=True)
+            if not started:
+                self.stdout.write('💤 Keine Jobs fällig')
+            for name in started:
+                job = SchedulerJob.objects.get(name=name)
+                self.stdout.write(f'   • {name}: {job.last_status} ({job.last_duration or 0:.2f}s)')
+            return
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+
+        self.stdout.write(f'⏰ Scheduler läuft mit {len(scheduler.jobs)} Jobs (Ctrl+C zum Beenden)...')
+        for name in scheduler.jobs:
+            self.stdout.write(f'   • {name}: alle {scheduler.interval(name):.0f}s')
+
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
+        self.stdout.write('')
+        self.stdout.write('👋 Scheduler beendet')
+
+    def report(self, name, result):
+        if result['status'] == 'locked':
+            self.stdout.write(self.style.WARNING(f'🔒 {name}: läuft bereits'))
+        elif result['status'] == 'failed':
+            self.stdout.write(self.style.ERROR(f"❌ {name}: {result['output']}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {name} ({result['duration']:.2f}s): {result['output']}"))
+
+    def list_jobs(self):
+        jobs = {job.name: job for job in SchedulerJob.objects.filter(name__in=scheduler.jobs)}
+        now = timezone.now()
+
+        self.stdout.write('⏰ GEPLANTE JOBS')
+        self.stdout.write('=' * 50)
+        for name in scheduler.jobs:
+            job = jobs.get(name)
+            self.stdout.write(f'{name} (alle {scheduler.interval(name):.0f}s)')
+            if not job or not job.run_count:
+                self.stdout.write('   Noch nie gelaufen')
+                continue
+
+            locked = job.locked_until and job.locked_until > now
+            average = job.duration_sum / job.run_count
+            self.stdout.write(
+                f'   Letzter Lauf: {job.last_started_at:%Y-%m-%d %H:%M:%S} '
+                f'({job.last_status}, {job.last_duration:.2f}s){" 🔒 " + job.locked_by if locked else ""}'
+            )
+            self.stdout.write(
+                f'   Läufe: {job.run_count}, Fehler: {job.failure_count}, Durchschnitt: {average:.2f}s'
+            )
+
+            buckets = [str(bound) for bound in SchedulerJob.DURATION_BUCKETS] + ['+Inf']
+            histogram = ', '.join(
+                f'≤{bucket}s: {job.duration_buckets[bucket]}' for bucket in buckets
+                if job.duration_buckets.get(bucket)
+            )
+            self.stdout.write(f'   Dauer: {histogram}')
+            if job.last_error:
+                self.stdout.write(self.style.ERROR(f'   Fehler: {job.last_error}'))
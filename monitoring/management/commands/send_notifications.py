@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from monitoring.models import NotificationOutbox
+from monitoring.notifications import notification_dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued alert notifications (email, Slack)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send everything that is due and exit instead of running as a worker',
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            stats = notification_dispatcher.run_once()
+            pending = NotificationOutbox.objects.filter(status='pending').count()
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {stats['sent']} gesendet, {stats['failed']} fehlgeschlagen, {pending} ausstehend"
+            ))
+            return
+
+        self.stdout.write('📨 Notification worker läuft (Ctrl+C zum Beenden)...')
+        try:
+            notification_dispatcher.run_forever()
+        except KeyboardInterrupt:
+            notification_dispatcher.stop()
+            self.stdout.write('')
+            self.stdout.write('👋 Notification worker beendet')
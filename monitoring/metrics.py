@@ -0,0 +1,193 @@
+"""
+Prometheus metrics
+Request latency, database usage, ingest rate, health probes, SSH operations
+and notification queue depth, exported on /metrics
+"""
+
+import hmac
+import logging
+import os
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.db.models import Count
+from django.http import HttpResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, multiprocess
+    from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily, HistogramMetricFamily
+except ImportError:
+    # Metrics are optional; all helpers below become no-ops
+    prometheus_client = None
+
+logger = logging.getLogger('monitoring')
+
+METRICS_ENABLED = prometheus_client is not None and getattr(settings, 'METRICS_ENABLED', True)
+
+if METRICS_ENABLED:
+    # With PROMETHEUS_MULTIPROC_DIR set, prometheus_client keeps the values in
+    # memory-mapped files shared by all worker processes of the server
+    REQUEST_LATENCY = Histogram(
+        'monitoring_http_request_duration_seconds',
+        'Request latency by view',
+        ['view', 'method', 'status'],
+    )
+    REQUEST_QUERIES = Histogram(
+        'monitoring_http_request_db_queries',
+        'Database queries per request by view',
+        ['view'],
+        buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+    )
+    REQUEST_QUERY_TIME = Histogram(
+        'monitoring_http_request_db_duration_seconds',
+        'Database time per request by view',
+        ['view'],
+    )
+    ERROR_EVENTS = Counter(
+        'monitoring_error_events',
+        'Error events received by the webhooks',
+        ['severity', 'result'],
+    )
+    HEALTH_PROBE_LATENCY = Histogram(
+        'monitoring_health_probe_duration_seconds',
+        'Health probe latency by platform',
+        ['platform', 'status'],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    )
+    SSH_LATENCY = Histogram(
+        'monitoring_ssh_operation_duration_seconds',
+        'SSH/SFTP operation latency',
+        ['operation', 'result'],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    )
+
+
+def status_class(status_code: int) -> str:
+    """Status label with bounded cardinality (2xx, 4xx, ...)"""
+    return f'{status_code // 100}xx'
+
+
+def observe_request(view: str, method: str, status_code: int, seconds: float, queries: int, query_seconds: float):
+    if METRICS_ENABLED:
+        REQUEST_LATENCY.labels(view, method, status_class(status_code)).observe(seconds)
+        REQUEST_QUERIES.labels(view).observe(queries)
+        REQUEST_QUERY_TIME.labels(view).observe(query_seconds)
+
+
+def count_error_events(severity: str, accepted: bool, count: int = 1):
+    if METRICS_ENABLED:
+        ERROR_EVENTS.labels(severity, 'accepted' if accepted else 'dropped').inc(count)
+
+
+def observe_health_probe(platform: str, status: str, seconds: float):
+    if METRICS_ENABLED:
+        HEALTH_PROBE_LATENCY.labels(platform, status).observe(seconds)
+
+
+def observe_ssh_operation(operation: str, seconds: float, success: bool = True):
+    if METRICS_ENABLED:
+        SSH_LATENCY.labels(operation, 'success' if success else 'failed').observe(seconds)
+
+
+@contextmanager
+def ssh_timer(operation: str):
+    """Time an SSH/SFTP operation; failures are recorded with result="failed" """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        observe_ssh_operation(operation, time.perf_counter() - start, success=False)
+        raise
+    observe_ssh_operation(operation, time.perf_counter() - start)
+
+
+class DatabaseCollector:
+    """
+    Metrics read from the database at scrape time
+
+    Queue depth and scheduler statistics already live in the database, so
+    they are correct across all processes without any bookkeeping.
+    """
+
+    def collect(self):
+        from .models import NotificationOutbox, SchedulerJob
+
+        queue = GaugeMetricFamily(
+            'monitoring_notification_queue_depth',
+            'Notifications in the outbox by channel and status',
+            labels=['channel', 'status'],
+        )
+        rows = NotificationOutbox.objects.exclude(status='sent').values('channel', 'status').annotate(total=Count('id'))
+        for row in rows:
+            queue.add_metric([row['channel'], row['status']], row['total'])
+        yield queue
+
+        durations = HistogramMetricFamily(
+            'monitoring_scheduler_job_duration_seconds',
+            'Scheduler job run time',
+            labels=['job'],
+        )
+        failures = CounterMetricFamily(
+            'monitoring_scheduler_job_failures',
+            'Failed scheduler job runs',
+            labels=['job'],
+        )
+        for job in SchedulerJob.objects.all():
+            cumulative = 0
+            buckets = []
+            for bound in SchedulerJob.DURATION_BUCKETS:
+                cumulative += job.duration_buckets.get(str(bound), 0)
+                buckets.append((str(float(bound)), cumulative))
+            buckets.append(('+Inf', cumulative + job.duration_buckets.get('+Inf', 0)))
+            durations.add_metric([job.name], buckets, job.duration_sum)
+            failures.add_metric([job.name], job.failure_count)
+        yield durations
+        yield failures
+
+
+def build_registry():
+    """Registry for one scrape: process metrics (or all processes) plus the database"""
+    registry = CollectorRegistry()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(REGISTRY)
+    registry.register(DatabaseCollector())
+    return registry
+
+
+def metrics_allowed(request) -> bool:
+    """
+    Scrapers with the bearer token (METRICS_TOKEN) or superusers
+
+    Behind the local nginx every request arrives from 127.0.0.1, so client
+    addresses are only trusted if METRICS_ALLOWED_IPS is set explicitly
+    (e.g. for a scraper reaching the app server directly).
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return True
+
+    if request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', []):
+        return True
+
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and user.is_superuser)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    if not metrics_allowed(request):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+
+    if not METRICS_ENABLED:
+        return HttpResponse('prometheus_client is not installed', status=503, content_type='text/plain')
+
+    try:
+        output = prometheus_client.generate_latest(build_registry())
+    except Exception as e:
+        logger.error(f'Metrics export failed: {e}')
+        return HttpResponse('Metrics export failed', status=500, content_type='text/plain')
+
+    return HttpResponse(output, content_type=prometheus_client.CONTENT_TYPE_LATEST)
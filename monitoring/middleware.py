@@ -0,0 +1,50 @@
+"""
+Monitoring middleware
+Records request latency and database usage per view
+"""
+
+import time
+from contextlib import ExitStack
+from django.db import connections
+from . import metrics
+from .profiling import QueryProfiler, self_monitor
+
+
+def view_label(request) -> str:
+    """Stable, low-cardinality name of the view that handled a request"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route or 'unknown'
+
+
+class MetricsMiddleware:
+    """
+    Observes latency and database queries of every request
+
+    Results go to the Prometheus metrics (if prometheus_client is
+    installed) and to the admin panel's own PerformanceMetric rows. Should
+    be the first middleware, so the measured time includes all others.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (metrics.METRICS_ENABLED or self_monitor.enabled):
+            return self.get_response(request)
+
+        profiler = QueryProfiler()
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profiler))
+            response = self.get_response(request)
+
+        elapsed = time.perf_counter() - start
+        view = view_label(request)
+
+        metrics.observe_request(view, request.method, response.status_code, elapsed, profiler.count, profiler.seconds)
+        self_monitor.record(view, response.status_code, elapsed, profiler, path=request.path)
+        return response
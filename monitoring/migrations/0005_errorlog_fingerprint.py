@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0004_fileoperation_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='errorlog',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='errorlog',
+            index=models.Index(fields=['fingerprint'], name='errorlog_fingerprint_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='errorlog',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_resolved', False)), fields=('fingerprint',), name='errorlog_unresolved_fingerprint_uniq'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0005_errorlog_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(blank=True, choices=[('online', 'Online'), ('offline', 'Offline'), ('warning', 'Warnung'), ('error', 'Fehler')], max_length=20)),
+                ('response_time', models.FloatField(blank=True, null=True)),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('checked_at', models.DateTimeField(blank=True, null=True)),
+                ('uptime_buckets', models.JSONField(blank=True, default=dict)),
+                ('error_count_24h', models.IntegerField(default=0)),
+                ('active_alerts', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('platform', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='monitoring.platform')),
+            ],
+            options={
+                'verbose_name': 'Plattform-Übersicht',
+                'verbose_name_plural': 'Plattform-Übersichten',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0006_platformsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HealthRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', '1 Minute'), ('1h', '1 Stunde'), ('1d', '1 Tag')], max_length=2)),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.IntegerField(default=0)),
+                ('online_count', models.IntegerField(default=0)),
+                ('min_response_time', models.FloatField(blank=True, null=True)),
+                ('avg_response_time', models.FloatField(blank=True, null=True)),
+                ('max_response_time', models.FloatField(blank=True, null=True)),
+                ('p50_response_time', models.FloatField(blank=True, null=True)),
+                ('p95_response_time', models.FloatField(blank=True, null=True)),
+                ('p99_response_time', models.FloatField(blank=True, null=True)),
+                ('platform', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='health_rollups', to='monitoring.platform')),
+            ],
+            options={
+                'verbose_name': 'Zustands-Aggregat',
+                'verbose_name_plural': 'Zustands-Aggregate',
+                'ordering': ['-bucket_start'],
+                'indexes': [models.Index(fields=['resolution', 'bucket_start'], name='healthrollup_res_start_idx')],
+                'constraints': [models.UniqueConstraint(fields=('platform', 'resolution', 'bucket_start'), name='healthrollup_bucket_uniq')],
+            },
+        ),
+    ]
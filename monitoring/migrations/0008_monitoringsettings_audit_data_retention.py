@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0007_healthrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monitoringsettings',
+            name='audit_data_retention',
+            field=models.IntegerField(default=365),
+        ),
+    ]
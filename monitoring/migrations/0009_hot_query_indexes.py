@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0008_monitoringsettings_audit_data_retention'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['platform', 'alert_type', '-created_at'], name='alert_active_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['-created_at'], name='alert_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='errorlog',
+            index=models.Index(condition=models.Q(('is_resolved', False)), fields=['platform', 'error_type', '-last_seen'], name='errorlog_unresolved_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='errorlog',
+            index=models.Index(condition=models.Q(('is_resolved', False)), fields=['platform', '-last_seen', 'severity'], name='errorlog_unresolved_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('email', 'E-Mail'), ('slack', 'Slack')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Ausstehend'), ('sending', 'Wird gesendet'), ('sent', 'Gesendet'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=10)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='monitoring.alert')),
+            ],
+            options={
+                'verbose_name': 'Benachrichtigung',
+                'verbose_name_plural': 'Benachrichtigungen',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'channel', 'next_attempt_at'], name='outbox_due_idx')],
+            },
+        ),
+    ]
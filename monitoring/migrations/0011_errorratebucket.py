@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0010_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErrorRateBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('severity', models.CharField(choices=[('low', 'Niedrig'), ('medium', 'Mittel'), ('high', 'Hoch'), ('critical', 'Kritisch')], max_length=10)),
+                ('minute_start', models.DateTimeField()),
+                ('count', models.IntegerField(default=0)),
+                ('platform', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='error_rate_buckets', to='monitoring.platform')),
+            ],
+            options={
+                'verbose_name': 'Fehlerraten-Bucket',
+                'verbose_name_plural': 'Fehlerraten-Buckets',
+                'indexes': [models.Index(fields=['minute_start'], name='errorratebucket_minute_idx')],
+                'constraints': [models.UniqueConstraint(fields=('platform', 'severity', 'minute_start'), name='errorratebucket_minute_uniq')],
+            },
+        ),
+    ]
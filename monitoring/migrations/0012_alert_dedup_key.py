@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:51
+
+import hashlib
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_dedup_keys(apps, schema_editor):
+    """Set the key on existing alerts and resolve duplicate active alerts"""
+    Alert = apps.get_model('monitoring', 'Alert')
+
+    conditions = Alert.objects.exclude(alert_type='custom').order_by().values_list('platform_id', 'alert_type').distinct()
+    for platform_id, alert_type in list(conditions):
+        Alert.objects.filter(platform_id=platform_id, alert_type=alert_type).update(
+            dedup_key=f'{platform_id}:{alert_type}'
+        )
+
+    # Custom alerts are told apart by title, as in Alert.default_dedup_key
+    custom = Alert.objects.filter(alert_type='custom').values_list('id', 'platform_id', 'title')
+    for alert_id, platform_id, title in list(custom):
+        scope = hashlib.sha1(title.encode('utf-8')).hexdigest()[:16]
+        Alert.objects.filter(id=alert_id).update(dedup_key=f'{platform_id}:custom:{scope}')
+
+    # Keep the newest active alert of each condition
+    seen = set()
+    duplicates = []
+    active = Alert.objects.filter(status='active').order_by('-created_at', '-id').values_list('id', 'dedup_key')
+    for alert_id, dedup_key in active.iterator():
+        if dedup_key in seen:
+            duplicates.append(alert_id)
+        seen.add(dedup_key)
+
+    Alert.objects.filter(id__in=duplicates).update(
+        status='resolved', resolved_at=timezone.now(), resolved_by='System - Duplikat'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0011_errorratebucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='dedup_key',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.RunPython(backfill_dedup_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='alert',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'active'), models.Q(('dedup_key', ''), _negated=True)), fields=('dedup_key',), name='alert_active_dedup_uniq'),
+        ),
+    ]
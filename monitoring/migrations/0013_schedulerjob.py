@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0012_alert_dedup_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_started_at', models.DateTimeField(blank=True, null=True)),
+                ('last_finished_at', models.DateTimeField(blank=True, null=True)),
+                ('last_status', models.CharField(blank=True, choices=[('success', 'Erfolgreich'), ('failed', 'Fehlgeschlagen')], max_length=10)),
+                ('last_duration', models.FloatField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('run_count', models.IntegerField(default=0)),
+                ('failure_count', models.IntegerField(default=0)),
+                ('duration_sum', models.FloatField(default=0.0)),
+                ('duration_buckets', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'verbose_name': 'Geplanter Job',
+                'verbose_name_plural': 'Geplante Jobs',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0013_schedulerjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='performancemetric',
+            name='details',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddConstraint(
+            model_name='performancemetric',
+            constraint=models.UniqueConstraint(fields=('platform', 'period_start', 'period_end'), name='performancemetric_period_uniq'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:12
+
+from django.db import migrations, models
+
+
+def drop_summaries(apps, schema_editor):
+    """Summaries are rebuilt on first read, with the new count filled in"""
+    PlatformSummary = apps.get_model('monitoring', 'PlatformSummary')
+    PlatformSummary.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0014_performancemetric_details'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='platformsummary',
+            name='new_errors_24h',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(drop_summaries, migrations.RunPython.noop),
+    ]
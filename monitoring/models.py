@@ -1,6 +1,15 @@
+from django.conf import settings as django_settings
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
+from datetime import timedelta, timezone as dt_timezone
+import copy
+import hashlib
 import json
+import re
+import threading
+import time
+import uuid
 
 
 class Platform(models.Model):
@@ -70,6 +79,51 @@ class SystemHealth(models.Model):
         return f"{self.platform.name} - {self.status} ({self.checked_at})"
 
 
+class HealthRollup(models.Model):
+    """Health checks compacted into fixed time buckets (see monitoring.rollups)"""
+    RESOLUTION_CHOICES = [
+        ('1m', '1 Minute'),
+        ('1h', '1 Stunde'),
+        ('1d', '1 Tag'),
+    ]
+    
+    platform = models.ForeignKey(Platform, on_delete=models.CASCADE, related_name='health_rollups')
+    resolution = models.CharField(max_length=2, choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField()
+    
+    count = models.IntegerField(default=0)
+    online_count = models.IntegerField(default=0)
+    
+    # Response times in milliseconds
+    min_response_time = models.FloatField(null=True, blank=True)
+    avg_response_time = models.FloatField(null=True, blank=True)
+    max_response_time = models.FloatField(null=True, blank=True)
+    p50_response_time = models.FloatField(null=True, blank=True)
+    p95_response_time = models.FloatField(null=True, blank=True)
+    p99_response_time = models.FloatField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-bucket_start']
+        verbose_name = "Zustands-Aggregat"
+        verbose_name_plural = "Zustands-Aggregate"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['platform', 'resolution', 'bucket_start'],
+                name='healthrollup_bucket_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['resolution', 'bucket_start'], name='healthrollup_res_start_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.platform.name} - {self.resolution} {self.bucket_start}"
+    
+    @property
+    def uptime_percentage(self):
+        return round(self.online_count / self.count * 100, 2) if self.count else None
+
+
 class ErrorLog(models.Model):
     """Tracks errors across all platforms"""
     SEVERITY_CHOICES = [
@@ -111,6 +165,19 @@ class ErrorLog(models.Model):
     resolved_at = models.DateTimeField(null=True, blank=True)
     resolved_by = models.CharField(max_length=100, blank=True)
     
+    # Hash of platform, error type and normalized message (used for dedup)
+    fingerprint = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    
+    # Volatile message parts replaced before hashing
+    FINGERPRINT_PATTERNS = [
+        (re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE), '<uuid>'),
+        (re.compile(r'\b0x[0-9a-f]+\b', re.IGNORECASE), '<addr>'),
+        (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}\b'), '<ip>'),
+        (re.compile(r'\b[0-9a-f]{16,}\b', re.IGNORECASE), '<hex>'),
+        (re.compile(r'\d+'), '<n>'),
+        (re.compile(r'\s+'), ' '),
+    ]
+    
     class Meta:
         ordering = ['-last_seen']
         verbose_name = "Fehlerprotokoll"
@@ -120,11 +187,51 @@ class ErrorLog(models.Model):
             models.Index(fields=['severity', '-last_seen']),
             models.Index(fields=['error_type', '-last_seen']),
             models.Index(fields=['is_resolved', '-last_seen']),
+            models.Index(fields=['fingerprint'], name='errorlog_fingerprint_idx'),
+            # Open errors of one type, newest first
+            models.Index(
+                fields=['platform', 'error_type', '-last_seen'],
+                condition=models.Q(is_resolved=False),
+                name='errorlog_unresolved_type_idx',
+            ),
+            # Dashboard, summary and threshold counts over a last_seen window;
+            # severity is included so the critical count needs no table reads
+            models.Index(
+                fields=['platform', '-last_seen', 'severity'],
+                condition=models.Q(is_resolved=False),
+                name='errorlog_unresolved_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fingerprint'],
+                condition=models.Q(is_resolved=False),
+                name='errorlog_unresolved_fingerprint_uniq',
+            ),
         ]
     
     def __str__(self):
         return f"{self.platform.name} - {self.error_type} - {self.severity}"
     
+    def save(self, *args, **kwargs):
+        if not self.fingerprint and self.platform_id:
+            self.fingerprint = self.build_fingerprint(self.platform_id, self.error_type, self.message)
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def normalize_message(cls, message):
+        """Strip volatile parts (numbers, UUIDs, addresses) from a message"""
+        normalized = message or ''
+        for pattern, replacement in cls.FINGERPRINT_PATTERNS:
+            normalized = pattern.sub(replacement, normalized)
+        return normalized.strip()
+    
+    @classmethod
+    def build_fingerprint(cls, platform_id, error_type, message):
+        """Hash of platform, error type and normalized message"""
+        raw = f"{platform_id}:{error_type}:{cls.normalize_message(message)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
     def resolve(self, resolved_by="System"):
         """Mark error as resolved"""
         self.is_resolved = True
@@ -133,6 +240,30 @@ class ErrorLog(models.Model):
         self.save()
 
 
+class ErrorRateBucket(models.Model):
+    """Error occurrences per platform, severity and minute (checkpoints of monitoring.error_rates)"""
+    platform = models.ForeignKey(Platform, on_delete=models.CASCADE, related_name='error_rate_buckets')
+    severity = models.CharField(max_length=10, choices=ErrorLog.SEVERITY_CHOICES)
+    minute_start = models.DateTimeField()
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Fehlerraten-Bucket"
+        verbose_name_plural = "Fehlerraten-Buckets"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['platform', 'severity', 'minute_start'],
+                name='errorratebucket_minute_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['minute_start'], name='errorratebucket_minute_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.platform_id} - {self.severity} {self.minute_start}: {self.count}"
+
+
 class PerformanceMetric(models.Model):
     """Tracks performance metrics for platforms"""
     platform = models.ForeignKey(Platform, on_delete=models.CASCADE, related_name='metrics')
@@ -156,6 +287,9 @@ class PerformanceMetric(models.Model):
     db_connections = models.IntegerField(null=True, blank=True)
     slow_queries = models.IntegerField(default=0)
     
+    # Per-view statistics, N+1 patterns and slow query samples (self-monitoring)
+    details = models.JSONField(default=dict, blank=True)
+    
     # Time period
     period_start = models.DateTimeField()
     period_end = models.DateTimeField()
@@ -169,6 +303,13 @@ class PerformanceMetric(models.Model):
             models.Index(fields=['platform', '-created_at']),
             models.Index(fields=['period_start', 'period_end']),
         ]
+        constraints = [
+            # Workers merge their statistics into one row per period
+            models.UniqueConstraint(
+                fields=['platform', 'period_start', 'period_end'],
+                name='performancemetric_period_uniq',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.platform.name} - {self.period_start.strftime('%Y-%m-%d %H:%M')}"
@@ -202,6 +343,9 @@ class Alert(models.Model):
     # Related error if applicable
     related_error = models.ForeignKey(ErrorLog, on_delete=models.SET_NULL, null=True, blank=True)
     
+    # Identifies the condition; at most one active alert per key
+    dedup_key = models.CharField(max_length=200, blank=True)
+    
     # Tracking
     created_at = models.DateTimeField(auto_now_add=True)
     acknowledged_at = models.DateTimeField(null=True, blank=True)
@@ -220,11 +364,47 @@ class Alert(models.Model):
         indexes = [
             models.Index(fields=['platform', 'status', '-created_at']),
             models.Index(fields=['severity', 'status', '-created_at']),
+            # create_alert: active alert per platform and type
+            models.Index(
+                fields=['platform', 'alert_type', '-created_at'],
+                condition=models.Q(status='active'),
+                name='alert_active_type_idx',
+            ),
+            # Active alert lists and counts
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(status='active'),
+                name='alert_active_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='active') & ~models.Q(dedup_key=''),
+                name='alert_active_dedup_uniq',
+            ),
         ]
     
     def __str__(self):
         return f"{self.platform.name} - {self.title} ({self.status})"
     
+    @staticmethod
+    def build_dedup_key(platform_id, alert_type, scope=''):
+        """Dedup key of a platform condition (scope distinguishes custom alerts)"""
+        key = f'{platform_id}:{alert_type}'
+        return f'{key}:{scope}' if scope else key
+    
+    @classmethod
+    def default_dedup_key(cls, platform_id, alert_type, title=''):
+        """Dedup key of an alert raised without one; custom alerts are told apart by title"""
+        scope = hashlib.sha1(title.encode('utf-8')).hexdigest()[:16] if alert_type == 'custom' else ''
+        return cls.build_dedup_key(platform_id, alert_type, scope)
+    
+    def save(self, *args, **kwargs):
+        if not self.dedup_key and self.platform_id and self.alert_type:
+            self.dedup_key = self.default_dedup_key(self.platform_id, self.alert_type, self.title)
+        super().save(*args, **kwargs)
+    
     def acknowledge(self, acknowledged_by="Admin"):
         """Mark alert as acknowledged"""
         self.status = 'acknowledged'
@@ -240,6 +420,44 @@ class Alert(models.Model):
         self.save()
 
 
+class NotificationOutbox(models.Model):
+    """Pending alert notification, delivered by monitoring.notifications"""
+    CHANNEL_CHOICES = [
+        ('email', 'E-Mail'),
+        ('slack', 'Slack'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Ausstehend'),
+        ('sending', 'Wird gesendet'),
+        ('sent', 'Gesendet'),
+        ('failed', 'Fehlgeschlagen'),
+    ]
+    
+    alert = models.ForeignKey(Alert, on_delete=models.CASCADE, related_name='notifications')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    
+    # Delivery tracking
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Benachrichtigung"
+        verbose_name_plural = "Benachrichtigungen"
+        indexes = [
+            models.Index(fields=['status', 'channel', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.channel} - Alert {self.alert_id} ({self.status})"
+
+
 class FileOperation(models.Model):
     """Tracks all file operations for security audit trail"""
     OPERATION_CHOICES = [
@@ -512,6 +730,7 @@ class MonitoringSettings(models.Model):
     health_data_retention = models.IntegerField(default=30)
     error_data_retention = models.IntegerField(default=90)
     performance_data_retention = models.IntegerField(default=30)
+    audit_data_retention = models.IntegerField(default=365)  # file operations and security logs
     
     # Server directory security settings
     server_directory_enabled = models.BooleanField(default=False)
@@ -535,8 +754,154 @@ class MonitoringSettings(models.Model):
     def __str__(self):
         return "Monitoring Configuration"
     
+    # Version token in the shared cache; changes whenever the settings are saved
+    CACHE_VERSION_KEY = 'monitoring:settings_version'
+    
     @classmethod
     def get_settings(cls):
-        """Get or create monitoring settings singleton"""
-        settings, created = cls.objects.get_or_create(pk=1)
-        return settings
\ No newline at end of file
+        """
+        Get or create monitoring settings singleton
+        
+        Served from a process-local copy. The shared cache version is checked
+        at most every MONITORING_SETTINGS_CHECK_INTERVAL seconds, so changes
+        from other workers show up within that interval; changes saved in this
+        process are visible immediately. Returns a copy that callers may modify
+        and save.
+        """
+        state = _settings_state
+        now = time.monotonic()
+        
+        if state['instance'] is not None and now < state['next_check']:
+            return copy.copy(state['instance'])
+        
+        with _settings_lock:
+            version = cache.get(cls.CACHE_VERSION_KEY)
+            if version is None:
+                cache.add(cls.CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+                version = cache.get(cls.CACHE_VERSION_KEY)
+            
+            if state['instance'] is None or version != state['version']:
+                settings, created = cls.objects.get_or_create(pk=1)
+                state['instance'] = settings
+                state['version'] = version
+            
+            state['next_check'] = now + getattr(django_settings, 'MONITORING_SETTINGS_CHECK_INTERVAL', 5)
+            return copy.copy(state['instance'])
+    
+    @classmethod
+    def invalidate_cache(cls):
+        """Drop the local copy and make all other workers reload"""
+        with _settings_lock:
+            _settings_state['instance'] = None
+            _settings_state['next_check'] = 0.0
+        cache.set(cls.CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+# Process-local state of MonitoringSettings.get_settings
+_settings_state = {'instance': None, 'version': None, 'next_check': 0.0}
+_settings_lock = threading.Lock()
+
+class PlatformSummary(models.Model):
+    """
+    Materialized dashboard data per platform
+
+    Kept up to date by monitoring.summary when health checks, errors and
+    alerts are written; reconciled periodically from the raw tables.
+    """
+    platform = models.OneToOneField(Platform, on_delete=models.CASCADE, related_name='summary')
+    
+    # Latest health check
+    status = models.CharField(max_length=20, choices=SystemHealth.STATUS_CHOICES, blank=True)
+    response_time = models.FloatField(null=True, blank=True)  # in milliseconds
+    status_code = models.IntegerField(null=True, blank=True)
+    checked_at = models.DateTimeField(null=True, blank=True)
+    
+    # Hourly health check counts for the last 24h: {"YYYY-MM-DDTHH": [online, total]}
+    uptime_buckets = models.JSONField(default=dict, blank=True)
+    
+    error_count_24h = models.IntegerField(default=0)  # unresolved, seen in the last 24h
+    new_errors_24h = models.IntegerField(default=0)   # first seen in the last 24h, resolved or not
+    active_alerts = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Plattform-Übersicht"
+        verbose_name_plural = "Plattform-Übersichten"
+    
+    def __str__(self):
+        return f"{self.platform.name} - {self.status or 'unknown'}"
+    
+    @staticmethod
+    def bucket_key(timestamp):
+        """Hourly bucket key for a timestamp"""
+        return timestamp.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H')
+    
+    def add_health_check(self, status, checked_at):
+        """Count a health check in its hourly bucket and drop buckets older than 24h"""
+        key = self.bucket_key(checked_at)
+        online, total = self.uptime_buckets.get(key, [0, 0])
+        self.uptime_buckets[key] = [online + (status == 'online'), total + 1]
+        
+        oldest = self.bucket_key(timezone.now() - timedelta(hours=24))
+        self.uptime_buckets = {k: v for k, v in self.uptime_buckets.items() if k >= oldest}
+    
+    @property
+    def uptime_24h(self):
+        """Share of online health checks in the last 24h (percent)"""
+        oldest = self.bucket_key(timezone.now() - timedelta(hours=24))
+        online = total = 0
+        for key, (bucket_online, bucket_total) in self.uptime_buckets.items():
+            if key >= oldest:
+                online += bucket_online
+                total += bucket_total
+        return round(online / total * 100, 1) if total else None
+
+
+class SchedulerJob(models.Model):
+    """Run state, lock and duration histogram of a monitoring.scheduler job"""
+    # Upper bounds of the duration histogram buckets (seconds)
+    DURATION_BUCKETS = [0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600]
+    
+    STATUS_CHOICES = [
+        ('success', 'Erfolgreich'),
+        ('failed', 'Fehlgeschlagen'),
+    ]
+    
+    name = models.CharField(max_length=100, unique=True)
+    
+    # Lock against overlapping runs (also across scheduler processes)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    
+    # Last run
+    last_started_at = models.DateTimeField(null=True, blank=True)
+    last_finished_at = models.DateTimeField(null=True, blank=True)
+    last_status = models.CharField(max_length=10, choices=STATUS_CHOICES, blank=True)
+    last_duration = models.FloatField(null=True, blank=True)  # seconds
+    last_error = models.TextField(blank=True)
+    
+    # Totals; duration_buckets holds the count per bucket ("+Inf" for the rest)
+    run_count = models.IntegerField(default=0)
+    failure_count = models.IntegerField(default=0)
+    duration_sum = models.FloatField(default=0.0)
+    duration_buckets = models.JSONField(default=dict, blank=True)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Geplanter Job"
+        verbose_name_plural = "Geplante Jobs"
+    
+    def __str__(self):
+        return f"{self.name} ({self.last_status or 'nie gelaufen'})"
+    
+    def record_run(self, duration, error=''):
+        """Add a finished run to the totals and the histogram"""
+        bucket = next((str(bound) for bound in self.DURATION_BUCKETS if duration <= bound), '+Inf')
+        self.duration_buckets[bucket] = self.duration_buckets.get(bucket, 0) + 1
+        self.duration_sum += duration
+        self.run_count += 1
+        self.failure_count += bool(error)
+        self.last_duration = duration
+        self.last_error = error
+        self.last_status = 'failed' if error else 'success'
+        self.last_finished_at = timezone.now()
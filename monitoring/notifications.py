@@ -0,0 +1,237 @@
+"""
+Asynchronous alert notifications
+Alerts are written to a persistent outbox and delivered by a worker with
+retries, exponential backoff, per-channel concurrency limits and digests
+"""
+
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import Dict, List
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Alert, NotificationOutbox, MonitoringSettings
+
+logger = logging.getLogger('monitoring')
+
+
+class NotificationDispatcher:
+    """
+    Delivers queued alert notifications
+
+    New notifications are held for a short digest window; everything that
+    is due for a channel is claimed at once and sent as a digest (one
+    message per channel and up to `digest_max` alerts). Failed sends are
+    retried with exponential backoff until `max_attempts` is reached.
+    Several workers can run at the same time; rows are claimed before
+    they are sent and reclaimed if a worker dies mid-send.
+    """
+
+    def __init__(self, digest_window: float = None, digest_max: int = None, max_attempts: int = None,
+                 backoff_base: float = None, backoff_max: float = None, concurrency: Dict[str, int] = None,
+                 poll_interval: float = None):
+        self.digest_window = digest_window if digest_window is not None else getattr(settings, 'NOTIFICATION_DIGEST_WINDOW', 10)
+        self.digest_max = digest_max or getattr(settings, 'NOTIFICATION_DIGEST_MAX', 20)
+        self.max_attempts = max_attempts or getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 6)
+        self.backoff_base = backoff_base or getattr(settings, 'NOTIFICATION_BACKOFF_BASE', 30)
+        self.backoff_max = backoff_max or getattr(settings, 'NOTIFICATION_BACKOFF_MAX', 3600)
+        self.concurrency = concurrency or getattr(settings, 'NOTIFICATION_CHANNEL_CONCURRENCY', {'email': 2, 'slack': 4})
+        self.poll_interval = poll_interval or getattr(settings, 'NOTIFICATION_POLL_INTERVAL', 5)
+        # Claimed rows older than this are assumed lost and sent again
+        self.claim_timeout = getattr(settings, 'NOTIFICATION_CLAIM_TIMEOUT', 300)
+
+        self._semaphores = {
+            channel: threading.BoundedSemaphore(limit) for channel, limit in self.concurrency.items()
+        }
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(sum(self.concurrency.values()), 1),
+            thread_name_prefix='notification'
+        )
+        self._lock = threading.Lock()
+        self._worker = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def enqueue(self, alert: Alert) -> List[NotificationOutbox]:
+        """
+        Queue notifications for an alert on all configured channels
+
+        Returns:
+            The created outbox entries
+        """
+        monitoring_settings = MonitoringSettings.get_settings()
+        channels = []
+        if monitoring_settings.email_notifications and monitoring_settings.notification_emails:
+            channels.append('email')
+        if monitoring_settings.slack_notifications and monitoring_settings.slack_webhook_url:
+            channels.append('slack')
+
+        if not channels:
+            return []
+
+        send_at = timezone.now() + timedelta(seconds=self.digest_window)
+        entries = NotificationOutbox.objects.bulk_create([
+            NotificationOutbox(alert=alert, channel=channel, next_attempt_at=send_at)
+            for channel in channels
+        ])
+
+        if getattr(settings, 'NOTIFICATION_WORKER_IN_PROCESS', True):
+            transaction.on_commit(self._ensure_worker)
+        return entries
+
+    def dispatch_due(self) -> Dict[str, int]:
+        """
+        Send everything that is due, one digest per channel and batch
+
+        Returns:
+            Dict with the number of sent and failed notifications
+        """
+        self._release_stale_claims()
+
+        futures = []
+        for channel in self.concurrency:
+            entries = self._claim(channel)
+            for i in range(0, len(entries), self.digest_max):
+                futures.append(self._executor.submit(self._send, channel, entries[i:i + self.digest_max]))
+
+        stats = {'sent': 0, 'failed': 0}
+        for future in wait(futures).done:
+            sent, failed = future.result()
+            stats['sent'] += sent
+            stats['failed'] += failed
+        return stats
+
+    def _claim(self, channel: str) -> List[NotificationOutbox]:
+        """Mark due entries of a channel as being sent by this worker"""
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                NotificationOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', channel=channel, next_attempt_at__lte=now)
+                .order_by('next_attempt_at')
+                .values_list('id', flat=True)[:self.digest_max * 10]
+            )
+            if not ids:
+                return []
+            NotificationOutbox.objects.filter(id__in=ids, status='pending').update(
+                status='sending', claimed_at=now, attempts=F('attempts') + 1
+            )
+
+        return list(
+            NotificationOutbox.objects.filter(id__in=ids, status='sending', claimed_at=now)
+            .select_related('alert', 'alert__platform')
+            .order_by('created_at')
+        )
+
+    def _release_stale_claims(self):
+        """Return entries of crashed workers to the queue"""
+        cutoff = timezone.now() - timedelta(seconds=self.claim_timeout)
+        released = NotificationOutbox.objects.filter(status='sending', claimed_at__lt=cutoff).update(
+            status='pending', claimed_at=None
+        )
+        if released:
+            logger.warning(f'Released {released} stale notification claims')
+
+    def _send(self, channel: str, entries: List[NotificationOutbox]):
+        """Send one message for a group of entries (runs on the pool)"""
+        from .alert_system import alert_manager
+
+        alerts = [entry.alert for entry in entries]
+
+        with self._semaphores[channel]:
+            try:
+                delivered = alert_manager.send_to_channel(channel, alerts)
+                error = '' if delivered else f'{channel} delivery failed'
+            except Exception as e:
+                delivered = False
+                error = str(e)
+
+        try:
+            if delivered:
+                self._mark_sent(channel, entries)
+                return len(entries), 0
+            self._schedule_retry(entries, error)
+            return 0, len(entries)
+        finally:
+            close_old_connections()
+
+    def _mark_sent(self, channel: str, entries: List[NotificationOutbox]):
+        now = timezone.now()
+        NotificationOutbox.objects.filter(id__in=[entry.id for entry in entries]).update(
+            status='sent', sent_at=now, last_error=''
+        )
+
+        # Email and Slack workers finish independently; lock the alert so
+        # one channel does not overwrite the methods the other just added
+        for entry in entries:
+            with transaction.atomic():
+                alert = Alert.objects.select_for_update().only('id', 'notification_methods').get(id=entry.alert_id)
+                methods = list(alert.notification_methods or [])
+                sent_channels = NotificationOutbox.objects.filter(
+                    alert_id=entry.alert_id, status='sent'
+                ).values_list('channel', flat=True).distinct()
+                for method in [channel, *sent_channels]:
+                    if method not in methods:
+                        methods.append(method)
+                Alert.objects.filter(id=alert.id).update(notification_sent=True, notification_methods=methods)
+
+        logger.info(f'Sent {channel} notification for {len(entries)} alert(s)')
+
+    def _schedule_retry(self, entries: List[NotificationOutbox], error: str):
+        now = timezone.now()
+        for entry in entries:
+            if entry.attempts >= self.max_attempts:
+                entry.status = 'failed'
+                logger.error(f'Giving up {entry.channel} notification for alert {entry.alert_id}: {error}')
+            else:
+                entry.status = 'pending'
+                entry.next_attempt_at = now + timedelta(seconds=self.backoff(entry.attempts))
+            entry.claimed_at = None
+            entry.last_error = error
+
+        NotificationOutbox.objects.bulk_update(entries, ['status', 'next_attempt_at', 'claimed_at', 'last_error'])
+
+    def backoff(self, attempts: int) -> float:
+        """Delay before the next attempt: exponential with jitter, capped"""
+        delay = min(self.backoff_base * (2 ** (attempts - 1)), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def run_forever(self):
+        """Worker loop (used by the send_notifications command)"""
+        while not self._stopped.is_set():
+            self.run_once()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def run_once(self) -> Dict[str, int]:
+        close_old_connections()
+        try:
+            return self.dispatch_due()
+        except Exception as e:
+            logger.error(f'Notification dispatch failed: {e}')
+            return {'sent': 0, 'failed': 0}
+        finally:
+            close_old_connections()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _ensure_worker(self):
+        """Start the in-process worker thread on first use"""
+        if self._worker and self._worker.is_alive():
+            return
+
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self.run_forever, name='notification-worker', daemon=True)
+            self._worker.start()
+
+
+# Global notification dispatcher instance
+notification_dispatcher = NotificationDispatcher()
@@ -0,0 +1,516 @@
+"""
+Self-monitoring of the admin panel
+Profiles the database queries of each request and aggregates requests into
+PerformanceMetric rows of the admin panel's own platform
+"""
+
+import atexit
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, connections, transaction
+from .models import Platform, PerformanceMetric
+
+logger = logging.getLogger('monitoring')
+
+# Placeholder lists of IN clauses, numbers and string literals vary between
+# otherwise identical queries
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+NUMBER_RE = re.compile(r'\b\d+\b')
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+# Latency histograms use logarithmic buckets, each 5% wider than the
+# previous one: percentiles are accurate to 5% at any scale, histograms
+# stay small (about 50 buckets per decade actually used) and merge by
+# adding counts
+HISTOGRAM_PRECISION = 0.05
+HISTOGRAM_LOG_BASE = math.log1p(HISTOGRAM_PRECISION)
+HISTOGRAM_MIN_MS = 0.01
+
+
+def sql_template(sql: str) -> str:
+    """SQL with all variable parts replaced, used to group repeated queries"""
+    sql = IN_LIST_RE.sub('(...)', sql)
+    sql = STRING_RE.sub('?', sql)
+    return NUMBER_RE.sub('?', sql)
+
+
+def template_key(template: str) -> str:
+    return hashlib.sha1(template.encode('utf-8')).hexdigest()[:16]
+
+
+def histogram_add(histogram: Dict[str, int], ms: float, count: int = 1):
+    """Count a latency in a histogram ({bucket index: count}, JSON-ready)"""
+    bucket = str(math.floor(math.log(max(ms, HISTOGRAM_MIN_MS)) / HISTOGRAM_LOG_BASE))
+    histogram[bucket] = histogram.get(bucket, 0) + count
+
+
+def histogram_merge(target: Dict[str, int], source: Dict[str, int]) -> Dict[str, int]:
+    for bucket, count in source.items():
+        target[bucket] = target.get(bucket, 0) + count
+    return target
+
+
+def histogram_percentile(histogram: Dict[str, int], pct: float) -> Optional[float]:
+    """Nearest-rank percentile in milliseconds (bucket midpoint)"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+
+    rank = max(1, math.ceil(pct / 100 * total))
+    seen = 0
+    for bucket in sorted(histogram, key=int):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return round(math.exp((int(bucket) + 0.5) * HISTOGRAM_LOG_BASE), 2)
+
+
+class QueryProfiler:
+    """
+    Execute wrapper collecting the queries of one request
+
+    Counts queries and database time, groups queries by SQL template to
+    find N+1 patterns and keeps queries slower than `slow_ms` together
+    with their parameters, so they can be explained afterwards.
+    """
+
+    def __init__(self, slow_ms: float = None):
+        self.slow_ms = slow_ms or getattr(settings, 'QUERY_PROFILER_SLOW_MS', 100)
+        self.count = 0
+        self.seconds = 0.0
+        self.templates = {}  # template -> executions
+        self.slow = []       # dicts with sql, params, alias and ms
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+
+            template = sql_template(sql)
+            self.templates[template] = self.templates.get(template, 0) + 1
+
+            if elapsed * 1000 >= self.slow_ms and not many:
+                self.slow.append({
+                    'sql': sql,
+                    'params': params,
+                    'alias': context['connection'].alias,
+                    'ms': elapsed * 1000,
+                })
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Templates executed more than `threshold` times (likely N+1)"""
+        return {template: count for template, count in self.templates.items() if count > threshold}
+
+
+def explain(sql: str, params, alias: str) -> str:
+    """Query plan of a SELECT; empty for other statements or on failure"""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+
+    db = connections[alias]
+    try:
+        with db.cursor() as cursor:
+            cursor.execute(f'{db.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+    except Exception as e:
+        logger.debug(f'EXPLAIN failed: {e}')
+        return ''
+
+
+def new_period_stats() -> Dict:
+    return {
+        'requests': 0,
+        'successful': 0,
+        'failed': 0,
+        'time_sum': 0.0,
+        'time_min': None,
+        'time_max': 0.0,
+        'slow_queries': 0,
+        'latency': {},
+        'views': {},
+        'n_plus_one': {},
+        'slow_query_samples': [],
+    }
+
+
+def new_view_stats() -> Dict:
+    return {
+        'requests': 0,
+        'successful': 0,
+        'failed': 0,
+        'slow_requests': 0,
+        'queries': 0,
+        'db_ms': 0.0,
+        'max_queries': 0,
+        'latency': {},
+    }
+
+
+def merge_details(target: Dict, source: Dict, max_samples: int) -> Dict:
+    """Merge the details of two PerformanceMetric rows of the same period"""
+    histogram_merge(target.setdefault('latency', {}), source.get('latency', {}))
+
+    views = target.setdefault('views', {})
+    for view, stats in source.get('views', {}).items():
+        merged = views.setdefault(view, new_view_stats())
+        for field in ('requests', 'successful', 'failed', 'slow_requests', 'queries', 'db_ms'):
+            merged[field] += stats.get(field, 0)
+        merged['max_queries'] = max(merged['max_queries'], stats['max_queries'])
+        histogram_merge(merged['latency'], stats.get('latency', {}))
+
+    patterns = target.setdefault('n_plus_one', {})
+    for key, pattern in source.get('n_plus_one', {}).items():
+        merged = patterns.setdefault(key, dict(pattern, occurrences=0, max_repeats=0))
+        merged['occurrences'] += pattern['occurrences']
+        merged['max_repeats'] = max(merged['max_repeats'], pattern['max_repeats'])
+
+    samples = target.get('slow_query_samples', []) + source.get('slow_query_samples', [])
+    samples.sort(key=lambda sample: sample['ms'], reverse=True)
+    target['slow_query_samples'] = samples[:max_samples]
+    return target
+
+
+class SelfMonitor:
+    """
+    Aggregates the admin panel's own requests per period
+
+    Requests are added in memory (`record`); a background thread writes
+    each finished period into one PerformanceMetric row of the admin
+    panel's platform. Rows of the same period written by other worker
+    processes are merged, not duplicated.
+
+    Slow queries are explained at most once per SQL template and period,
+    and at most `explain_limit` times per period, to keep the overhead
+    bounded. EXPLAIN runs on the flush thread, not in the request, and only
+    for samples that are still among the period's slowest.
+
+    Latencies are kept in log-bucketed histograms per view. A request is
+    logged as slow if it takes `slow_request_factor` times the view's p95
+    of the last period (at least `slow_request_min_ms`); views without
+    enough history use `slow_request_default_ms`.
+    """
+
+    def __init__(self, period: int = None, n_plus_one_threshold: int = None, explain_limit: int = None,
+                 max_samples: int = None):
+        self.period = period or getattr(settings, 'SELF_MONITORING_PERIOD', 60)
+        self.n_plus_one_threshold = n_plus_one_threshold or getattr(settings, 'QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 10)
+        self.explain_limit = explain_limit or getattr(settings, 'QUERY_PROFILER_EXPLAIN_LIMIT', 5)
+        self.max_samples = max_samples or getattr(settings, 'QUERY_PROFILER_MAX_SAMPLES', 10)
+        self.enabled = getattr(settings, 'SELF_MONITORING_ENABLED', True)
+        self.slow_request_factor = getattr(settings, 'SLOW_REQUEST_FACTOR', 3)
+        self.slow_request_min_ms = getattr(settings, 'SLOW_REQUEST_MIN_MS', 1000)
+        self.slow_request_default_ms = getattr(settings, 'SLOW_REQUEST_DEFAULT_MS', 5000)
+        self.baseline_min_requests = getattr(settings, 'SLOW_REQUEST_BASELINE_MIN_REQUESTS', 20)
+
+        self._periods = {}     # period start timestamp -> stats
+        self._explained = {}   # period start timestamp -> set of template keys
+        self._explains = {}    # period start timestamp -> [(sample, query)] waiting for a plan
+        self._baselines = {}   # view -> p95 (ms) of the last written period
+        self._platform_id = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker = None
+        self._stopped = threading.Event()
+
+    def period_start(self, timestamp: float) -> float:
+        return timestamp - timestamp % self.period
+
+    def slow_request_threshold(self, view: str) -> float:
+        baseline = self._baselines.get(view)
+        if baseline is None:
+            return self.slow_request_default_ms
+        return max(self.slow_request_min_ms, baseline * self.slow_request_factor)
+
+    def record(self, view: str, status_code: int, seconds: float, profiler: QueryProfiler, path: str = ''):
+        """Add a finished request"""
+        if not self.enabled:
+            return
+
+        period = self.period_start(time.time())
+        ms = seconds * 1000
+        failed = status_code >= 500
+
+        threshold = self.slow_request_threshold(view)
+        slow = ms >= threshold
+        if slow:
+            logger.warning(f'Slow request: {path or view} ({view}) - {ms:.0f}ms, threshold {threshold:.0f}ms')
+        repeated = profiler.repeated(self.n_plus_one_threshold)
+        samples = self._sample_slow(period, view, profiler.slow) if profiler.slow else []
+
+        with self._lock:
+            stats = self._periods.get(period)
+            if stats is None:
+                stats = self._periods[period] = new_period_stats()
+
+            stats['requests'] += 1
+            if failed:
+                stats['failed'] += 1
+            else:
+                stats['successful'] += 1
+            stats['time_sum'] += ms
+            stats['time_min'] = ms if stats['time_min'] is None else min(stats['time_min'], ms)
+            stats['time_max'] = max(stats['time_max'], ms)
+            stats['slow_queries'] += len(profiler.slow)
+            histogram_add(stats['latency'], ms)
+
+            view_stats = stats['views'].setdefault(view, new_view_stats())
+            view_stats['requests'] += 1
+            view_stats['failed' if failed else 'successful'] += 1
+            view_stats['slow_requests'] += slow
+            histogram_add(view_stats['latency'], ms)
+            view_stats['queries'] += profiler.count
+            view_stats['db_ms'] += profiler.seconds * 1000
+            view_stats['max_queries'] = max(view_stats['max_queries'], profiler.count)
+
+            for template, count in repeated.items():
+                key = template_key(template)
+                pattern = stats['n_plus_one'].get(key)
+                if pattern is None:
+                    pattern = stats['n_plus_one'][key] = {
+                        'sql': template[:1000], 'view': view, 'occurrences': 0, 'max_repeats': 0,
+                    }
+                    logger.warning(f'Possible N+1 query in {view}: {count} executions of {template[:200]}')
+                pattern['occurrences'] += 1
+                pattern['max_repeats'] = max(pattern['max_repeats'], count)
+
+            if samples:
+                stats['slow_query_samples'] = sorted(
+                    stats['slow_query_samples'] + samples, key=lambda sample: sample['ms'], reverse=True
+                )[:self.max_samples]
+
+        self._ensure_worker()
+
+    def _sample_slow(self, period: float, view: str, slow: List[Dict]) -> List[Dict]:
+        """Samples of slow queries; templates not explained yet are queued for EXPLAIN"""
+        samples = []
+        for query in slow:
+            template = sql_template(query['sql'])
+            key = template_key(template)
+            sample = {
+                'sql': template[:1000],
+                'view': view,
+                'ms': round(query['ms'], 2),
+                'plan': '',
+            }
+
+            with self._lock:
+                explained = self._explained.setdefault(period, set())
+                if key not in explained and len(explained) < self.explain_limit:
+                    explained.add(key)
+                    self._explains.setdefault(period, []).append((sample, query))
+
+            samples.append(sample)
+        return samples
+
+    def _explain_samples(self, stats: Dict, queued: List):
+        """Add query plans to the samples of a period that made it into its top list"""
+        kept = {id(sample) for sample in stats['slow_query_samples']}
+        for sample, query in queued:
+            if id(sample) in kept:
+                sample['plan'] = explain(query['sql'], query['params'], query['alias'])
+
+    def flush(self, include_current: bool = False) -> int:
+        """
+        Write finished periods (and optionally the current one)
+
+        Returns:
+            Number of periods written
+        """
+        with self._flush_lock:
+            current = self.period_start(time.time())
+            with self._lock:
+                due = {
+                    period: stats for period, stats in self._periods.items()
+                    if include_current or period < current
+                }
+                explains = {period: self._explains.pop(period, []) for period in due}
+                for period in due:
+                    del self._periods[period]
+                    self._explained.pop(period, None)
+
+            for period, stats in sorted(due.items()):
+                self._explain_samples(stats, explains[period])
+                self._update_baselines(stats)
+                try:
+                    self._write(period, stats)
+                except Exception as e:
+                    logger.error(f'Failed to write self-monitoring metrics: {e}')
+            return len(due)
+
+    def _update_baselines(self, stats: Dict):
+        """Remember each view's p95 as reference for slow requests"""
+        for view, view_stats in stats['views'].items():
+            if view_stats['requests'] >= self.baseline_min_requests:
+                self._baselines[view] = histogram_percentile(view_stats['latency'], 95)
+
+    def _write(self, period: float, stats: Dict):
+        """Merge one period into its PerformanceMetric row"""
+        platform_id = self.get_platform_id()
+        period_start = datetime.fromtimestamp(period, tz=dt_timezone.utc)
+        period_end = period_start + timedelta(seconds=self.period)
+        details = merge_details({}, stats, self.max_samples)
+
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    metric = PerformanceMetric.objects.select_for_update().filter(
+                        platform_id=platform_id, period_start=period_start, period_end=period_end
+                    ).first()
+
+                    if metric is None:
+                        PerformanceMetric.objects.create(
+                            platform_id=platform_id,
+                            period_start=period_start,
+                            period_end=period_end,
+                            avg_response_time=stats['time_sum'] / stats['requests'],
+                            min_response_time=stats['time_min'],
+                            max_response_time=stats['time_max'],
+                            total_requests=stats['requests'],
+                            successful_requests=stats['successful'],
+                            failed_requests=stats['failed'],
+                            slow_queries=stats['slow_queries'],
+                            db_connections=self.count_db_connections(),
+                            details=details,
+                        )
+                        return
+
+                    total = metric.total_requests + stats['requests']
+                    metric.avg_response_time = (
+                        metric.avg_response_time * metric.total_requests + stats['time_sum']
+                    ) / total
+                    metric.min_response_time = min(metric.min_response_time, stats['time_min'])
+                    metric.max_response_time = max(metric.max_response_time, stats['time_max'])
+                    metric.total_requests = total
+                    metric.successful_requests += stats['successful']
+                    metric.failed_requests += stats['failed']
+                    metric.slow_queries += stats['slow_queries']
+                    metric.db_connections = self.count_db_connections()
+                    metric.details = merge_details(metric.details or {}, details, self.max_samples)
+                    metric.save()
+                    return
+            except IntegrityError:
+                # Another worker created the row first, merge into it
+                if attempt:
+                    raise
+
+    def count_db_connections(self) -> Optional[int]:
+        """Open connections to the database (PostgreSQL only)"""
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()')
+            return cursor.fetchone()[0]
+
+    def get_platform_id(self) -> int:
+        """Platform representing the admin panel (created on first use, never health-checked)"""
+        if self._platform_id is None:
+            # Same address the platforms report their errors to
+            webhook_url = urlsplit(getattr(settings, 'ADMIN_DASHBOARD_WEBHOOK_URL',
+                                           'http://127.0.0.1:8003/monitoring/webhook/error/'))
+            platform, _ = Platform.objects.get_or_create(
+                slug=getattr(settings, 'SELF_MONITORING_PLATFORM_SLUG', 'admin-panel'),
+                defaults={
+                    'name': getattr(settings, 'SELF_MONITORING_PLATFORM_NAME', 'Admin Panel'),
+                    'url': f'{webhook_url.scheme}://{webhook_url.netloc}',
+                    'is_active': False,
+                    'description': 'Eigene Leistungsdaten des Admin Panels',
+                },
+            )
+            self._platform_id = platform.id
+        return self._platform_id
+
+    def stop(self):
+        """Stop the worker and write everything recorded so far"""
+        self._stopped.set()
+        try:
+            self.flush(include_current=True)
+        except Exception as e:
+            logger.error(f'Final self-monitoring flush failed: {e}')
+
+    def _ensure_worker(self):
+        """Start the flush thread on first use"""
+        if self._worker and self._worker.is_alive():
+            return
+
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='self-monitoring', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        """Flush loop of the background thread, wakes up after each period"""
+        while not self._stopped.wait(self.period - time.time() % self.period + 1):
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f'Self-monitoring flush failed: {e}')
+            finally:
+                close_old_connections()
+
+
+def get_hotspots(platform, since: datetime, limit: int = 10) -> Dict:
+    """
+    Views with the most database time, N+1 patterns and slow queries
+
+    Args:
+        platform: Platform whose PerformanceMetric details are combined
+        since: Start of the range
+        limit: Entries per list
+
+    Returns:
+        Dict with overall latency percentiles and views, slowest_views,
+        n_plus_one and slow_queries lists (empty without data)
+    """
+    combined = {}
+    details = PerformanceMetric.objects.filter(
+        platform=platform, period_start__gte=since
+    ).exclude(details={}).values_list('details', flat=True)
+    for row in details:
+        merge_details(combined, row, limit)
+
+    views = [
+        dict(
+            stats,
+            view=view,
+            avg_queries=round(stats['queries'] / stats['requests'], 1),
+            avg_db_ms=round(stats['db_ms'] / stats['requests'], 2),
+            p50_ms=histogram_percentile(stats['latency'], 50),
+            p95_ms=histogram_percentile(stats['latency'], 95),
+            p99_ms=histogram_percentile(stats['latency'], 99),
+        )
+        for view, stats in combined.get('views', {}).items() if stats['requests']
+    ]
+    views.sort(key=lambda stats: stats['db_ms'], reverse=True)
+
+    patterns = sorted(combined.get('n_plus_one', {}).values(), key=lambda pattern: pattern['occurrences'], reverse=True)
+
+    latency = combined.get('latency', {})
+    return {
+        'latency': {
+            'p50_ms': histogram_percentile(latency, 50),
+            'p95_ms': histogram_percentile(latency, 95),
+            'p99_ms': histogram_percentile(latency, 99),
+        },
+        'views': views[:limit],
+        'slowest_views': sorted(views, key=lambda stats: stats['p95_ms'] or 0, reverse=True)[:limit],
+        'n_plus_one': patterns[:limit],
+        'slow_queries': combined.get('slow_query_samples', []),
+    }
+
+
+# Global self-monitoring instance
+self_monitor = SelfMonitor()
+atexit.register(self_monitor.stop)
@@ -0,0 +1,113 @@
+"""
+Dashboard query layer
+Builds the overview data with a constant number of queries
+"""
+
+from datetime import timedelta
+from typing import Dict, List
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Platform, SystemHealth, ErrorLog, Alert
+
+
+def count_subquery(queryset) -> Coalesce:
+    """
+    Count rows of a correlated queryset as a scalar subquery
+
+    Subqueries keep several counts on one platform row from multiplying
+    each other the way joined Count() annotations would.
+    """
+    counted = queryset.order_by().values('platform').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def annotate_platform_overview(queryset, since=None):
+    """
+    Annotate platforms with their latest health check id, unresolved error
+    count and count of errors first seen since `since` (default: last 24h)
+    and active alert count
+    """
+    if since is None:
+        since = timezone.now() - timedelta(hours=24)
+
+    latest_health = SystemHealth.objects.filter(
+        platform=OuterRef('pk')
+    ).order_by('-checked_at', '-id').values('id')[:1]
+
+    return queryset.annotate(
+        latest_health_id=Subquery(latest_health),
+        error_count_24h=count_subquery(
+            ErrorLog.objects.filter(platform=OuterRef('pk'), last_seen__gte=since, is_resolved=False)
+        ),
+        # last_seen >= first_seen, so the last_seen bound only lets the
+        # (platform, -last_seen) index narrow the scan
+        new_error_count_24h=count_subquery(
+            ErrorLog.objects.filter(platform=OuterRef('pk'), last_seen__gte=since, first_seen__gte=since)
+        ),
+        active_alert_count=count_subquery(
+            Alert.objects.filter(platform=OuterRef('pk'), status='active')
+        ),
+    )
+
+
+def get_platform_overview(platforms=None, since=None) -> List[Dict]:
+    """
+    Latest health, 24h error count and active alerts for each platform
+
+    Uses two queries regardless of the number of platforms: one for the
+    annotated platforms and one for their latest health checks.
+
+    Args:
+        platforms: Platform queryset (default: active platforms by environment and name)
+        since: Start of the error count window (default: last 24h)
+
+    Returns:
+        List of dicts with platform, health, error_count_24h, new_errors_24h
+        and active_alerts
+    """
+    if platforms is None:
+        platforms = Platform.objects.filter(is_active=True).order_by('environment', 'name')
+
+    platforms = list(annotate_platform_overview(platforms, since))
+
+    health_ids = [platform.latest_health_id for platform in platforms if platform.latest_health_id]
+    latest_health = SystemHealth.objects.in_bulk(health_ids) if health_ids else {}
+
+    return [
+        {
+            'platform': platform,
+            'health': latest_health.get(platform.latest_health_id),
+            'error_count_24h': platform.error_count_24h,
+            'new_errors_24h': platform.new_error_count_24h,
+            'active_alerts': platform.active_alert_count,
+        }
+        for platform in platforms
+    ]
+
+
+def get_customer_stats(customer_model) -> Dict:
+    """
+    Customer group statistics in a single aggregate query
+
+    Args:
+        customer_model: The Customer model, or None if it is not available
+    """
+    if customer_model is None:
+        return {
+            'total_customers': 0,
+            'active_customers': 0,
+            'super_admins': 0,
+            'beta_users': 0,
+            'regular_users': 0,
+            'new_registrations_24h': 0,
+        }
+
+    return customer_model.objects.aggregate(
+        total_customers=Count('pk'),
+        active_customers=Count('pk', filter=Q(is_active=True)),
+        super_admins=Count('pk', filter=Q(user_group='super_admin')),
+        beta_users=Count('pk', filter=Q(user_group='beta_user')),
+        regular_users=Count('pk', filter=Q(user_group='user')),
+        new_registrations_24h=Count('pk', filter=Q(created_at__gte=timezone.now() - timedelta(hours=24))),
+    )
@@ -0,0 +1,231 @@
+"""
+Data retention engine
+Deletes monitoring data past the MonitoringSettings retention periods
+"""
+
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+from typing import Dict, List
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Min
+from django.utils import timezone
+from .models import (
+    SystemHealth, ErrorLog, PerformanceMetric, FileOperation, SecurityLog,
+    MonitoringSettings
+)
+from . import summary
+
+logger = logging.getLogger('monitoring')
+
+
+def _health_cutoff(cutoff):
+    """Keep raw health checks until the daily rollup has covered them"""
+    from .rollups import get_watermark
+
+    watermark = get_watermark('1d')
+    if watermark is None:
+        return None
+    return min(cutoff, watermark)
+
+
+# Expiring data: model, timestamp field, MonitoringSettings retention field
+# and an optional hook that can move the cutoff
+POLICIES = {
+    'health': {
+        'model': SystemHealth,
+        'date_field': 'checked_at',
+        'retention_field': 'health_data_retention',
+        'adjust_cutoff': _health_cutoff,
+    },
+    'errors': {
+        'model': ErrorLog,
+        'date_field': 'last_seen',
+        'retention_field': 'error_data_retention',
+    },
+    'performance': {
+        'model': PerformanceMetric,
+        'date_field': 'created_at',
+        'retention_field': 'performance_data_retention',
+    },
+    'security_logs': {
+        'model': SecurityLog,
+        'date_field': 'created_at',
+        'retention_field': 'audit_data_retention',
+    },
+    'file_operations': {
+        'model': FileOperation,
+        'date_field': 'created_at',
+        'retention_field': 'audit_data_retention',
+    },
+}
+
+
+class RetentionEngine:
+    """
+    Deletes expired rows in bounded primary key ranges
+
+    Each batch covers a fixed id range, so every DELETE touches a limited,
+    index-ordered set of rows and holds its locks only briefly. Rows can be
+    written to gzip-compressed JSON lines files before they are deleted.
+    """
+
+    def __init__(self, batch_size: int = None, archive_dir: str = None, pause: float = None):
+        self.batch_size = batch_size or getattr(settings, 'RETENTION_BATCH_SIZE', 5000)
+        self.archive_dir = archive_dir or getattr(
+            settings, 'RETENTION_ARCHIVE_DIR',
+            os.path.join(getattr(settings, 'BASE_DIR', '.'), 'archive')
+        )
+        self.pause = pause if pause is not None else getattr(settings, 'RETENTION_BATCH_PAUSE', 0.05)
+
+    def get_cutoff(self, name: str, monitoring_settings: MonitoringSettings = None):
+        """Timestamp before which rows of a policy expire (None = nothing to purge)"""
+        policy = POLICIES[name]
+        monitoring_settings = monitoring_settings or MonitoringSettings.get_settings()
+        days = getattr(monitoring_settings, policy['retention_field'])
+        if not days or days <= 0:
+            return None
+
+        cutoff = timezone.now() - timedelta(days=days)
+        if policy.get('adjust_cutoff'):
+            cutoff = policy['adjust_cutoff'](cutoff)
+        return cutoff
+
+    def expired(self, name: str, cutoff):
+        """Queryset of rows of a policy older than cutoff"""
+        policy = POLICIES[name]
+        return policy['model'].objects.filter(**{f"{policy['date_field']}__lt": cutoff})
+
+    def purge(self, name: str, archive: bool = False, dry_run: bool = False) -> Dict:
+        """
+        Delete expired rows of one policy
+
+        Args:
+            name: Policy name (see POLICIES)
+            archive: Write rows to a .jsonl.gz file before deleting them
+            dry_run: Only count the expired rows
+
+        Returns:
+            Dict with cutoff, rows, bytes, batches, seconds, rows_per_second,
+            archive_path and error
+        """
+        result = {
+            'cutoff': self.get_cutoff(name),
+            'rows': 0,
+            'bytes': 0,
+            'batches': 0,
+            'seconds': 0.0,
+            'rows_per_second': 0.0,
+            'archive_path': None,
+            'error': None,
+        }
+        if result['cutoff'] is None:
+            return result
+
+        expired = self.expired(name, result['cutoff'])
+
+        if dry_run:
+            result['rows'] = expired.count()
+            return result
+
+        low = expired.aggregate(low=Min('pk'))['low']
+        if low is None:
+            return result
+
+        archive_file = None
+        if archive:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            result['archive_path'] = os.path.join(
+                self.archive_dir,
+                f"{name}-{timezone.now().strftime('%Y%m%d%H%M%S')}.jsonl.gz"
+            )
+            archive_file = gzip.open(result['archive_path'], 'wt', encoding='utf-8')
+
+        start_time = time.monotonic()
+        try:
+            while low is not None:
+                high = low + self.batch_size
+                batch = expired.filter(pk__gte=low, pk__lt=high)
+
+                try:
+                    rows, size = self._purge_batch(name, batch, archive_file)
+                except Exception as e:
+                    logger.error(f'Retention purge of {name} failed: {e}')
+                    result['error'] = str(e)
+                    break
+
+                result['rows'] += rows
+                result['bytes'] += size
+                result['batches'] += 1
+
+                # Skip over id gaps instead of scanning empty ranges
+                low = expired.filter(pk__gte=high).aggregate(low=Min('pk'))['low']
+
+                # Give other writers a chance between batches
+                if low is not None and self.pause:
+                    time.sleep(self.pause)
+        finally:
+            result['seconds'] = round(time.monotonic() - start_time, 3)
+            if archive_file:
+                archive_file.close()
+
+        if result['seconds']:
+            result['rows_per_second'] = round(result['rows'] / result['seconds'], 1)
+
+        if result['rows']:
+            logger.info(
+                f"Purged {result['rows']} {name} rows older than {result['cutoff']} "
+                f"({result['rows_per_second']} rows/s, {result['bytes']} bytes)"
+            )
+        return result
+
+    def purge_all(self, names: List[str] = None, archive: bool = False, dry_run: bool = False) -> Dict[str, Dict]:
+        """Apply all (or the named) retention policies"""
+        return {
+            name: self.purge(name, archive=archive, dry_run=dry_run)
+            for name in (names or POLICIES)
+        }
+
+    def _purge_batch(self, name: str, batch, archive_file):
+        """Archive and delete one pk range; returns (rows deleted, bytes)"""
+        model = POLICIES[name]['model']
+        size = None
+
+        if archive_file:
+            lines = [json.dumps(row, cls=DjangoJSONEncoder) for row in batch.values()]
+            if not lines:
+                return 0, 0
+            archive_file.write('\n'.join(lines) + '\n')
+            size = sum(len(line) for line in lines)
+
+        if connection.vendor == 'postgresql':
+            size = self._table_bytes(model, batch)
+        elif size is None:
+            # Approximation from the serialized rows
+            size = sum(len(json.dumps(row, cls=DjangoJSONEncoder)) for row in batch.values())
+
+        # Deleting errors and alerts would otherwise recount summaries per row
+        with summary.deferred_updates():
+            _, per_model = batch.delete()
+        return per_model.get(model._meta.label, 0), size or 0
+
+    def _table_bytes(self, model, batch) -> int:
+        """Stored size of the rows in a batch (PostgreSQL)"""
+        table = connection.ops.quote_name(model._meta.db_table)
+        pk_column = connection.ops.quote_name(model._meta.pk.column)
+        sql, params = batch.values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COALESCE(SUM(pg_column_size(t.*)), 0) FROM {table} t WHERE t.{pk_column} IN ({sql})',
+                params
+            )
+            return cursor.fetchone()[0]
+
+
+# Global retention engine instance
+retention_engine = RetentionEngine()
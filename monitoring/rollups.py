@@ -0,0 +1,278 @@
+"""
+Health check rollups
+Compacts raw SystemHealth rows into 1-minute, 1-hour and 1-day buckets
+"""
+
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+from .models import SystemHealth, HealthRollup
+
+logger = logging.getLogger('monitoring')
+
+RESOLUTIONS = {
+    '1m': timedelta(minutes=1),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+}
+
+# Days to keep rollups per resolution (None = forever)
+DEFAULT_ROLLUP_RETENTION = {'1m': 2, '1h': 90, '1d': None}
+
+# Longest time range served from each resolution, finest first
+RESOLUTION_RANGES = [
+    ('1m', timedelta(hours=6)),
+    ('1h', timedelta(days=14)),
+    ('1d', None),
+]
+
+ROLLUP_FIELDS = [
+    'count', 'online_count', 'min_response_time', 'avg_response_time',
+    'max_response_time', 'p50_response_time', 'p95_response_time', 'p99_response_time',
+]
+
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    """Start of the bucket containing timestamp (UTC)"""
+    timestamp = timestamp.astimezone(dt_timezone.utc)
+    if resolution == '1m':
+        return timestamp.replace(second=0, microsecond=0)
+    if resolution == '1h':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def get_rollup_retention() -> Dict[str, Optional[int]]:
+    retention = dict(DEFAULT_ROLLUP_RETENTION)
+    retention.update(getattr(settings, 'HEALTH_ROLLUP_RETENTION', {}))
+    return retention
+
+
+def get_watermark(resolution: str) -> Optional[datetime]:
+    """End of the newest stored bucket for a resolution"""
+    latest = HealthRollup.objects.filter(resolution=resolution).aggregate(latest=Max('bucket_start'))['latest']
+    return latest + RESOLUTIONS[resolution] if latest else None
+
+
+def rollup_health(resolution: str, until: datetime = None) -> int:
+    """
+    Aggregate raw health checks into buckets of one resolution
+
+    Only complete buckets are written. Work is resumed from the newest
+    stored bucket and processed one day at a time, so memory use does not
+    depend on how much history is pending.
+
+    Returns:
+        Number of buckets written
+    """
+    interval = RESOLUTIONS[resolution]
+    end = bucket_start(until or timezone.now(), resolution)
+
+    start = get_watermark(resolution)
+    if start is None:
+        start = SystemHealth.objects.aggregate(first=Min('checked_at'))['first']
+        if start is None:
+            return 0
+        start = bucket_start(start, resolution)
+
+    # Fine buckets are only kept for a short time, do not build older ones
+    retention_days = get_rollup_retention().get(resolution)
+    if retention_days:
+        start = max(start, bucket_start(timezone.now() - timedelta(days=retention_days), resolution))
+
+    written = 0
+    chunk = max(interval, timedelta(days=1))
+    while start < end:
+        chunk_end = min(start + chunk, end)
+        written += _rollup_range(resolution, start, chunk_end)
+        start = chunk_end
+
+    return written
+
+
+def _rollup_range(resolution: str, start: datetime, end: datetime) -> int:
+    """Aggregate raw rows in [start, end) and upsert the buckets"""
+    rows = SystemHealth.objects.filter(
+        checked_at__gte=start, checked_at__lt=end
+    ).order_by().values_list('platform_id', 'checked_at', 'status', 'response_time')
+
+    groups = defaultdict(lambda: {'count': 0, 'online_count': 0, 'times': []})
+    for platform_id, checked_at, status, response_time in rows.iterator(chunk_size=5000):
+        group = groups[(platform_id, bucket_start(checked_at, resolution))]
+        group['count'] += 1
+        if status == 'online':
+            group['online_count'] += 1
+        if response_time is not None:
+            group['times'].append(response_time)
+
+    rollups = []
+    for (platform_id, start_at), group in groups.items():
+        times = sorted(group['times'])
+        rollups.append(HealthRollup(
+            platform_id=platform_id,
+            resolution=resolution,
+            bucket_start=start_at,
+            count=group['count'],
+            online_count=group['online_count'],
+            min_response_time=times[0] if times else None,
+            avg_response_time=sum(times) / len(times) if times else None,
+            max_response_time=times[-1] if times else None,
+            p50_response_time=percentile(times, 50),
+            p95_response_time=percentile(times, 95),
+            p99_response_time=percentile(times, 99),
+        ))
+
+    if rollups:
+        HealthRollup.objects.bulk_create(
+            rollups,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['platform', 'resolution', 'bucket_start'],
+            update_fields=ROLLUP_FIELDS,
+        )
+    return len(rollups)
+
+
+def rollup_all(until: datetime = None) -> Dict[str, int]:
+    """Run the rollup for every resolution"""
+    return {resolution: rollup_health(resolution, until) for resolution in RESOLUTIONS}
+
+
+def prune_rollups() -> Dict[str, int]:
+    """Delete rollups older than their resolution's retention"""
+    deleted = {}
+    for resolution, days in get_rollup_retention().items():
+        if not days:
+            continue
+        cutoff = bucket_start(timezone.now() - timedelta(days=days), resolution)
+        deleted[resolution], _ = HealthRollup.objects.filter(
+            resolution=resolution, bucket_start__lt=cutoff
+        ).delete()
+    return deleted
+
+
+def prune_raw_health(archive: bool = False) -> int:
+    """
+    Delete raw health checks past MonitoringSettings.health_data_retention
+
+    Delegates to the retention engine, which never deletes checks the
+    daily rollup has not covered yet.
+
+    Returns:
+        Number of rows deleted
+    """
+    from .retention import retention_engine
+
+    return retention_engine.purge('health', archive=archive)['rows']
+
+
+def choose_resolution(start: datetime, end: datetime) -> str:
+    """Pick the finest stored resolution that suits the length of a range"""
+    span = end - start
+    retention = get_rollup_retention()
+    for resolution, max_span in RESOLUTION_RANGES:
+        days = retention.get(resolution)
+        available = days is None or start >= timezone.now() - timedelta(days=days)
+        if available and (max_span is None or span <= max_span):
+            return resolution
+    return '1d'
+
+
+def get_health_series(platform, start: datetime, end: datetime = None, resolution: str = None) -> Dict:
+    """
+    Health time series for a platform
+
+    Args:
+        platform: Platform instance
+        start: Start of the range
+        end: End of the range (default: now)
+        resolution: '1m', '1h' or '1d' (default: chosen from the range)
+
+    Returns:
+        Dict with the resolution and a list of bucket dicts, oldest first.
+        Buckets newer than the last rollup are computed from raw rows.
+    """
+    end = end or timezone.now()
+    resolution = resolution or choose_resolution(start, end)
+    interval = RESOLUTIONS[resolution]
+
+    rollups = list(
+        HealthRollup.objects.filter(
+            platform=platform,
+            resolution=resolution,
+            bucket_start__gte=bucket_start(start, resolution),
+            bucket_start__lt=end,
+        ).order_by('bucket_start').values('bucket_start', *ROLLUP_FIELDS)
+    )
+
+    # Fill the tail that has not been rolled up yet from raw rows
+    tail_start = rollups[-1]['bucket_start'] + interval if rollups else max(start, get_watermark(resolution) or start)
+    if tail_start < end:
+        raw = SystemHealth.objects.filter(
+            platform=platform, checked_at__gte=tail_start, checked_at__lt=end
+        ).order_by().values_list('checked_at', 'status', 'response_time')
+
+        tail = defaultdict(lambda: {'count': 0, 'online_count': 0, 'times': []})
+        for checked_at, status, response_time in raw:
+            group = tail[bucket_start(checked_at, resolution)]
+            group['count'] += 1
+            group['online_count'] += status == 'online'
+            if response_time is not None:
+                group['times'].append(response_time)
+
+        for start_at in sorted(tail):
+            times = sorted(tail[start_at]['times'])
+            rollups.append({
+                'bucket_start': start_at,
+                'count': tail[start_at]['count'],
+                'online_count': tail[start_at]['online_count'],
+                'min_response_time': times[0] if times else None,
+                'avg_response_time': sum(times) / len(times) if times else None,
+                'max_response_time': times[-1] if times else None,
+                'p50_response_time': percentile(times, 50),
+                'p95_response_time': percentile(times, 95),
+                'p99_response_time': percentile(times, 99),
+            })
+
+    return {'resolution': resolution, 'buckets': rollups}
+
+
+def summarize_series(buckets: List[Dict]) -> Dict:
+    """
+    Combine buckets into range statistics
+
+    Averages are weighted by bucket size; the p95 is the count-weighted
+    mean of the bucket p95 values and therefore an approximation.
+    """
+    total = sum(bucket['count'] for bucket in buckets)
+    online = sum(bucket['online_count'] for bucket in buckets)
+    timed = [bucket for bucket in buckets if bucket['avg_response_time'] is not None]
+    timed_count = sum(bucket['count'] for bucket in timed)
+
+    def weighted(field):
+        if not timed_count:
+            return None
+        return sum(bucket[field] * bucket['count'] for bucket in timed) / timed_count
+
+    return {
+        'total_checks': total,
+        'online_checks': online,
+        'uptime_percentage': round(online / total * 100, 2) if total else 0,
+        'avg_response_time': round(weighted('avg_response_time') or 0, 2),
+        'min_response_time': min((bucket['min_response_time'] for bucket in timed), default=None),
+        'max_response_time': max((bucket['max_response_time'] for bucket in timed), default=None),
+        'p95_response_time': round(weighted('p95_response_time'), 2) if timed_count else None,
+    }
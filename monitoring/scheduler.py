@@ -0,0 +1,291 @@
+"""
+In-process job scheduler
+Runs health checks, rollups, retention and the business jobs on their
+configured intervals (manage.py run_scheduler) instead of external cron
+"""
+
+import io
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, List
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from .models import SchedulerJob, MonitoringSettings
+
+logger = logging.getLogger('monitoring')
+
+
+def run_health_round():
+    from .health_checks import health_engine
+
+    results = health_engine.run_round()
+    return f'{len(results)} Plattformen geprüft'
+
+
+def run_rollups():
+    from .rollups import rollup_all, prune_rollups
+
+    written = rollup_all()
+    prune_rollups()
+    return f'{sum(written.values())} Buckets geschrieben'
+
+
+def run_retention():
+    from .retention import retention_engine
+
+    results = retention_engine.purge_all()
+    return f"{sum(result['rows'] for result in results.values())} Zeilen gelöscht"
+
+
+def run_reconcile_summaries():
+    from .summary import rebuild_summaries
+
+    rebuild_summaries()
+    return 'Übersichten neu berechnet'
+
+
+def run_notifications():
+    from .notifications import notification_dispatcher
+
+    stats = notification_dispatcher.run_once()
+    return f"{stats['sent']} gesendet, {stats['failed']} fehlgeschlagen"
+
+
+def command_job(name: str) -> Callable:
+    """Job that runs a management command and returns its output"""
+    def run():
+        output = io.StringIO()
+        call_command(name, stdout=output)
+        lines = output.getvalue().strip().splitlines()
+        return lines[-1] if lines else ''
+    run.__name__ = f'run_{name}'
+    return run
+
+
+def health_check_interval() -> float:
+    """MonitoringSettings.health_check_interval (minutes), read at runtime"""
+    return max(MonitoringSettings.get_settings().health_check_interval, 1) * 60
+
+
+# Scheduled jobs: function, interval in seconds (or a callable returning it)
+# and how long a run may hold the lock
+DEFAULT_JOBS = {
+    'health_checks': {
+        'func': run_health_round,
+        'interval': health_check_interval,
+        'lock_timeout': 600,
+    },
+    'health_rollups': {
+        'func': run_rollups,
+        'interval': 60,
+        'lock_timeout': 1800,
+    },
+    'notifications': {
+        'func': run_notifications,
+        'interval': 30,
+        'lock_timeout': 600,
+    },
+    'reconcile_summaries': {
+        'func': run_reconcile_summaries,
+        'interval': 3600,
+        'lock_timeout': 1800,
+    },
+    'retention': {
+        'func': run_retention,
+        'interval': 86400,
+        'lock_timeout': 6 * 3600,
+    },
+    'process_subscriptions': {
+        'func': command_job('process_subscriptions'),
+        'interval': 86400,
+        'lock_timeout': 3600,
+        'app': 'business',
+    },
+    'generate_revenue_metrics': {
+        'func': command_job('generate_revenue_metrics'),
+        'interval': 86400,
+        'lock_timeout': 3600,
+        'app': 'business',
+    },
+}
+
+
+class Scheduler:
+    """
+    Runs jobs on their intervals inside one long-running process
+
+    Every run is spread by a random jitter of +/- `jitter` of the interval so
+    several schedulers (or jobs with equal intervals) do not fire together.
+    Before a job runs, its SchedulerJob row is locked with a conditional
+    UPDATE; a job therefore never overlaps with itself, even with several
+    scheduler processes. Jobs run on a thread pool, so a long retention run
+    does not delay the health checks.
+    """
+
+    def __init__(self, jobs: Dict[str, Dict] = None, jitter: float = None, tick: float = None):
+        self.jobs = jobs or self._configured_jobs()
+        self.jitter = jitter if jitter is not None else getattr(settings, 'SCHEDULER_JITTER', 0.1)
+        self.tick = tick or getattr(settings, 'SCHEDULER_TICK', 1)
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+
+        self._last_run = {}
+        self._jitter = {}
+        self._running = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self.jobs), 1), thread_name_prefix='scheduler')
+        self._stopped = threading.Event()
+
+    def _configured_jobs(self) -> Dict[str, Dict]:
+        """DEFAULT_JOBS with SCHEDULER_INTERVALS overrides, without jobs of missing apps"""
+        overrides = getattr(settings, 'SCHEDULER_INTERVALS', {})
+        jobs = {}
+        for name, job in DEFAULT_JOBS.items():
+            if job.get('app') and not apps.is_installed(job['app']):
+                continue
+            job = dict(job)
+            if name in overrides:
+                job['interval'] = overrides[name]
+            if job['interval']:
+                jobs[name] = job
+        return jobs
+
+    def interval(self, name: str) -> float:
+        interval = self.jobs[name]['interval']
+        return interval() if callable(interval) else interval
+
+    def schedule_next(self, name: str, after=None):
+        """Schedule a job one interval (plus jitter) after the given time"""
+        self._last_run[name] = after or timezone.now()
+        self._jitter[name] = 1 + random.uniform(-self.jitter, self.jitter)
+
+    def next_run(self, name: str):
+        """
+        Due time of a job (None if it has never run)
+
+        Computed from the current interval on every call, so changes to
+        MonitoringSettings.health_check_interval apply to the pending run.
+        """
+        if name not in self._last_run:
+            return None
+        delay = self.interval(name) * self._jitter[name]
+        return self._last_run[name] + timedelta(seconds=delay)
+
+    def initialize(self):
+        """Continue from the last recorded runs (no rerun of daily jobs on restart)"""
+        for name in self.jobs:
+            SchedulerJob.objects.get_or_create(name=name)
+
+        last_runs = SchedulerJob.objects.filter(name__in=self.jobs, last_started_at__isnull=False)
+        for name, last_started_at in last_runs.values_list('name', 'last_started_at'):
+            self.schedule_next(name, after=last_started_at)
+
+    def run_forever(self):
+        self.initialize()
+        logger.info(f'Scheduler started with jobs: {", ".join(self.jobs)}')
+
+        while not self._stopped.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                logger.error(f'Scheduler tick failed: {e}')
+            self._stopped.wait(self.tick)
+
+        self._executor.shutdown(wait=True)
+
+    def run_pending(self, wait: bool = False) -> List[str]:
+        """
+        Start all due jobs that are not running yet
+
+        Args:
+            wait: Block until the started jobs have finished
+
+        Returns:
+            Names of the started jobs
+        """
+        now = timezone.now()
+        started = []
+
+        for name in self.jobs:
+            running = self._running.get(name)
+            if running and not running.done():
+                continue
+            due = self.next_run(name)
+            if due and due > now:
+                continue
+
+            self.schedule_next(name)
+            self._running[name] = self._executor.submit(self.run_job, name)
+            started.append(name)
+
+        if wait:
+            for name in started:
+                self._running[name].result()
+        return started
+
+    def run_job(self, name: str) -> Dict:
+        """
+        Run one job under its lock and record the duration
+
+        Returns:
+            Dict with status ('success', 'failed' or 'locked'), duration and output
+        """
+        close_old_connections()
+        try:
+            if not self.acquire(name):
+                logger.info(f'Scheduler job {name} is running elsewhere, skipped')
+                return {'status': 'locked', 'duration': 0, 'output': ''}
+
+            start = time.monotonic()
+            output, error = '', ''
+            try:
+                output = self.jobs[name]['func']() or ''
+            except SystemExit as e:
+                error = f'exit code {e.code}' if e.code else ''
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                logger.error(f'Scheduler job {name} failed: {e}')
+            duration = time.monotonic() - start
+
+            self.release(name, duration, error)
+            if not error:
+                logger.info(f'Scheduler job {name} finished in {duration:.2f}s: {output}')
+            return {'status': 'failed' if error else 'success', 'duration': duration, 'output': error or output}
+        finally:
+            close_old_connections()
+
+    def acquire(self, name: str) -> bool:
+        """Lock a job for this process; False if another run holds the lock"""
+        now = timezone.now()
+        lock_timeout = self.jobs[name].get('lock_timeout', 3600)
+        return SchedulerJob.objects.filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now), name=name
+        ).update(
+            locked_by=self.owner,
+            locked_until=now + timedelta(seconds=lock_timeout),
+            last_started_at=now,
+        ) == 1
+
+    def release(self, name: str, duration: float, error: str = ''):
+        """Record the run and unlock the job"""
+        job = SchedulerJob.objects.get(name=name)
+        job.record_run(duration, error)
+        if job.locked_by == self.owner:
+            job.locked_by = ''
+            job.locked_until = None
+        job.save()
+
+    def stop(self):
+        self._stopped.set()
+
+
+# Global scheduler instance
+scheduler = Scheduler()
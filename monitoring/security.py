@@ -234,6 +234,10 @@ class RateLimiter:
             'file_editing': {
                 'requests': 20,
                 'window': 300,
+            },
+            'file_transfers': {
+                'requests': 600,  # chunked uploads, range downloads and log views
+                'window': 300,
             }
         }
     
@@ -281,6 +285,8 @@ class RateLimiter:
         """Get rate limit type for endpoint"""
         if 'directory' in endpoint:
             return 'directory_listing'
+        elif 'upload' in endpoint or 'download' in endpoint or '/view/' in endpoint:
+            return 'file_transfers'
         elif 'edit' in endpoint:
             return 'file_editing'
         else:
@@ -3,19 +3,28 @@ Server File Management API Views
 Sichere Server-Dateizugriffe über SSH mit umfassender Sicherheit
 """
 import json
+import mimetypes
 import os
-import tempfile
+import stat
+import time
 from datetime import datetime
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.conf import settings
 from .ssh_manager import SSHManager
+from .listing_cache import SORT_FIELDS, build_entries, decode_cursor, directory_cache, select_page
+from .transfers import (
+    RangeNotSatisfiable, head_lines, iter_range, parse_range, read_range, read_request,
+    remote_sha256, replace, tail_lines, write_chunks
+)
 from .security import PathValidator, RateLimiter
 from django.contrib.auth.models import User
 from .models import FileOperation, SecurityLog
+from . import metrics
 import logging
 
 logger = logging.getLogger('monitoring')
@@ -41,10 +50,14 @@ class ServerFileAPI(View):
         if not self.rate_limiter.allow_request(request.user, request.path):
             return JsonResponse({'error': 'Rate limit exceeded'}, status=429)
         
+        self.started_at = time.perf_counter()
         return super().dispatch(request, *args, **kwargs)
     
     def log_operation(self, user, operation, path, success=True, error_msg=None):
         """Log file operation"""
+        if hasattr(self, 'started_at'):
+            metrics.observe_ssh_operation(operation, time.perf_counter() - self.started_at, success)
+        
         try:
             FileOperation.objects.create(
                 user_id=str(user.id),
@@ -72,7 +85,13 @@ class DirectoryListAPI(ServerFileAPI):
     """API for listing directory contents"""
     
     def get(self, request):
-        """List directory contents"""
+        """
+        List directory contents
+
+        Without further parameters the complete listing is returned. With
+        limit, cursor, sort or prefix one page of it, with format=ndjson
+        a stream of entries (one JSON object per line).
+        """
         path = request.GET.get('path', '/var/www')
         
         # Debug logging
@@ -91,60 +110,55 @@ class DirectoryListAPI(ServerFileAPI):
             }, status=400)
         
         try:
-            # Connect to server and list directory
-            with self.ssh_manager.get_connection() as ssh:
-                sftp = ssh.open_sftp()
-                
-                # Get directory listing
-                try:
-                    items = sftp.listdir_attr(path)
-                    
-                    files = []
-                    directories = []
-                    
-                    for item in items:
-                        item_path = os.path.join(path, item.filename)
-                        
-                        # Get file stats
-                        file_info = {
-                            'name': item.filename,
-                            'path': item_path,
-                            'size': item.st_size,
-                            'modified': datetime.fromtimestamp(item.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                            'permissions': oct(item.st_mode)[-3:],
-                            'owner': item.st_uid,
-                            'group': item.st_gid,
-                        }
-                        
-                        # Check if it's a directory
-                        if item.st_mode & 0o040000:  # S_IFDIR
-                            file_info['type'] = 'directory'
-                            directories.append(file_info)
-                        else:
-                            file_info['type'] = 'file'
-                            files.append(file_info)
-                    
-                    # Sort by name
-                    directories.sort(key=lambda x: x['name'].lower())
-                    files.sort(key=lambda x: x['name'].lower())
-                    
-                    # Log successful operation
-                    self.log_operation(request.user, 'list_directory', path, success=True)
-                    
-                    return JsonResponse({
-                        'success': True,
-                        'path': path,
-                        'parent_path': os.path.dirname(path) if path != '/' else None,
-                        'items': directories + files,
-                        'total_items': len(directories) + len(files)
-                    })
-                    
-                except FileNotFoundError:
-                    self.log_operation(request.user, 'list_directory', path, success=False, error_msg='Directory not found')
-                    return JsonResponse({'error': 'Directory not found'}, status=404)
-                except PermissionError:
-                    self.log_operation(request.user, 'list_directory', path, success=False, error_msg='Permission denied')
-                    return JsonResponse({'error': 'Permission denied'}, status=403)
+            paging = self.get_paging(request)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        streaming = request.GET.get('format') == 'ndjson'
+        target = self.ssh_manager.target
+        
+        try:
+            # Recent listings come from memory, older ones are revalidated
+            # with one stat over the pooled SSH transport
+            items = directory_cache.fresh(target, path)
+            cached = items is not None
+            mtime = None
+            page = None
+            
+            if items is None:
+                with self.ssh_manager.sftp() as sftp:
+                    try:
+                        items, mtime = directory_cache.lookup(sftp, target, path)
+                        cached = items is not None
+                        if items is None and paging and not streaming:
+                            # Select the page while the listing streams in
+                            page = select_page(directory_cache.stream(sftp, target, path, mtime), **paging)
+                        elif items is None and not streaming:
+                            items = build_entries(path, sftp.listdir_attr(path))
+                            directory_cache.store(target, path, items, mtime)
+                    except FileNotFoundError:
+                        self.log_operation(request.user, 'list_directory', path, success=False, error_msg='Directory not found')
+                        return JsonResponse({'error': 'Directory not found'}, status=404)
+                    except PermissionError:
+                        self.log_operation(request.user, 'list_directory', path, success=False, error_msg='Permission denied')
+                        return JsonResponse({'error': 'Permission denied'}, status=403)
+            
+            # Log successful operation
+            self.log_operation(request.user, 'list_directory', path, success=True)
+            
+            if streaming:
+                return self.stream_listing(path, items, mtime, request.GET.get('prefix', ''))
+            
+            result = {
+                'success': True,
+                'path': path,
+                'parent_path': os.path.dirname(path) if path != '/' else None,
+                'cached': cached
+            }
+            if paging:
+                result.update(page or select_page(items, **paging))
+            else:
+                result.update({'items': items, 'total_items': len(items)})
+            return JsonResponse(result)
                     
         except Exception as e:
             logger.error(f"Directory listing failed: {e}")
@@ -156,6 +170,78 @@ class DirectoryListAPI(ServerFileAPI):
                     'path': path
                 }
             }, status=500)
+    
+    def get_paging(self, request):
+        """Sort, prefix, cursor and page size of a paginated listing (None if not requested)"""
+        if not any(name in request.GET for name in ('limit', 'cursor', 'sort', 'prefix')):
+            return None
+        
+        try:
+            limit = int(request.GET.get('limit', 100))
+        except ValueError:
+            raise ValueError('Invalid limit')
+        
+        sort = request.GET.get('sort', 'name')
+        order = request.GET.get('order', 'asc')
+        if sort not in SORT_FIELDS:
+            raise ValueError(f'Invalid sort field, use one of: {", ".join(SORT_FIELDS)}')
+        if order not in ('asc', 'desc'):
+            raise ValueError('Invalid sort order, use asc or desc')
+        
+        cursor = request.GET.get('cursor') or None
+        if cursor:
+            decode_cursor(cursor, sort, order)
+        
+        return {
+            'sort': sort,
+            'order': order,
+            'prefix': request.GET.get('prefix', ''),
+            'cursor': cursor,
+            'limit': min(max(limit, 1), getattr(settings, 'DIRECTORY_PAGE_MAX_LIMIT', 1000)),
+        }
+    
+    def stream_listing(self, path, items, mtime, prefix=''):
+        """
+        NDJSON response: one entry per line, then {"done": true, "total_items": n}
+        
+        Cached listings are sent in listing order, all others in the
+        server's order as SFTP reads them, so the first entries arrive
+        independent of the directory size. A failure after the first line
+        ends the stream with an {"error": ...} line.
+        """
+        target = self.ssh_manager.target
+        prefix = prefix.lower()
+        
+        def entries():
+            if items is not None:
+                yield from items
+                return
+            with self.ssh_manager.sftp() as sftp:
+                yield from directory_cache.stream(sftp, target, path, mtime)
+        
+        def lines():
+            batch = []
+            count = 0
+            try:
+                for entry in entries():
+                    if prefix and not entry['name'].lower().startswith(prefix):
+                        continue
+                    count += 1
+                    batch.append(json.dumps(entry))
+                    if len(batch) >= 100:
+                        yield '\n'.join(batch) + '\n'
+                        batch = []
+            except Exception as e:
+                logger.error(f"Directory stream failed for {path}: {e}")
+                batch.append(json.dumps({'error': 'Directory listing interrupted'}))
+            else:
+                batch.append(json.dumps({'done': True, 'total_items': count}))
+            yield '\n'.join(batch) + '\n'
+        
+        response = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx: do not buffer the stream
+        return response
 
 
 @method_decorator(login_required, name='dispatch')
@@ -175,8 +261,7 @@ class FileContentAPI(ServerFileAPI):
             return JsonResponse({'error': 'Invalid path'}, status=400)
         
         try:
-            with self.ssh_manager.get_connection() as ssh:
-                sftp = ssh.open_sftp()
+            with self.ssh_manager.sftp() as sftp:
                 
                 try:
                     # Get file stats first
@@ -184,7 +269,9 @@ class FileContentAPI(ServerFileAPI):
                     
                     # Check file size (limit to 10MB)
                     if file_stats.st_size > 10 * 1024 * 1024:
-                        return JsonResponse({'error': 'File too large (max 10MB)'}, status=413)
+                        return JsonResponse({
+                            'error': 'File too large (max 10MB), use the file view API for parts of it'
+                        }, status=413)
                     
                     # Read file content
                     with sftp.open(file_path, 'r') as file:
@@ -225,6 +312,154 @@ class FileContentAPI(ServerFileAPI):
             return JsonResponse({'error': 'Server connection failed'}, status=500)
 
 
+def sse_event(event, data, event_id=None):
+    """One Server-Sent Event with a JSON payload"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+@method_decorator(login_required, name='dispatch')
+class FileViewAPI(ServerFileAPI):
+    """
+    API for viewing parts of large files (logs)
+    
+    Only the requested window is transferred and held in memory, so
+    multi-GB logs can be inspected: mode=tail (default) or head return
+    `lines` lines, mode=range `length` bytes from `offset`. Every window
+    is capped at LOG_VIEWER_MAX_BYTES. follow=1 streams appended data as
+    Server-Sent Events.
+    """
+    
+    def get(self, request):
+        """Return a window of a file, or follow it"""
+        file_path = request.GET.get('path')
+        mode = request.GET.get('mode', 'tail')
+        max_bytes = getattr(settings, 'LOG_VIEWER_MAX_BYTES', 1024 * 1024)
+        
+        if not file_path:
+            return JsonResponse({'error': 'File path required'}, status=400)
+        
+        if mode not in ('tail', 'head', 'range'):
+            return JsonResponse({'error': 'Invalid mode, use tail, head or range'}, status=400)
+        
+        try:
+            lines = min(max(int(request.GET.get('lines', 100)), 1), 10000)
+            offset = request.GET.get('offset', request.META.get('HTTP_LAST_EVENT_ID'))
+            offset = max(int(offset), 0) if offset not in (None, '') else None
+            length = min(max(int(request.GET.get('length', 64 * 1024)), 1), max_bytes)
+        except ValueError:
+            return JsonResponse({'error': 'Numeric lines, offset and length required'}, status=400)
+        
+        # Validate path
+        if not self.path_validator.is_safe_path(file_path):
+            self.log_operation(request.user, 'view_file', file_path, success=False, error_msg='Invalid path')
+            return JsonResponse({'error': 'Invalid path'}, status=400)
+        
+        try:
+            with self.ssh_manager.sftp() as sftp:
+                try:
+                    if request.GET.get('follow'):
+                        size = sftp.stat(file_path).st_size
+                        self.log_operation(request.user, 'view_file', file_path, success=True)
+                        return self.follow(file_path, size if offset is None else offset, max_bytes)
+                    
+                    if mode == 'tail':
+                        data, start, size = tail_lines(sftp, file_path, lines, max_bytes)
+                    elif mode == 'head':
+                        data, size = head_lines(sftp, file_path, lines, max_bytes)
+                        start = 0
+                    else:
+                        start = offset or 0
+                        data, size = read_range(sftp, file_path, start, length)
+                        
+                except FileNotFoundError:
+                    self.log_operation(request.user, 'view_file', file_path, success=False, error_msg='File not found')
+                    return JsonResponse({'error': 'File not found'}, status=404)
+                except PermissionError:
+                    self.log_operation(request.user, 'view_file', file_path, success=False, error_msg='Permission denied')
+                    return JsonResponse({'error': 'Permission denied'}, status=403)
+                    
+        except Exception as e:
+            logger.error(f"File view failed: {e}")
+            self.log_operation(request.user, 'view_file', file_path, success=False, error_msg=str(e))
+            return JsonResponse({'error': 'Server connection failed'}, status=500)
+        
+        self.log_operation(request.user, 'view_file', file_path, success=True)
+        
+        end = start + len(data)
+        return JsonResponse({
+            'success': True,
+            'path': file_path,
+            'mode': mode,
+            'size': size,
+            'offset': start,
+            'end': end,
+            'has_previous': start > 0,
+            'has_next': end < size,
+            'is_text': b'\x00' not in data,
+            'content': data.decode('utf-8', errors='replace')
+        })
+    
+    def follow(self, file_path, offset, max_bytes):
+        """
+        Stream data appended to a file as Server-Sent Events
+        
+        The file size is polled every LOG_FOLLOW_INTERVAL seconds over the
+        pooled transport; only new bytes are read. "append" events carry
+        complete lines and their end offset as event id, so a reconnecting
+        EventSource continues via Last-Event-ID. A shrinking file (rotated
+        or truncated) is followed from its start. The stream ends after
+        LOG_FOLLOW_TIMEOUT seconds and the client reconnects.
+        """
+        interval = getattr(settings, 'LOG_FOLLOW_INTERVAL', 1)
+        timeout = getattr(settings, 'LOG_FOLLOW_TIMEOUT', 300)
+        
+        def events():
+            position = offset
+            started = last_sent = time.monotonic()
+            yield 'retry: 2000\n\n'
+            
+            while time.monotonic() - started < timeout:
+                try:
+                    with self.ssh_manager.sftp() as sftp:
+                        size = sftp.stat(file_path).st_size
+                        if size < position:
+                            position = 0
+                            yield sse_event('truncated', {'offset': 0}, 0)
+                        data = b''
+                        if size > position:
+                            data, size = read_range(sftp, file_path, position, max_bytes)
+                except Exception as e:
+                    logger.error(f"Following {file_path} failed: {e}")
+                    yield sse_event('error', {'error': 'File not available'})
+                    return
+                
+                # Complete lines only, unless a single line fills the window
+                end = data.rfind(b'\n') + 1 or (len(data) if len(data) >= max_bytes else 0)
+                if end:
+                    yield sse_event('append', {
+                        'offset': position,
+                        'content': data[:end].decode('utf-8', errors='replace')
+                    }, position + end)
+                    position += end
+                    last_sent = time.monotonic()
+                    if position < size:
+                        continue
+                elif time.monotonic() - last_sent >= 15:
+                    yield ': keepalive\n\n'
+                    last_sent = time.monotonic()
+                
+                time.sleep(interval)
+            
+            yield sse_event('timeout', {'offset': position}, position)
+        
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx: do not buffer the stream
+        return response
+
+
 @method_decorator([login_required, csrf_exempt], name='dispatch')
 class FileEditAPI(ServerFileAPI):
     """API for editing file contents"""
@@ -249,8 +484,7 @@ class FileEditAPI(ServerFileAPI):
                 self.log_operation(request.user, 'edit_file', file_path, success=False, error_msg='File not editable')
                 return JsonResponse({'error': 'File type not editable'}, status=400)
             
-            with self.ssh_manager.get_connection() as ssh:
-                sftp = ssh.open_sftp()
+            with self.ssh_manager.sftp() as sftp:
                 
                 try:
                     # Create backup if file exists
@@ -264,8 +498,11 @@ class FileEditAPI(ServerFileAPI):
                     
                     # Write new content
                     with sftp.open(file_path, 'w') as file:
+                        file.set_pipelined(True)
                         file.write(content)
                     
+                    directory_cache.invalidate_entry(self.ssh_manager.target, file_path)
+                    
                     # Log successful operation
                     self.log_operation(request.user, 'edit_file', file_path, success=True)
                     
@@ -311,8 +548,7 @@ class FileDeleteAPI(ServerFileAPI):
                 self.log_operation(request.user, 'delete_file', file_path, success=False, error_msg='Path not deletable')
                 return JsonResponse({'error': 'Path not deletable'}, status=400)
             
-            with self.ssh_manager.get_connection() as ssh:
-                sftp = ssh.open_sftp()
+            with self.ssh_manager.sftp() as sftp:
                 
                 try:
                     # Check if it's a directory
@@ -328,6 +564,8 @@ class FileDeleteAPI(ServerFileAPI):
                         sftp.remove(file_path)
                         operation = 'delete_file'
                     
+                    directory_cache.invalidate_entry(self.ssh_manager.target, file_path)
+                    
                     # Log successful operation
                     self.log_operation(request.user, operation, file_path, success=True)
                     
@@ -356,15 +594,91 @@ class FileDeleteAPI(ServerFileAPI):
             return JsonResponse({'error': 'Server connection failed'}, status=500)
 
 
+@method_decorator(login_required, name='dispatch')
+class FileDownloadAPI(ServerFileAPI):
+    """API for downloading files, with HTTP Range support"""
+    
+    def get(self, request):
+        """Stream a file or one byte range of it (Range, If-Range)"""
+        file_path = request.GET.get('path')
+        
+        if not file_path:
+            return JsonResponse({'error': 'File path required'}, status=400)
+        
+        # Validate path
+        if not self.path_validator.is_safe_path(file_path):
+            self.log_operation(request.user, 'download_file', file_path, success=False, error_msg='Invalid path')
+            return JsonResponse({'error': 'Invalid path'}, status=400)
+        
+        try:
+            with self.ssh_manager.sftp() as sftp:
+                file_stats = sftp.stat(file_path)
+        except FileNotFoundError:
+            self.log_operation(request.user, 'download_file', file_path, success=False, error_msg='File not found')
+            return JsonResponse({'error': 'File not found'}, status=404)
+        except PermissionError:
+            self.log_operation(request.user, 'download_file', file_path, success=False, error_msg='Permission denied')
+            return JsonResponse({'error': 'Permission denied'}, status=403)
+        except Exception as e:
+            logger.error(f"File download failed: {e}")
+            self.log_operation(request.user, 'download_file', file_path, success=False, error_msg=str(e))
+            return JsonResponse({'error': 'Server connection failed'}, status=500)
+        
+        if stat.S_ISDIR(file_stats.st_mode):
+            return JsonResponse({'error': 'Path is a directory'}, status=400)
+        
+        size = file_stats.st_size
+        etag = f'"{int(file_stats.st_mtime):x}-{size:x}"'
+        
+        # A range only applies to the version the client already has parts of
+        byte_range = None
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range or if_range == etag:
+            try:
+                byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+        first, last = byte_range or (0, size - 1)
+        
+        def content():
+            with self.ssh_manager.sftp() as sftp:
+                yield from iter_range(sftp, file_path, first, last)
+        
+        response = StreamingHttpResponse(
+            content(),
+            status=206 if byte_range else 200,
+            content_type=mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        )
+        response['Content-Length'] = str(last - first + 1)
+        response['Content-Disposition'] = content_disposition_header(True, os.path.basename(file_path))
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        if byte_range:
+            response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        
+        self.log_operation(request.user, 'download_file', file_path, success=True)
+        return response
+
+
 @method_decorator([login_required, csrf_exempt], name='dispatch')
 class FileUploadAPI(ServerFileAPI):
-    """API for uploading files"""
+    """
+    API for uploading files
+    
+    POST uploads a whole file (multipart). Large files are sent in chunks
+    with PUT; after an interruption GET returns the offset to resume from.
+    Data is written to <path>.part with pipelined requests and replaces
+    the target only when complete and, if a sha256 was sent, verified.
+    """
     
     def post(self, request):
         """Upload file to server"""
         try:
             target_path = request.POST.get('path')
             uploaded_file = request.FILES.get('file')
+            expected = (request.POST.get('sha256') or '').lower()
             
             if not target_path or not uploaded_file:
                 return JsonResponse({'error': 'Path and file required'}, status=400)
@@ -374,28 +688,30 @@ class FileUploadAPI(ServerFileAPI):
                 self.log_operation(request.user, 'upload_file', target_path, success=False, error_msg='Invalid path')
                 return JsonResponse({'error': 'Invalid path'}, status=400)
             
-            # Check file size (limit to 100MB)
+            # Check file size (limit to 100MB, larger files are uploaded in chunks)
             if uploaded_file.size > 100 * 1024 * 1024:
                 return JsonResponse({'error': 'File too large (max 100MB)'}, status=413)
             
             # Construct full file path
             file_path = os.path.join(target_path, uploaded_file.name)
+            part_path = f'{file_path}.part'
             
-            with self.ssh_manager.get_connection() as ssh:
-                sftp = ssh.open_sftp()
+            with self.ssh_manager.sftp() as sftp:
                 
                 try:
-                    # Create temporary file
-                    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                        for chunk in uploaded_file.chunks():
-                            temp_file.write(chunk)
-                        temp_file_path = temp_file.name
+                    # Stream to the server, no local temporary file
+                    size, digest = write_chunks(sftp, part_path, uploaded_file.chunks())
+                    
+                    if expected and digest != expected:
+                        sftp.remove(part_path)
+                        self.log_operation(request.user, 'upload_file', file_path, success=False, error_msg='Checksum mismatch')
+                        return JsonResponse({'error': 'Checksum mismatch', 'sha256': digest}, status=400)
                     
-                    # Upload to server
-                    sftp.put(temp_file_path, file_path)
+                    if sftp.stat(part_path).st_size != size:
+                        raise IOError(f'Size mismatch after upload of {part_path}')
                     
-                    # Clean up temporary file
-                    os.unlink(temp_file_path)
+                    replace(sftp, part_path, file_path)
+                    directory_cache.invalidate_entry(self.ssh_manager.target, file_path)
                     
                     # Log successful operation
                     self.log_operation(request.user, 'upload_file', file_path, success=True)
@@ -404,7 +720,8 @@ class FileUploadAPI(ServerFileAPI):
                         'success': True,
                         'message': 'File uploaded successfully',
                         'path': file_path,
-                        'size': uploaded_file.size
+                        'size': size,
+                        'sha256': digest
                     })
                     
                 except PermissionError:
@@ -415,6 +732,118 @@ class FileUploadAPI(ServerFileAPI):
             logger.error(f"File upload failed: {e}")
             self.log_operation(request.user, 'upload_file', target_path, success=False, error_msg=str(e))
             return JsonResponse({'error': 'Server connection failed'}, status=500)
+    
+    def get(self, request):
+        """Offset to resume an interrupted chunked upload from"""
+        file_path = request.GET.get('path')
+        
+        if not file_path:
+            return JsonResponse({'error': 'File path required'}, status=400)
+        
+        if not self.path_validator.is_safe_path(file_path):
+            return JsonResponse({'error': 'Invalid path'}, status=400)
+        
+        try:
+            with self.ssh_manager.sftp() as sftp:
+                try:
+                    offset = sftp.stat(f'{file_path}.part').st_size
+                except FileNotFoundError:
+                    offset = 0
+        except Exception as e:
+            logger.error(f"Upload status failed: {e}")
+            return JsonResponse({'error': 'Server connection failed'}, status=500)
+        
+        return JsonResponse({'success': True, 'path': file_path, 'offset': offset})
+    
+    def put(self, request):
+        """
+        Upload one chunk (raw body) of a file
+        
+        Query parameters: path (target file), offset (position of the
+        chunk, 0 starts over), total (final size) and optionally sha256 of
+        the whole file, checked after the last chunk.
+        """
+        file_path = request.GET.get('path')
+        expected = (request.GET.get('sha256') or '').lower()
+        
+        if not file_path:
+            return JsonResponse({'error': 'File path required'}, status=400)
+        
+        try:
+            offset = int(request.GET.get('offset', 0))
+            total = int(request.GET['total'])
+        except (KeyError, ValueError):
+            return JsonResponse({'error': 'Numeric offset and total required'}, status=400)
+        
+        # Validate path
+        if not self.path_validator.is_safe_path(file_path):
+            self.log_operation(request.user, 'upload_file', file_path, success=False, error_msg='Invalid path')
+            return JsonResponse({'error': 'Invalid path'}, status=400)
+        
+        max_size = getattr(settings, 'SERVER_UPLOAD_MAX_SIZE', 10 * 1024 ** 3)
+        if total > max_size:
+            return JsonResponse({'error': f'File too large (max {max_size} bytes)'}, status=413)
+        
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return JsonResponse({'error': 'Invalid Content-Length'}, status=400)
+        if offset < 0 or offset + length > total:
+            return JsonResponse({'error': 'Chunk exceeds total size'}, status=400)
+        
+        part_path = f'{file_path}.part'
+        
+        try:
+            with self.ssh_manager.sftp() as sftp:
+                try:
+                    try:
+                        current = sftp.stat(part_path).st_size
+                    except FileNotFoundError:
+                        current = 0
+                    
+                    if offset and offset != current:
+                        return JsonResponse({'error': 'Offset mismatch', 'offset': current}, status=409)
+                    
+                    written, _ = write_chunks(sftp, part_path, read_request(request), offset)
+                    offset += written
+                    if offset > total:
+                        sftp.remove(part_path)
+                        return JsonResponse({'error': 'Upload larger than total size'}, status=400)
+                    
+                    digest = None
+                    complete = offset == total
+                    if complete:
+                        if sftp.stat(part_path).st_size != total:
+                            raise IOError(f'Size mismatch after upload of {part_path}')
+                        
+                        if expected:
+                            digest = remote_sha256(sftp, part_path)
+                            if digest != expected:
+                                sftp.remove(part_path)
+                                self.log_operation(request.user, 'upload_file', file_path, success=False, error_msg='Checksum mismatch')
+                                return JsonResponse({'error': 'Checksum mismatch', 'sha256': digest}, status=400)
+                        
+                        replace(sftp, part_path, file_path)
+                        self.log_operation(request.user, 'upload_file', file_path, success=True)
+                    
+                    directory_cache.invalidate_entry(self.ssh_manager.target, file_path)
+                    
+                    return JsonResponse({
+                        'success': True,
+                        'path': file_path,
+                        'offset': offset,
+                        'complete': complete,
+                        'sha256': digest
+                    })
+                    
+                except PermissionError:
+                    self.log_operation(request.user, 'upload_file', file_path, success=False, error_msg='Permission denied')
+                    return JsonResponse({'error': 'Permission denied'}, status=403)
+                    
+        except Exception as e:
+            logger.error(f"Chunk upload failed: {e}")
+            self.log_operation(request.user, 'upload_file', file_path, success=False, error_msg=str(e))
+            return JsonResponse({'error': 'Server connection failed'}, status=500)
 
 
 # API endpoint views
@@ -422,4 +851,6 @@ directory_list_api = DirectoryListAPI.as_view()
 file_content_api = FileContentAPI.as_view()
 file_edit_api = FileEditAPI.as_view()
 file_delete_api = FileDeleteAPI.as_view()
-file_upload_api = FileUploadAPI.as_view()
\ No newline at end of file
+file_upload_api = FileUploadAPI.as_view()
+file_download_api = FileDownloadAPI.as_view()
+file_view_api = FileViewAPI.as_view()
\ No newline at end of file
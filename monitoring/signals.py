@@ -0,0 +1,47 @@
+"""
+Signal handlers keeping derived data current
+Platform summaries: bulk writes (bulk_create, queryset.update) do not send
+signals and call monitoring.summary directly instead.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import SystemHealth, ErrorLog, Alert, MonitoringSettings
+from . import summary
+
+
+@receiver(post_save, sender=SystemHealth)
+def health_check_saved(sender, instance, created, **kwargs):
+    if created:
+        summary.record_health([instance])
+
+
+@receiver(post_save, sender=ErrorLog)
+@receiver(post_delete, sender=ErrorLog)
+def error_log_changed(sender, instance, **kwargs):
+    summary.errors_changed(instance.platform_id)
+
+
+@receiver(post_save, sender=Alert)
+@receiver(post_delete, sender=Alert)
+def alert_changed(sender, instance, **kwargs):
+    summary.alerts_changed(instance.platform_id)
+
+
+@receiver(post_save, sender=Alert)
+@receiver(post_delete, sender=Alert)
+def alert_state_changed(sender, instance, **kwargs):
+    from .alert_state import alert_state
+
+    # Message updates do not change whether the condition is active
+    deleted = 'created' not in kwargs
+    if instance.dedup_key and (deleted or kwargs['created'] or instance.status != 'active'):
+        transaction.on_commit(lambda: alert_state.invalidate(instance.dedup_key))
+
+
+@receiver(post_save, sender=MonitoringSettings)
+@receiver(post_delete, sender=MonitoringSettings)
+def monitoring_settings_changed(sender, instance, **kwargs):
+    # Only after commit, so other workers cannot reload the old row
+    transaction.on_commit(MonitoringSettings.invalidate_cache)
@@ -3,11 +3,13 @@ SSH Manager for secure server connections
 Handles SSH connections, command execution, and file operations
 """
 
+import atexit
 import os
 import logging
 import paramiko
 import socket
 import threading
+import time
 from typing import Dict, List, Optional, Tuple, Union
 from contextlib import contextmanager
 from django.conf import settings
@@ -15,6 +17,8 @@ from django.utils import timezone
 from django.contrib.auth.models import User
 from .models import SecurityLog, MonitoringSettings
 from .security import SecurityException
+from .listing_cache import directory_cache
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,16 @@ class SSHConnectionError(Exception):
     pass
 
 
+def ssh_target(ssh_settings: MonitoringSettings) -> Tuple:
+    """Identity of the configured server: host, port, user and key"""
+    return (
+        ssh_settings.ssh_host,
+        ssh_settings.ssh_port,
+        ssh_settings.ssh_user,
+        os.path.expanduser(ssh_settings.ssh_key_path or ''),
+    )
+
+
 class SecureSSHManager:
     """
     Manages secure SSH connections to the server
@@ -268,8 +282,9 @@ class SecureSSHManager:
             if file_stat.st_size > max_size:
                 raise SSHConnectionError(f"File too large: {file_stat.st_size} bytes")
             
-            # Read file
+            # Read file with pipelined requests
             with sftp.open(file_path, 'r') as f:
+                f.prefetch(file_stat.st_size)
                 content = f.read()
             
             return content
@@ -308,10 +323,12 @@ class SecureSSHManager:
                 except Exception as e:
                     logger.warning(f"Could not create backup: {str(e)}")
             
-            # Write file
+            # Write file with pipelined requests
             with sftp.open(file_path, 'w') as f:
+                f.set_pipelined(True)
                 f.write(content)
             
+            directory_cache.invalidate_entry(ssh_target(self.settings), file_path)
             return True
             
         except PermissionError:
@@ -333,6 +350,7 @@ class SecureSSHManager:
         try:
             sftp = self.get_sftp()
             sftp.remove(file_path)
+            directory_cache.invalidate_entry(ssh_target(self.settings), file_path)
             return True
             
         except FileNotFoundError:
@@ -356,6 +374,7 @@ class SecureSSHManager:
         try:
             sftp = self.get_sftp()
             sftp.mkdir(dir_path)
+            directory_cache.invalidate_entry(ssh_target(self.settings), dir_path)
             return True
             
         except FileExistsError:
@@ -499,6 +518,211 @@ class SSHConnectionPool:
 ssh_pool = SSHConnectionPool()
 
 
+class SSHTransportPool:
+    """
+    Shared SSH transports for the server file APIs
+
+    One authenticated transport per target (host, port, user, key) stays
+    open and multiplexes the SFTP channels of all requests, so a request
+    costs an SFTP round-trip instead of a TCP connect and key exchange.
+    Transports send keepalives, are replaced when they die and are closed
+    after `idle_timeout` seconds without use. A semaphore keeps the open
+    channels per transport below the server's MaxSessions (10 by default
+    in OpenSSH); SFTP clients are returned to the pool and reused.
+    """
+
+    def __init__(self, max_channels: int = None, keepalive: int = None,
+                 idle_timeout: int = None, acquire_timeout: int = None):
+        self.max_channels = max_channels or getattr(settings, 'SSH_POOL_MAX_CHANNELS', 8)
+        self.keepalive = keepalive or getattr(settings, 'SSH_POOL_KEEPALIVE', 30)
+        self.idle_timeout = idle_timeout or getattr(settings, 'SSH_POOL_IDLE_TIMEOUT', 300)
+        self.acquire_timeout = acquire_timeout or getattr(settings, 'SSH_POOL_ACQUIRE_TIMEOUT', 30)
+
+        self._hosts = {}   # target -> {'client', 'lock', 'channels', 'idle', 'in_use', 'last_used'}
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stopped = threading.Event()
+
+    @contextmanager
+    def sftp(self, ssh_settings: MonitoringSettings):
+        """
+        Borrow an SFTP client on the shared transport of the configured server
+
+        Args:
+            ssh_settings: MonitoringSettings with host, port, user and key
+
+        Yields:
+            SFTP client, exclusive to the caller until the block ends
+        """
+        target = ssh_target(ssh_settings)
+        host = self._host(target)
+        if not host['channels'].acquire(timeout=self.acquire_timeout):
+            raise SSHConnectionError("Too many concurrent SFTP sessions")
+
+        sftp = None
+        try:
+            sftp = self._checkout(target, host)
+            yield sftp
+        finally:
+            with host['lock']:
+                host['in_use'] -= 1
+                host['last_used'] = time.monotonic()
+                if sftp is not None:
+                    if self._usable(sftp):
+                        host['idle'].append(sftp)
+                    else:
+                        sftp.close()
+            host['channels'].release()
+
+    def _host(self, target: Tuple) -> Dict:
+        with self._lock:
+            if target not in self._hosts:
+                self._hosts[target] = {
+                    'client': None,
+                    'lock': threading.Lock(),
+                    'channels': threading.BoundedSemaphore(self.max_channels),
+                    'idle': [],
+                    'in_use': 0,
+                    'last_used': time.monotonic(),
+                }
+            return self._hosts[target]
+
+    def _checkout(self, target: Tuple, host: Dict) -> paramiko.SFTPClient:
+        """Idle SFTP client of the target or a new channel on its transport"""
+        with host['lock']:
+            host['in_use'] += 1
+            while host['idle']:
+                sftp = host['idle'].pop()
+                if self._usable(sftp):
+                    return sftp
+                sftp.close()
+
+            try:
+                return paramiko.SFTPClient.from_transport(self._transport(target, host))
+            except SSHConnectionError:
+                raise
+            except Exception as e:
+                # The transport died since the last keepalive, reconnect once
+                logger.warning(f"SFTP channel on pooled transport failed, reconnecting: {e}")
+                try:
+                    return paramiko.SFTPClient.from_transport(self._transport(target, host, reconnect=True))
+                except SSHConnectionError:
+                    raise
+                except Exception as e:
+                    raise SSHConnectionError(f"SFTP error: {e}")
+
+    def _transport(self, target: Tuple, host: Dict, reconnect: bool = False) -> paramiko.Transport:
+        """Live transport of a target, connecting if necessary (host lock held)"""
+        client = host['client']
+        transport = client.get_transport() if client else None
+        if not reconnect and transport and transport.is_active() and transport.is_authenticated():
+            return transport
+
+        self._close(host)
+        host['client'] = self._connect(target)
+        return host['client'].get_transport()
+
+    def _connect(self, target: Tuple) -> paramiko.SSHClient:
+        hostname, port, username, key_path = target
+        if not os.path.exists(key_path):
+            logger.error(f"SSH key file does not exist: {key_path}")
+            raise SSHConnectionError(f"SSH key file not found: {key_path}")
+
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            with metrics.ssh_timer('connect'):
+                client.connect(
+                    hostname=hostname,
+                    port=port,
+                    username=username,
+                    key_filename=key_path,
+                    timeout=30
+                )
+        except Exception as e:
+            client.close()
+            logger.error(f"SSH connection error: {e}")
+            raise SSHConnectionError(f"Could not connect to server: {e}")
+
+        client.get_transport().set_keepalive(self.keepalive)
+        logger.info(f"Pooled SSH transport to {hostname}:{port} established")
+        self._ensure_worker()
+        return client
+
+    def _usable(self, sftp: paramiko.SFTPClient) -> bool:
+        channel = sftp.get_channel()
+        return bool(channel and not channel.closed and channel.get_transport().is_active())
+
+    def _close(self, host: Dict):
+        """Close the transport and idle SFTP clients of a target (host lock held)"""
+        for sftp in host['idle']:
+            try:
+                sftp.close()
+            except Exception:
+                pass
+        host['idle'] = []
+
+        if host['client']:
+            try:
+                host['client'].close()
+            except Exception:
+                pass
+            host['client'] = None
+
+    def evict_idle(self) -> int:
+        """
+        Close transports that were not used for `idle_timeout` seconds
+
+        Returns:
+            Number of closed transports
+        """
+        now = time.monotonic()
+        with self._lock:
+            hosts = list(self._hosts.values())
+
+        closed = 0
+        for host in hosts:
+            with host['lock']:
+                if host['client'] and not host['in_use'] and now - host['last_used'] > self.idle_timeout:
+                    self._close(host)
+                    closed += 1
+        return closed
+
+    def close_all(self):
+        """Stop the eviction thread and close all transports"""
+        self._stopped.set()
+        with self._lock:
+            hosts = list(self._hosts.values())
+        for host in hosts:
+            with host['lock']:
+                self._close(host)
+
+    def _ensure_worker(self):
+        """Start the eviction thread on first use"""
+        if self._worker and self._worker.is_alive():
+            return
+
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stopped.clear()
+            self._worker = threading.Thread(target=self._run, name='ssh-transport-pool', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        """Eviction loop of the background thread"""
+        while not self._stopped.wait(self.keepalive):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error(f"SSH transport eviction failed: {e}")
+
+
+# Global transport pool of the server file APIs
+ssh_transport_pool = SSHTransportPool()
+atexit.register(ssh_transport_pool.close_all)
+
+
 class SSHManager:
     """
     Simplified SSH Manager for API usage
@@ -506,10 +730,24 @@ class SSHManager:
     
     def __init__(self):
         self.settings = MonitoringSettings.get_settings()
+        self.target = ssh_target(self.settings)
         
+    def sftp(self):
+        """
+        Context manager for a pooled SFTP client (see SSHTransportPool)
+
+        Used by the file APIs; no handshake once the transport is open.
+        """
+        return ssh_transport_pool.sftp(self.settings)
+
     @contextmanager
     def get_connection(self):
-        """Context manager for SSH connections"""
+        """
+        Context manager for a dedicated SSH connection
+
+        Opens and closes a new connection, so the debug views test the
+        complete handshake; file operations should use sftp().
+        """
         ssh_client = paramiko.SSHClient()
         ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         
@@ -526,13 +764,14 @@ class SSHManager:
                 raise SSHConnectionError(f"SSH key file not found: {key_path}")
             
             # Connect to server
-            ssh_client.connect(
-                hostname=self.settings.ssh_host,
-                port=self.settings.ssh_port,
-                username=self.settings.ssh_user,
-                key_filename=key_path,
-                timeout=30
-            )
+            with metrics.ssh_timer('connect'):
+                ssh_client.connect(
+                    hostname=self.settings.ssh_host,
+                    port=self.settings.ssh_port,
+                    username=self.settings.ssh_user,
+                    key_filename=key_path,
+                    timeout=30
+                )
             
             logger.info("SSH connection established successfully")
             yield ssh_client
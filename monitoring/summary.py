@@ -0,0 +1,235 @@
+"""
+Materialized platform summaries
+Keeps PlatformSummary rows current as monitoring data is written
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Iterable, List
+from django.db.models import Count, Q
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from .models import Platform, PlatformSummary, SystemHealth, ErrorLog, Alert
+
+logger = logging.getLogger('monitoring')
+
+_state = threading.local()
+
+
+@contextmanager
+def deferred_updates():
+    """
+    Collect error and alert changes and refresh each platform once at the end
+
+    Used around batch writes (e.g. an error ingest flush) so that saving
+    many rows does not recount the same platform for every row.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+
+    _state.pending = {'errors': set(), 'alerts': set()}
+    try:
+        yield
+    finally:
+        pending, _state.pending = _state.pending, None
+        refresh_error_counts(pending['errors'])
+        refresh_alert_counts(pending['alerts'])
+
+
+def errors_changed(platform_id: int):
+    """Mark the error count of a platform as outdated"""
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        pending['errors'].add(platform_id)
+    else:
+        refresh_error_counts([platform_id])
+
+
+def alerts_changed(platform_id: int):
+    """Mark the active alert count of a platform as outdated"""
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        pending['alerts'].add(platform_id)
+    else:
+        refresh_alert_counts([platform_id])
+
+
+def record_health(health_checks: Iterable[SystemHealth]):
+    """
+    Apply new health checks to the summaries
+
+    Args:
+        health_checks: Saved SystemHealth rows (e.g. from bulk_create)
+    """
+    health_checks = [health for health in health_checks if health.checked_at]
+    if not health_checks:
+        return
+
+    summaries = PlatformSummary.objects.in_bulk(
+        {health.platform_id for health in health_checks}, field_name='platform_id'
+    )
+
+    now = timezone.now()
+    for health in health_checks:
+        summary = summaries.get(health.platform_id)
+        if not summary:
+            # Created on first read by get_platform_summaries
+            continue
+
+        summary.add_health_check(health.status, health.checked_at)
+        if not summary.checked_at or health.checked_at >= summary.checked_at:
+            summary.status = health.status
+            summary.response_time = health.response_time
+            summary.status_code = health.status_code
+            summary.checked_at = health.checked_at
+        summary.updated_at = now
+
+    PlatformSummary.objects.bulk_update(
+        summaries.values(),
+        ['status', 'response_time', 'status_code', 'checked_at', 'uptime_buckets', 'updated_at'],
+    )
+
+
+def refresh_error_counts(platform_ids: Iterable[int]):
+    """Recount unresolved and new errors of the last 24h for the given platforms"""
+    platform_ids = set(platform_ids)
+    if not platform_ids:
+        return
+
+    since = timezone.now() - timedelta(hours=24)
+    counts = {
+        row['platform']: row for row in
+        ErrorLog.objects.filter(platform_id__in=platform_ids, last_seen__gte=since)
+        .order_by().values('platform')
+        .annotate(
+            unresolved=Count('id', filter=Q(is_resolved=False)),
+            new=Count('id', filter=Q(first_seen__gte=since)),
+        )
+    }
+    for platform_id in platform_ids:
+        row = counts.get(platform_id, {})
+        PlatformSummary.objects.filter(platform_id=platform_id).update(
+            error_count_24h=row.get('unresolved', 0), new_errors_24h=row.get('new', 0), updated_at=timezone.now()
+        )
+
+
+def refresh_alert_counts(platform_ids: Iterable[int]):
+    """Recount active alerts for the given platforms"""
+    platform_ids = set(platform_ids)
+    if not platform_ids:
+        return
+
+    counts = dict(
+        Alert.objects.filter(platform_id__in=platform_ids, status='active')
+        .order_by().values('platform').annotate(total=Count('id')).values_list('platform', 'total')
+    )
+    for platform_id in platform_ids:
+        PlatformSummary.objects.filter(platform_id=platform_id).update(
+            active_alerts=counts.get(platform_id, 0), updated_at=timezone.now()
+        )
+
+
+def rebuild_summaries(platforms=None) -> int:
+    """
+    Recompute summaries from the raw tables (reconciliation)
+
+    Also expires errors that dropped out of the 24h window since the
+    last write, which incremental updates cannot see.
+
+    Returns:
+        Number of summaries written
+    """
+    from .queries import get_platform_overview
+
+    if platforms is None:
+        platforms = Platform.objects.all()
+
+    overview = get_platform_overview(platforms)
+    if not overview:
+        return 0
+
+    platform_ids = [info['platform'].id for info in overview]
+    since = timezone.now() - timedelta(hours=24)
+
+    buckets = {platform_id: {} for platform_id in platform_ids}
+    hourly = (
+        SystemHealth.objects.filter(platform_id__in=platform_ids, checked_at__gte=since)
+        .annotate(hour=TruncHour('checked_at'))
+        .order_by().values('platform', 'hour', 'status')
+        .annotate(total=Count('id'))
+    )
+    for row in hourly:
+        bucket = buckets[row['platform']].setdefault(PlatformSummary.bucket_key(row['hour']), [0, 0])
+        if row['status'] == 'online':
+            bucket[0] += row['total']
+        bucket[1] += row['total']
+
+    existing = PlatformSummary.objects.in_bulk(platform_ids, field_name='platform_id')
+    to_create, to_update = [], []
+
+    for info in overview:
+        platform = info['platform']
+        health = info['health']
+        summary = existing.get(platform.id) or PlatformSummary(platform=platform)
+
+        summary.status = health.status if health else ''
+        summary.response_time = health.response_time if health else None
+        summary.status_code = health.status_code if health else None
+        summary.checked_at = health.checked_at if health else None
+        summary.uptime_buckets = buckets[platform.id]
+        summary.error_count_24h = info['error_count_24h']
+        summary.new_errors_24h = info['new_errors_24h']
+        summary.active_alerts = info['active_alerts']
+        summary.updated_at = timezone.now()
+
+        (to_update if summary.pk else to_create).append(summary)
+
+    if to_create:
+        PlatformSummary.objects.bulk_create(to_create, ignore_conflicts=True)
+    if to_update:
+        PlatformSummary.objects.bulk_update(to_update, [
+            'status', 'response_time', 'status_code', 'checked_at',
+            'uptime_buckets', 'error_count_24h', 'new_errors_24h', 'active_alerts', 'updated_at',
+        ])
+
+    return len(overview)
+
+
+def get_platform_summaries(platforms=None) -> List[Dict]:
+    """
+    Dashboard data for each platform, read from the summaries
+
+    Returns the same structure as queries.get_platform_overview; 'health'
+    is the summary itself (status, response_time, checked_at) or None if
+    the platform has never been checked.
+    """
+    if platforms is None:
+        platforms = Platform.objects.filter(is_active=True).order_by('environment', 'name')
+
+    platforms = list(platforms.select_related('summary'))
+
+    missing = [platform for platform in platforms if not hasattr(platform, 'summary')]
+    if missing:
+        rebuild_summaries(Platform.objects.filter(id__in=[platform.id for platform in missing]))
+        summaries = PlatformSummary.objects.in_bulk(
+            [platform.id for platform in missing], field_name='platform_id'
+        )
+        for platform in missing:
+            if platform.id in summaries:
+                platform.summary = summaries[platform.id]
+
+    overview = []
+    for platform in platforms:
+        summary = getattr(platform, 'summary', None)
+        overview.append({
+            'platform': platform,
+            'health': summary if summary and summary.checked_at else None,
+            'error_count_24h': summary.error_count_24h if summary else 0,
+            'new_errors_24h': summary.new_errors_24h if summary else 0,
+            'active_alerts': summary.active_alerts if summary else 0,
+            'uptime_24h': summary.uptime_24h if summary else None,
+        })
+    return overview
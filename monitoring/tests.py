@@ -1,3 +1,876 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import logging
+import stat
+from datetime import timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock
+from django.apps import apps
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .alert_state import AlertStateEngine
+from .alert_system import AlertManager
+from .error_ingest import ErrorIngestBuffer, error_buffer
+from .listing_cache import DirectoryListingCache, select_page
+from .models import (
+    Alert, ErrorLog, HealthRollup, NotificationOutbox, PerformanceMetric, Platform, SchedulerJob, SystemHealth
+)
+from .notifications import NotificationDispatcher
+from .profiling import QueryProfiler, SelfMonitor, self_monitor
+from .rollups import get_health_series, rollup_health
+from .scheduler import Scheduler
+from .server_api import FileUploadAPI
+from .summary import get_platform_summaries, rebuild_summaries
+from .transfers import (
+    RangeNotSatisfiable, head_lines, iter_range, parse_range, remote_sha256, tail_lines, write_chunks
+)
+from .utils import AdminErrorHandler, AdminErrorTrackingMiddleware, ErrorBatchSender, ErrorSampler
 
-# Create your tests here.
+
+class FakeRemoteFile(io.BytesIO):
+    """SFTP file on top of BytesIO that records the readv() windows"""
+
+    def __init__(self, sftp, path, data=b''):
+        super().__init__(data)
+        self.sftp = sftp
+        self.path = path
+
+    def stat(self):
+        return SimpleNamespace(st_size=len(self.getvalue()))
+
+    def readv(self, chunks):
+        self.sftp.windows.append(sum(size for _, size in chunks))
+        data = self.getvalue()
+        return iter([data[offset:offset + size] for offset, size in chunks])
+
+    def set_pipelined(self, pipelined=True):
+        pass
+
+    def close(self):
+        self.sftp.files[self.path] = self.getvalue()
+        super().close()
+
+
+class FakeSFTP:
+    """In-memory stand-in for paramiko.SFTPClient"""
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+        self.windows = []
+
+    def open(self, path, mode='r'):
+        if 'w' in mode:
+            return FakeRemoteFile(self, path)
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        return FakeRemoteFile(self, path, self.files[path])
+
+    def stat(self, path):
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        return SimpleNamespace(st_size=len(self.files[path]), st_mtime=0, st_mode=0o100644)
+
+
+class AdminErrorHandlerTests(SimpleTestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('monitoring.tests.handler')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        self.logger.handlers = []
+
+    def test_error_record_is_reported(self):
+        self.logger.addHandler(AdminErrorHandler(platform_slug='shop'))
+
+        with mock.patch('monitoring.utils.send_error_to_admin') as send:
+            self.logger.error('Payment failed')
+
+        send.assert_called_once()
+        platform_slug, error_data = send.call_args[0]
+        self.assertEqual(platform_slug, 'shop')
+        self.assertEqual(error_data['message'], 'Payment failed')
+        self.assertEqual(error_data['severity'], 'high')
+        self.assertEqual(error_data['count'], 1)
+
+    def test_batch_handler_enqueues_record(self):
+        self.logger.addHandler(AdminErrorHandler(platform_slug='shop', batch=True))
+        sender = mock.Mock()
+
+        with mock.patch('monitoring.utils.get_batch_sender', return_value=sender):
+            self.logger.critical('Database down')
+
+        sender.enqueue.assert_called_once()
+        platform_slug, error_data = sender.enqueue.call_args[0]
+        self.assertEqual(platform_slug, 'shop')
+        self.assertEqual(error_data['severity'], 'critical')
+
+    def test_warnings_are_not_reported(self):
+        self.logger.addHandler(AdminErrorHandler(platform_slug='shop'))
+
+        with mock.patch('monitoring.utils.report_error') as report:
+            self.logger.warning('Slow response')
+
+        report.assert_not_called()
+
+
+@override_settings(PLATFORM_SLUG='shop', ADMIN_ERROR_TRACKING_MODE='batch')
+class ErrorTrackingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Shop', slug='shop', url='https://shop.example.com')
+        cache.clear()
+        self.sender = ErrorBatchSender(batch_url='http://admin.invalid/batch/')
+        patchers = [
+            mock.patch.object(self.sender, '_ensure_worker'),
+            mock.patch('monitoring.utils.get_batch_sender', return_value=self.sender),
+            mock.patch.object(error_buffer, '_ensure_worker'),
+            mock.patch('monitoring.error_ingest.error_rate_tracker'),
+            mock.patch('monitoring.alert_system.process_error_alerts'),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_sampled_count_reaches_the_error_log(self):
+        request = RequestFactory().get('/checkout/')
+        request.user = AnonymousUser()
+        middleware = AdminErrorTrackingMiddleware(lambda request: HttpResponse(status=500))
+
+        with mock.patch.object(middleware.sampler, 'admit', return_value=7):
+            middleware(request)
+
+        # Deliver the batch the sender would post to the admin dashboard
+        batch = list(self.sender._pending.values())
+        response = self.client.post(
+            reverse('monitoring:error_batch_webhook'), gzip.compress(json.dumps(batch).encode()),
+            content_type='application/json', HTTP_CONTENT_ENCODING='gzip',
+        )
+        self.assertEqual(response.status_code, 202)
+        error_buffer.flush()
+
+        self.assertEqual(ErrorLog.objects.get(platform=self.platform).count, 7)
+
+
+class TransferTests(SimpleTestCase):
+    def setUp(self):
+        self.data = bytes(range(256)) * 4096  # 1 MiB
+        self.sftp = FakeSFTP({'/var/www/file.bin': self.data})
+
+    def test_parse_range(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+        self.assertEqual(parse_range('bytes=10-19', 100), (10, 19))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=50-500', 100), (50, 99))
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=100-', 100)
+
+    def test_iter_range_reads_in_bounded_windows(self):
+        chunks = list(iter_range(self.sftp, '/var/www/file.bin', window=64 * 1024))
+
+        self.assertEqual(b''.join(chunks), self.data)
+        self.assertEqual(len(self.sftp.windows), 16)
+        self.assertLessEqual(max(self.sftp.windows), 64 * 1024)
+        self.assertLessEqual(max(len(chunk) for chunk in chunks), 32768)
+
+    def test_iter_range_requests_next_window_only_when_consumed(self):
+        chunks = iter_range(self.sftp, '/var/www/file.bin', window=64 * 1024)
+
+        next(chunks)
+        self.assertEqual(self.sftp.windows, [64 * 1024])
+
+    def test_iter_range_partial(self):
+        data = b''.join(iter_range(self.sftp, '/var/www/file.bin', 1000, 200999, window=65536))
+        self.assertEqual(data, self.data[1000:201000])
+
+    def test_write_chunks_and_checksum(self):
+        written, digest = write_chunks(self.sftp, '/var/www/upload.bin', [b'abc', b'def'])
+        self.assertEqual(written, 6)
+        self.assertEqual(digest, hashlib.sha256(b'abcdef').hexdigest())
+
+        # Resumed upload continues at the offset
+        write_chunks(self.sftp, '/var/www/upload.bin', [b'XYZ'], offset=3)
+        self.assertEqual(self.sftp.files['/var/www/upload.bin'], b'abcXYZ')
+        self.assertEqual(remote_sha256(self.sftp, '/var/www/upload.bin'), hashlib.sha256(b'abcXYZ').hexdigest())
+
+
+
+class FileUploadTests(TestCase):
+    def test_invalid_content_length_is_bad_request(self):
+        request = RequestFactory().put(
+            '/api/server/file/upload/?path=/var/www/a.txt&offset=0&total=10',
+            b'data', content_type='application/octet-stream',
+        )
+        request.META['CONTENT_LENGTH'] = 'abc'
+        view = FileUploadAPI()
+        view.request = request
+
+        with mock.patch.object(view.path_validator, 'is_safe_path', return_value=True):
+            response = view.put(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {'error': 'Invalid Content-Length'})
+
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Shop', slug='shop', url='https://shop.example.com')
+        self.alert = Alert.objects.create(
+            platform=self.platform, alert_type='error_threshold', title='Fehler', message='Zu viele Fehler',
+            severity='high', dedup_key='shop:error_threshold'
+        )
+        self.dispatcher = NotificationDispatcher(max_attempts=3, backoff_base=30)
+
+    def outbox(self, channel, **kwargs):
+        return NotificationOutbox.objects.create(alert=self.alert, channel=channel, status='sending', **kwargs)
+
+    def test_channels_marked_sent_concurrently_keep_both_methods(self):
+        email = self.outbox('email')
+        slack = self.outbox('slack')
+        # Both workers loaded the alert before either had sent
+        email.alert = Alert.objects.get(id=self.alert.id)
+        slack.alert = Alert.objects.get(id=self.alert.id)
+
+        self.dispatcher._mark_sent('email', [email])
+        self.dispatcher._mark_sent('slack', [slack])
+
+        self.alert.refresh_from_db()
+        self.assertTrue(self.alert.notification_sent)
+        self.assertEqual(sorted(self.alert.notification_methods), ['email', 'slack'])
+        self.assertEqual(NotificationOutbox.objects.filter(status='sent').count(), 2)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        entry = self.outbox('email', attempts=1)
+
+        with mock.patch('monitoring.alert_system.alert_manager.send_to_channel', return_value=False):
+            self.assertEqual(self.dispatcher._send('email', [entry]), (0, 1))
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'pending')
+        self.assertEqual(entry.last_error, 'email delivery failed')
+        self.assertGreater(entry.next_attempt_at, timezone.now())
+
+    def test_send_gives_up_after_max_attempts(self):
+        entry = self.outbox('slack', attempts=3)
+
+        with mock.patch('monitoring.alert_system.alert_manager.send_to_channel', side_effect=IOError('timeout')):
+            self.dispatcher._send('slack', [entry])
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'failed')
+        self.assertEqual(entry.last_error, 'timeout')
+
+    def test_backoff_is_exponential_and_capped(self):
+        self.assertTrue(24 <= self.dispatcher.backoff(1) <= 36)
+        self.assertTrue(96 <= self.dispatcher.backoff(3) <= 144)
+        self.assertLessEqual(self.dispatcher.backoff(20), self.dispatcher.backoff_max * 1.2)
+
+
+class PlatformDetailViewTests(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Shop', slug='shop', url='https://shop.example.com')
+        self.client.force_login(User.objects.create_user('admin', password='secret'))
+        patcher = mock.patch.object(self_monitor, 'enabled', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.url = reverse('monitoring:platform_detail', args=[self.platform.id])
+
+    def test_invalid_hours_is_bad_request(self):
+        response = self.client.get(self.url, {'hours': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_hours_are_clamped(self):
+        for value, expected in (('0', 1), ('-5', 1), ('100000', 24 * 365), ('', 24)):
+            with mock.patch('monitoring.views.render', return_value=HttpResponse()) as render:
+                self.assertEqual(self.client.get(self.url, {'hours': value}).status_code, 200)
+            self.assertEqual(render.call_args[0][2]['stats']['range_hours'], expected)
+
+    def test_range_statistics_are_rendered(self):
+        now = timezone.now()
+        for minutes, response_time in ((5, 100.0), (10, 300.0)):
+            check = SystemHealth.objects.create(platform=self.platform, status='online', response_time=response_time)
+            SystemHealth.objects.filter(id=check.id).update(checked_at=now - timedelta(minutes=minutes))
+
+        response = self.client.get(self.url, {'hours': 168})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['stats']['total_checks'], 2)
+        self.assertContains(response, 'Checks (168h)')
+        self.assertContains(response, 'P95 Antwortzeit (168h)')
+        self.assertContains(response, 'id="health-series"')
+
+
+class SelfMonitorTests(TestCase):
+    def setUp(self):
+        self.monitor = SelfMonitor(period=60, explain_limit=1)
+        patcher = mock.patch.object(self.monitor, '_ensure_worker')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def profiler(self, *queries):
+        profiler = QueryProfiler(slow_ms=100)
+        for sql, ms in queries:
+            profiler.count += 1
+            profiler.slow.append({'sql': sql, 'params': (1,), 'alias': 'default', 'ms': ms})
+        return profiler
+
+    def test_slow_queries_are_explained_on_flush(self):
+        with mock.patch('monitoring.profiling.explain', return_value='SCAN monitoring_errorlog') as explain:
+            self.monitor.record('monitoring:errors', 200, 0.5, self.profiler(
+                ('SELECT * FROM monitoring_errorlog WHERE id = %s', 250),
+                ('SELECT * FROM monitoring_alert WHERE id = %s', 300),
+            ))
+            explain.assert_not_called()
+
+            self.assertEqual(self.monitor.flush(include_current=True), 1)
+
+        # explain_limit: only the first template gets a plan
+        explain.assert_called_once_with('SELECT * FROM monitoring_errorlog WHERE id = %s', (1,), 'default')
+        samples = PerformanceMetric.objects.get().details['slow_query_samples']
+        self.assertEqual([sample['plan'] for sample in samples], ['', 'SCAN monitoring_errorlog'])
+
+    @override_settings(ADMIN_DASHBOARD_WEBHOOK_URL='https://admin.example.com:8443/monitoring/webhook/error/')
+    def test_platform_url_follows_the_dashboard_address(self):
+        platform = Platform.objects.get(id=self.monitor.get_platform_id())
+        self.assertEqual(platform.url, 'https://admin.example.com:8443')
+        self.assertFalse(platform.is_active)
+
+
+class AlertDedupKeyTests(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Shop', slug='shop', url='https://shop.example.com')
+
+    def alert(self, alert_type, title, **kwargs):
+        return Alert.objects.create(
+            platform=self.platform, alert_type=alert_type, title=title, message=title, severity='medium', **kwargs
+        )
+
+    def test_custom_alerts_are_keyed_by_title(self):
+        first = self.alert('custom', 'Zertifikat läuft ab')
+        second = self.alert('custom', 'Backup fehlgeschlagen')
+
+        self.assertNotEqual(first.dedup_key, second.dedup_key)
+        self.assertEqual(self.alert('downtime', 'Offline').dedup_key, f'{self.platform.id}:downtime')
+
+    def test_backfill_matches_runtime_keys(self):
+        migration = importlib.import_module('monitoring.migrations.0012_alert_dedup_key')
+        custom = [self.alert('custom', 'Zertifikat läuft ab'), self.alert('custom', 'Backup fehlgeschlagen')]
+        downtime = self.alert('downtime', 'Offline')
+        Alert.objects.update(dedup_key='')
+
+        migration.backfill_dedup_keys(apps, None)
+
+        for alert in custom:
+            alert.refresh_from_db()
+            self.assertEqual(alert.status, 'active')
+            self.assertEqual(alert.dedup_key, Alert.default_dedup_key(self.platform.id, 'custom', alert.title))
+        downtime.refresh_from_db()
+        self.assertEqual(downtime.dedup_key, f'{self.platform.id}:downtime')
+
+        # A custom alert raised again after the migration updates the existing one
+        again, created = AlertStateEngine().raise_alert(
+            self.platform, 'custom', 'Backup fehlgeschlagen', 'Backup fehlgeschlagen'
+        )
+        self.assertFalse(created)
+        self.assertEqual(again.id, custom[1].id)
+        self.assertEqual(Alert.objects.filter(status='active').count(), 3)
+
+
+class ErrorThresholdTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.platform = Platform.objects.create(name='Shop', slug='shop', url='https://shop.example.com')
+        self.manager = AlertManager()
+        patchers = [
+            mock.patch.object(self.manager, '_send_notifications'),
+            mock.patch('monitoring.error_rates.error_rate_tracker.count', return_value=1),
+            mock.patch('monitoring.error_rates.error_rate_tracker.error_rate', return_value=None),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def error(self, message):
+        return ErrorLog.objects.create(platform=self.platform, error_type='500', severity='critical', message=message)
+
+    def test_critical_alert_uses_the_passed_errors(self):
+        passed = self.error('Payment failed')
+        self.error('Newer, but from another flush')
+
+        self.manager.monitoring_settings  # loaded once, then cached
+        with self.assertNumQueries(0):
+            self.manager.check_error_thresholds(self.platform)
+        self.assertFalse(Alert.objects.exists())
+
+        self.manager.check_error_thresholds(self.platform, [passed])
+        alert = Alert.objects.get(alert_type='critical_error')
+        self.assertEqual(alert.related_error, passed)
+        self.assertEqual(alert.message, 'Payment failed')
+
+
+class PlatformSummaryTests(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Shop', slug='shop', url='https://shop.example.com')
+        get_platform_summaries()
+
+    def error(self, message, **kwargs):
+        return ErrorLog.objects.create(platform=self.platform, error_type='500', severity='high', message=message, **kwargs)
+
+    def counts(self):
+        info = get_platform_summaries()[0]
+        return info['error_count_24h'], info['new_errors_24h']
+
+    def test_counts_follow_error_writes(self):
+        self.error('Timeout in checkout')
+        resolved = self.error('Missing template')
+        self.assertEqual(self.counts(), (2, 2))
+
+        resolved.resolve()
+        # Resolved errors still count as recorded in the last 24h
+        self.assertEqual(self.counts(), (1, 2))
+
+    def test_old_errors_seen_again_are_not_new(self):
+        old = self.error('Timeout in checkout')
+        ErrorLog.objects.filter(id=old.id).update(first_seen=timezone.now() - timedelta(days=3))
+
+        rebuild_summaries()
+        self.assertEqual(self.counts(), (1, 0))
+
+
+class TailHeadTests(SimpleTestCase):
+    def setUp(self):
+        self.lines = [f'line {i}\n'.encode() for i in range(1000)]
+        self.sftp = FakeSFTP({'/var/log/app.log': b''.join(self.lines)})
+
+    def test_tail_reads_only_the_last_blocks(self):
+        data, start, size = tail_lines(self.sftp, '/var/log/app.log', 3, 1024 * 1024, block_size=64)
+
+        self.assertEqual(data, b''.join(self.lines[-3:]))
+        self.assertEqual(start, size - len(data))
+        self.assertLessEqual(sum(self.sftp.windows), 128)
+
+    def test_tail_is_limited_to_max_bytes(self):
+        data, start, size = tail_lines(self.sftp, '/var/log/app.log', 500, 100, block_size=64)
+        self.assertEqual(len(data), 100)
+        self.assertEqual(start, size - 100)
+
+    def test_head(self):
+        data, size = head_lines(self.sftp, '/var/log/app.log', 2, 1024 * 1024, block_size=64)
+        self.assertEqual(data, b'line 0\nline 1\n')
+        self.assertEqual(size, len(self.sftp.files['/var/log/app.log']))
+
+
+class ErrorFingerprintTests(SimpleTestCase):
+    def test_volatile_parts_are_ignored(self):
+        first = ErrorLog.build_fingerprint(1, '500', 'Timeout after 30s for order 1234 from 10.0.0.1')
+        second = ErrorLog.build_fingerprint(1, '500', 'Timeout after 45s for order 99 from 192.168.1.20')
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, ErrorLog.build_fingerprint(1, 'database', 'Timeout after 30s for order 1234'))
+        self.assertNotEqual(first, ErrorLog.build_fingerprint(2, '500', 'Timeout after 30s for order 1234'))
+
+    def test_uuids_and_addresses_are_ignored(self):
+        self.assertEqual(
+            ErrorLog.normalize_message('Session 123e4567-e89b-12d3-a456-426614174000 at 0x7f3a2c'),
+            'Session <uuid> at <addr>',
+        )
+
+
+class ErrorIngestTests(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Shop', slug='shop', url='https://shop.example.com')
+        self.buffer = ErrorIngestBuffer(max_pending=10)
+        patchers = [
+            mock.patch.object(self.buffer, '_ensure_worker'),
+            mock.patch('monitoring.error_ingest.error_rate_tracker'),
+            mock.patch('monitoring.alert_system.process_error_alerts'),
+        ]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        self.process_error_alerts = [patcher.start() for patcher in patchers][-1]
+
+    def event(self, message, severity='medium', error_type='500'):
+        return {'platform_id': self.platform.id, 'error_type': error_type, 'severity': severity, 'message': message}
+
+    def test_identical_events_are_written_once_with_count(self):
+        self.buffer.submit(self.event('Order 1 failed'))
+        self.buffer.submit(self.event('Order 2 failed', severity='critical'))
+        self.buffer.submit(self.event('Order 3 failed'), count=5)
+        self.buffer.submit(self.event('Template missing'))
+
+        self.assertEqual(self.buffer.flush(), 2)
+
+        error = ErrorLog.objects.get(message='Order 1 failed')
+        self.assertEqual(error.count, 7)
+        self.assertEqual(error.severity, 'critical')
+        self.assertEqual(ErrorLog.objects.count(), 2)
+        # Alerts are evaluated once per platform and flush
+        self.process_error_alerts.assert_called_once()
+        self.assertEqual(self.process_error_alerts.call_args[0][1], [error])
+
+    def test_later_flushes_increment_the_open_error(self):
+        self.buffer.submit(self.event('Order 1 failed'))
+        self.buffer.flush()
+        self.buffer.submit(self.event('Order 2 failed'), count=2)
+        self.buffer.flush()
+
+        error = ErrorLog.objects.get()
+        self.assertEqual(error.count, 3)
+
+        # A resolved error is not reopened, the next occurrence is a new row
+        error.resolve()
+        self.buffer.submit(self.event('Order 3 failed'))
+        self.buffer.flush()
+        self.assertEqual(ErrorLog.objects.filter(is_resolved=False).count(), 1)
+        self.assertEqual(ErrorLog.objects.count(), 2)
+
+    def test_full_buffer_drops_new_fingerprints(self):
+        self.buffer.max_pending = 1
+        self.assertTrue(self.buffer.submit(self.event('Order 1 failed')))
+        self.assertFalse(self.buffer.submit(self.event('Template missing'), count=3))
+        # Known fingerprints are still counted
+        self.assertTrue(self.buffer.submit(self.event('Order 2 failed')))
+        self.assertEqual(self.buffer.dropped, 3)
+
+    def test_failed_writes_are_retried_then_dropped(self):
+        upsert = self.buffer._upsert
+        self.buffer.max_attempts = 2
+        self.buffer.submit(self.event('Order 1 failed'), count=2)
+
+        with mock.patch.object(self.buffer, '_upsert', side_effect=OperationalError('database is locked')):
+            self.buffer.flush()
+        self.assertFalse(ErrorLog.objects.exists())
+
+        # Retried with the occurrences queued in the meantime
+        self.buffer.submit(self.event('Order 2 failed'), count=3)
+        with mock.patch.object(self.buffer, '_upsert', side_effect=upsert) as retried:
+            self.assertEqual(self.buffer.flush(), 1)
+        retried.assert_called_once()
+        self.assertEqual(ErrorLog.objects.get().count, 5)
+        self.assertEqual(self.buffer.dropped, 0)
+
+        # A write that keeps failing is given up and counted as dropped
+        self.buffer.submit(self.event('Order 3 failed'), count=4)
+        with mock.patch.object(self.buffer, '_upsert', side_effect=OperationalError('database is locked')):
+            self.buffer.flush()
+            self.buffer.flush()
+        self.assertEqual(self.buffer.dropped, 4)
+        self.assertEqual(self.buffer.flush(), 0)
+
+
+class ErrorSamplerTests(SimpleTestCase):
+    def test_suppressed_occurrences_are_added_to_the_next_event(self):
+        sampler = ErrorSampler(policies={'5xx': {'rate': 0.001, 'burst': 2}})
+
+        counts = [sampler.admit(500, '/checkout/') for _ in range(5)]
+        self.assertEqual(counts, [1, 1, 0, 0, 0])
+
+        sampler._keys[(500, '/checkout/')]['bucket'].tokens = 1
+        self.assertEqual(sampler.admit(500, '/checkout/'), 4)
+
+    def test_paths_have_separate_buckets(self):
+        sampler = ErrorSampler(policies={'5xx': {'rate': 0.001, 'burst': 1}})
+
+        self.assertEqual(sampler.admit(500, '/a/'), 1)
+        self.assertEqual(sampler.admit(500, '/a/'), 0)
+        self.assertEqual(sampler.admit(500, '/b/'), 1)
+
+    def test_not_found_is_sampled(self):
+        sampler = ErrorSampler()
+        with mock.patch('monitoring.utils.random.random', return_value=0.5):
+            self.assertEqual(sampler.admit(404, '/missing/'), 0)
+            self.assertEqual(sampler.admit(500, '/broken/'), 1)
+
+
+class ErrorBatchSenderTests(SimpleTestCase):
+    def setUp(self):
+        self.sender = ErrorBatchSender(batch_url='http://admin.invalid/batch/', max_queue_size=2)
+        patcher = mock.patch.object(self.sender, '_ensure_worker')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_errors_are_aggregated(self):
+        for _ in range(3):
+            self.sender.enqueue('shop', {'error_type': '500', 'message': 'Boom'})
+        self.sender.enqueue('shop', {'error_type': '500', 'message': 'Other'})
+
+        self.assertEqual([event['count'] for event in self.sender._pending.values()], [3, 1])
+        self.assertFalse(self.sender.enqueue('shop', {'error_type': '500', 'message': 'Third'}))
+        self.assertEqual(self.sender.stats()['dropped'], 1)
+
+    def test_batch_is_posted_gzipped(self):
+        session = mock.Mock()
+        session.post.return_value.status_code = 202
+        batch = [{'platform': 'shop', 'message': 'Boom', 'count': 3}]
+
+        with mock.patch('monitoring.utils.get_session', return_value=session):
+            self.sender._send_batch(batch)
+
+        kwargs = session.post.call_args[1]
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(kwargs['data'])), batch)
+        self.assertEqual(self.sender.sent, 3)
+
+
+class AlertStateTests(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Shop', slug='shop', url='https://shop.example.com')
+        self.engine = AlertStateEngine(raise_after=2, clear_after=2, flap_window=10, flap_threshold=4)
+
+    def raise_downtime(self, engine=None):
+        return (engine or self.engine).raise_alert(self.platform, 'downtime', 'Ausfall', 'Offline', 'critical')
+
+    def test_condition_has_one_active_alert(self):
+        alert, created = self.raise_downtime()
+        self.assertTrue(created)
+
+        again, created = self.raise_downtime()
+        self.assertFalse(created)
+        self.assertEqual(again.id, alert.id)
+
+        # Another worker without local state finds the alert in the database
+        other, created = self.raise_downtime(AlertStateEngine())
+        self.assertFalse(created)
+        self.assertEqual(other.id, alert.id)
+        self.assertEqual(Alert.objects.count(), 1)
+
+    def test_cleared_condition_raises_a_new_alert(self):
+        alert, _ = self.raise_downtime()
+        self.assertEqual(self.engine.clear(self.platform, 'downtime'), 1)
+
+        alert.refresh_from_db()
+        self.assertEqual(alert.status, 'resolved')
+        new, created = self.raise_downtime()
+        self.assertTrue(created)
+        self.assertNotEqual(new.id, alert.id)
+
+    def test_downtime_hysteresis(self):
+        state = self.engine.observe_health(self.platform.id, 'offline')
+        self.assertFalse(self.engine.should_raise_downtime(state))
+        state = self.engine.observe_health(self.platform.id, 'offline')
+        self.assertTrue(self.engine.should_raise_downtime(state))
+
+        state = self.engine.observe_health(self.platform.id, 'online')
+        self.assertFalse(self.engine.should_clear_downtime(state))
+        state = self.engine.observe_health(self.platform.id, 'online')
+        self.assertTrue(self.engine.should_clear_downtime(state))
+
+    def test_flapping_platform_raises_at_once_and_stays_open(self):
+        for status in ('online', 'offline', 'online', 'offline', 'online'):
+            state = self.engine.observe_health(self.platform.id, status)
+        self.assertTrue(state['flapping'])
+        self.assertFalse(self.engine.should_clear_downtime(self.engine.observe_health(self.platform.id, 'online')))
+
+        state = self.engine.observe_health(self.platform.id, 'offline')
+        self.assertEqual(state['failures'], 1)
+        self.assertTrue(self.engine.should_raise_downtime(state))
+
+
+class SchedulerTests(TestCase):
+    def setUp(self):
+        self.job = mock.Mock(return_value='ok')
+        self.scheduler = Scheduler(jobs={'job': {'func': self.job, 'interval': 60, 'lock_timeout': 60}}, jitter=0)
+        self.scheduler.initialize()
+
+    def other_scheduler(self):
+        other = Scheduler(jobs=self.scheduler.jobs, jitter=0)
+        other.owner = 'other-host:1'
+        return other
+
+    def test_job_is_locked_against_other_schedulers(self):
+        self.assertTrue(self.scheduler.acquire('job'))
+
+        other = self.other_scheduler()
+        self.assertFalse(other.acquire('job'))
+        self.assertEqual(other.run_job('job')['status'], 'locked')
+        self.job.assert_not_called()
+
+    def test_expired_lock_is_taken_over(self):
+        self.assertTrue(self.scheduler.acquire('job'))
+        SchedulerJob.objects.filter(name='job').update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertTrue(self.other_scheduler().acquire('job'))
+        self.assertEqual(SchedulerJob.objects.get(name='job').locked_by, 'other-host:1')
+
+    def test_run_records_and_releases(self):
+        result = self.scheduler.run_job('job')
+
+        self.assertEqual(result['status'], 'success')
+        job = SchedulerJob.objects.get(name='job')
+        self.assertEqual(job.run_count, 1)
+        self.assertEqual(job.last_status, 'success')
+        self.assertIsNone(job.locked_until)
+        self.assertTrue(self.other_scheduler().acquire('job'))
+
+    def test_failed_run_is_recorded(self):
+        self.job.side_effect = RuntimeError('database gone')
+
+        self.assertEqual(self.scheduler.run_job('job')['status'], 'failed')
+        job = SchedulerJob.objects.get(name='job')
+        self.assertEqual((job.failure_count, job.last_error), (1, 'database gone'))
+
+    def test_due_jobs_run_once_per_interval(self):
+        # run_job itself is covered above; the pool threads cannot see the test transaction
+        with mock.patch.object(self.scheduler, 'run_job') as run_job:
+            self.assertEqual(self.scheduler.run_pending(wait=True), ['job'])
+            self.assertEqual(self.scheduler.run_pending(wait=True), [])
+        run_job.assert_called_once_with('job')
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.platform = Platform.objects.create(name='Shop', slug='shop', url='https://shop.example.com')
+        self.start = timezone.now().replace(second=0, microsecond=0) - timedelta(minutes=10)
+
+    def check(self, offset, status='online', response_time=100.0):
+        health = SystemHealth.objects.create(platform=self.platform, status=status, response_time=response_time)
+        SystemHealth.objects.filter(id=health.id).update(checked_at=self.start + timedelta(seconds=offset))
+
+    def test_minute_buckets(self):
+        for i, response_time in enumerate([100, 200, 300, 400]):
+            self.check(i * 10, response_time=response_time)
+        self.check(70, status='offline', response_time=None)
+
+        self.assertEqual(rollup_health('1m', until=self.start + timedelta(minutes=2)), 2)
+
+        first, second = HealthRollup.objects.filter(resolution='1m').order_by('bucket_start')
+        self.assertEqual(first.bucket_start, self.start.astimezone(dt_timezone.utc))
+        self.assertEqual((first.count, first.online_count), (4, 4))
+        self.assertEqual((first.min_response_time, first.avg_response_time, first.max_response_time), (100, 250, 400))
+        self.assertEqual((first.p50_response_time, first.p95_response_time), (200, 400))
+        self.assertEqual((second.count, second.online_count, second.avg_response_time), (1, 0, None))
+
+    def test_rollup_resumes_after_the_watermark(self):
+        self.check(0)
+        rollup_health('1m', until=self.start + timedelta(minutes=1))
+        self.check(65)
+
+        self.assertEqual(rollup_health('1m', until=self.start + timedelta(minutes=2)), 1)
+        self.assertEqual(HealthRollup.objects.filter(resolution='1m').count(), 2)
+
+    def test_series_fills_the_tail_from_raw_checks(self):
+        self.check(0, response_time=100)
+        rollup_health('1m', until=self.start + timedelta(minutes=1))
+        self.check(65, response_time=300)
+
+        series = get_health_series(self.platform, self.start, self.start + timedelta(minutes=2), resolution='1m')
+        self.assertEqual([bucket['count'] for bucket in series['buckets']], [1, 1])
+        self.assertEqual(series['buckets'][1]['avg_response_time'], 300)
+
+
+def listing_item(name, directory=False, size=0, mtime=0):
+    mode = (stat.S_IFDIR if directory else stat.S_IFREG) | 0o755
+    return SimpleNamespace(filename=name, st_size=size, st_mtime=mtime, st_mode=mode, st_uid=0, st_gid=0)
+
+
+class ListingPageTests(SimpleTestCase):
+    def setUp(self):
+        self.entries = [
+            {'name': name, 'type': kind, 'size': size, 'modified': '2026-01-01 00:00:00'}
+            for name, kind, size in [
+                ('logs', 'directory', 0), ('b.txt', 'file', 30), ('A.txt', 'file', 10),
+                ('conf', 'directory', 0), ('c.txt', 'file', 20), ('backup.tar', 'file', 30),
+            ]
+        ]
+
+    def pages(self, **kwargs):
+        names, cursor = [], None
+        while True:
+            page = select_page(self.entries, cursor=cursor, limit=2, **kwargs)
+            names.extend(entry['name'] for entry in page['items'])
+            cursor = page['next_cursor']
+            if not cursor:
+                return names, page['total_items']
+
+    def test_cursor_pages_through_in_order(self):
+        names, total = self.pages()
+        self.assertEqual(names, ['conf', 'logs', 'A.txt', 'b.txt', 'backup.tar', 'c.txt'])
+        self.assertEqual(total, 6)
+
+    def test_descending_size_breaks_ties_by_name(self):
+        names, _ = self.pages(sort='size', order='desc')
+        self.assertEqual(names, ['logs', 'conf', 'backup.tar', 'b.txt', 'c.txt', 'A.txt'])
+
+    def test_prefix(self):
+        names, total = self.pages(prefix='B')
+        self.assertEqual((names, total), (['b.txt', 'backup.tar'], 2))
+
+    def test_pages_stay_consistent_when_entries_are_added(self):
+        first = select_page(self.entries, limit=3)
+        self.entries.append({'name': 'aaa', 'type': 'directory', 'size': 0, 'modified': ''})
+        second = select_page(self.entries, cursor=first['next_cursor'], limit=3)
+
+        self.assertEqual([entry['name'] for entry in second['items']], ['b.txt', 'backup.tar', 'c.txt'])
+
+    def test_invalid_cursors(self):
+        cursor = select_page(self.entries, limit=2)['next_cursor']
+        with self.assertRaisesMessage(ValueError, 'Cursor does not match sort order'):
+            select_page(self.entries, sort='size', cursor=cursor)
+        with self.assertRaisesMessage(ValueError, 'Invalid cursor'):
+            select_page(self.entries, cursor='not-a-cursor')
+
+
+class DirectoryListingCacheTests(SimpleTestCase):
+    target = ('example.com', 22, 'deploy')
+
+    def setUp(self):
+        self.sftp = mock.Mock()
+        self.sftp.stat.return_value = SimpleNamespace(st_mtime=1000)
+        self.sftp.listdir_attr.return_value = [listing_item('b.txt'), listing_item('logs', directory=True)]
+        self.cache = DirectoryListingCache(ttl=0)
+
+    def test_unchanged_directory_is_served_from_cache(self):
+        items, cached = self.cache.list(self.sftp, self.target, '/var/www')
+        self.assertEqual(([item['name'] for item in items], cached), (['logs', 'b.txt'], False))
+
+        items, cached = self.cache.list(self.sftp, self.target, '/var/www/')
+        self.assertTrue(cached)
+        self.assertEqual(self.sftp.listdir_attr.call_count, 1)
+
+    def test_changed_mtime_lists_again(self):
+        self.cache.list(self.sftp, self.target, '/var/www')
+        self.sftp.stat.return_value = SimpleNamespace(st_mtime=1001)
+
+        self.assertFalse(self.cache.list(self.sftp, self.target, '/var/www')[1])
+        self.assertEqual(self.sftp.listdir_attr.call_count, 2)
+
+    def test_invalidate_entry_drops_parent_listing(self):
+        self.cache.list(self.sftp, self.target, '/var/www')
+        self.cache.invalidate_entry(self.target, '/var/www/b.txt')
+
+        self.assertFalse(self.cache.list(self.sftp, self.target, '/var/www')[1])
+
+    def test_ttl_skips_the_stat(self):
+        cache = DirectoryListingCache(ttl=60)
+        cache.list(self.sftp, self.target, '/var/www')
+
+        self.assertEqual(cache.fresh(self.target, '/var/www')[0]['name'], 'logs')
+        self.assertTrue(cache.list(self.sftp, self.target, '/var/www')[1])
+        self.assertEqual(self.sftp.stat.call_count, 1)
+
+
+@override_settings(METRICS_TOKEN='s3cret')
+class MetricsAccessTests(TestCase):
+    def test_local_address_without_token_is_forbidden(self):
+        # Behind nginx every request comes from 127.0.0.1
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response.status_code, 403)
+
+    def test_wrong_token_is_forbidden(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+
+    def test_token_and_superuser_are_allowed(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_login(User.objects.create_superuser('root', password='secret'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
@@ -0,0 +1,243 @@
+"""
+Chunked SFTP transfers
+Pipelined reads and writes with constant memory, HTTP byte ranges and
+SHA-256 verification for the server file API
+"""
+
+import hashlib
+import logging
+import re
+from typing import Iterable, Iterator, Optional, Tuple
+from django.conf import settings
+
+logger = logging.getLogger('monitoring')
+
+# paramiko requests at most 32 KiB per SFTP read
+CHUNK_SIZE = getattr(settings, 'SFTP_CHUNK_SIZE', 32768)
+
+# Read-ahead of pipelined reads; bounds the memory of a transfer
+TRANSFER_WINDOW = getattr(settings, 'SFTP_TRANSFER_WINDOW', 4 * 1024 * 1024)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """Requested byte range lies outside the file"""
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Byte range of a Range header
+
+    Only single ranges are supported; multiple ranges and malformed
+    headers are ignored (the whole file is sent, as RFC 9110 allows).
+
+    Args:
+        header: Value of the Range header
+        size: File size
+
+    Returns:
+        Tuple of (first, last) byte, inclusive, or None for the whole file
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise RangeNotSatisfiable()
+    return first, last
+
+
+def iter_range(sftp, path: str, first: int = 0, last: Optional[int] = None,
+               chunk_size: int = CHUNK_SIZE, window: int = None) -> Iterator[bytes]:
+    """
+    Read a byte range in pipelined windows
+
+    The read requests of one window (SFTP_TRANSFER_WINDOW, 4 MiB) are sent
+    together with readv(), so the transfer is not limited to one chunk per
+    round-trip. The next window is only requested after the consumer has
+    taken the previous one, so at most one window is buffered even when a
+    slow HTTP client downloads a multi-GB file.
+
+    Args:
+        sftp: SFTP client
+        path: Remote file
+        first: First byte
+        last: Last byte, inclusive (None for end of file)
+        chunk_size: Size of the yielded chunks (one SFTP read each)
+        window: Bytes requested at once (default SFTP_TRANSFER_WINDOW)
+    """
+    window = window or TRANSFER_WINDOW
+
+    with sftp.open(path, 'rb') as remote:
+        if last is None:
+            last = remote.stat().st_size - 1
+
+        position = first
+        while position <= last:
+            end = min(position + window, last + 1)
+            chunks = [(offset, min(chunk_size, end - offset)) for offset in range(position, end, chunk_size)]
+            for data in remote.readv(chunks):
+                if not data:
+                    return
+                yield data
+            position = end
+
+
+def read_range(sftp, path: str, offset: int, length: int) -> Tuple[bytes, int]:
+    """
+    Read a window of a file
+
+    Returns:
+        Tuple of (data, file size); data is shorter at the end of the file
+    """
+    size = sftp.stat(path).st_size
+    last = min(offset + length, size) - 1
+    if offset >= size or last < offset:
+        return b'', size
+    return b''.join(iter_range(sftp, path, offset, last)), size
+
+
+def tail_lines(sftp, path: str, lines: int, max_bytes: int,
+               block_size: int = 65536) -> Tuple[bytes, int, int]:
+    """
+    Last lines of a file, read backwards in blocks
+
+    Only the blocks that contain the requested lines are transferred, so
+    the tail of a multi-GB log costs about as much as the lines themselves.
+    A newline at the end of the file ends the last line. If the lines do
+    not fit into max_bytes, the window starts in the middle of a line.
+
+    Args:
+        sftp: SFTP client
+        path: Remote file
+        lines: Number of lines
+        max_bytes: Largest window to read
+        block_size: Bytes per backward read
+
+    Returns:
+        Tuple of (data, offset of its first byte, file size)
+    """
+    with sftp.open(path, 'rb') as remote:
+        size = remote.stat().st_size
+        position = size
+        blocks = []
+        newlines = 0
+
+        while position > 0 and size - position < max_bytes and newlines <= lines:
+            length = min(block_size, position, max_bytes - (size - position))
+            position -= length
+            # readv pipelines the requests of one block
+            block = b''.join(remote.readv([(position, length)]))
+            blocks.append(block)
+            newlines += block.count(b'\n')
+
+    data = b''.join(reversed(blocks))
+    cut = len(data) - 1 if data.endswith(b'\n') else len(data)
+    for _ in range(lines):
+        cut = data.rfind(b'\n', 0, cut)
+        if cut < 0:
+            return data, position, size
+    return data[cut + 1:], position + cut + 1, size
+
+
+def head_lines(sftp, path: str, lines: int, max_bytes: int,
+               block_size: int = 65536) -> Tuple[bytes, int]:
+    """
+    First lines of a file, read forwards in blocks
+
+    Returns:
+        Tuple of (data, file size)
+    """
+    with sftp.open(path, 'rb') as remote:
+        size = remote.stat().st_size
+        blocks = []
+        position = 0
+        newlines = 0
+
+        while position < min(size, max_bytes) and newlines < lines:
+            length = min(block_size, size - position, max_bytes - position)
+            block = b''.join(remote.readv([(position, length)]))
+            blocks.append(block)
+            position += length
+            newlines += block.count(b'\n')
+
+    data = b''.join(blocks)
+    cut = -1
+    for _ in range(lines):
+        cut = data.find(b'\n', cut + 1)
+        if cut < 0:
+            return data, size
+    return data[:cut + 1], size
+
+
+def write_chunks(sftp, path: str, chunks: Iterable[bytes], offset: int = 0) -> Tuple[int, str]:
+    """
+    Write chunks with pipelined requests
+
+    With pipelining the write requests are not acknowledged one by one;
+    errors surface at the latest when the file is closed.
+
+    Args:
+        sftp: SFTP client
+        path: Remote file; truncated if offset is 0
+        chunks: Data to write
+        offset: Position of the first chunk (resumed uploads)
+
+    Returns:
+        Tuple of (bytes written, SHA-256 of the written bytes)
+    """
+    digest = hashlib.sha256()
+    written = 0
+
+    with sftp.open(path, 'r+b' if offset else 'wb') as remote:
+        remote.set_pipelined(True)
+        if offset:
+            remote.seek(offset)
+        for chunk in chunks:
+            remote.write(chunk)
+            digest.update(chunk)
+            written += len(chunk)
+
+    return written, digest.hexdigest()
+
+
+def remote_sha256(sftp, path: str) -> str:
+    """SHA-256 of a remote file, read in pipelined windows"""
+    digest = hashlib.sha256()
+    for chunk in iter_range(sftp, path):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def replace(sftp, source: str, target: str):
+    """Rename over an existing file (POSIX rename if the server supports it)"""
+    try:
+        sftp.posix_rename(source, target)
+    except IOError:
+        # Server without posix-rename@openssh.com
+        try:
+            sftp.remove(target)
+        except FileNotFoundError:
+            pass
+        sftp.rename(source, target)
+
+
+def read_request(request, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Body of a request in chunks, without loading it into memory"""
+    while True:
+        chunk = request.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
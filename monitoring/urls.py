@@ -2,7 +2,7 @@ from django.urls import path
 from . import views
 from .server_api import (
     directory_list_api, file_content_api, file_edit_api, 
-    file_delete_api, file_upload_api
+    file_delete_api, file_upload_api, file_download_api, file_view_api
 )
 from . import debug_views
 from .debug_api import (
@@ -22,6 +22,7 @@ urlpatterns = [
     # Errors
     path('errors/', views.errors_list, name='errors_list'),
     path('webhook/error/', views.error_webhook, name='error_webhook'),
+    path('webhook/error/batch/', views.error_batch_webhook, name='error_batch_webhook'),
     
     # Alerts
     path('alerts/', views.alerts_list, name='alerts_list'),
@@ -62,6 +63,8 @@ urlpatterns = [
     path('api/server/file/edit/', file_edit_api, name='file_edit_api'),
     path('api/server/file/delete/', file_delete_api, name='file_delete_api'),
     path('api/server/file/upload/', file_upload_api, name='file_upload_api'),
+    path('api/server/file/download/', file_download_api, name='file_download_api'),
+    path('api/server/file/view/', file_view_api, name='file_view_api'),
     
     # Debug endpoints
     path('debug/config/', debug_views.debug_config, name='debug_config'),
@@ -1,11 +1,35 @@
 import requests
+import gzip
 import json
 import logging
+import random
+import threading
+import time
+from collections import OrderedDict
 from django.conf import settings
+from .http_client import get_session
 
 logger = logging.getLogger('monitoring')
 
 
+def build_error_payload(platform_slug, error_data):
+    """Build the webhook payload for one error"""
+    return {
+        'platform': platform_slug,
+        'error_type': error_data.get('error_type', 'other'),
+        'severity': error_data.get('severity', 'medium'),
+        'message': error_data.get('message', ''),
+        'stack_trace': error_data.get('stack_trace', ''),
+        'url_path': error_data.get('url_path', ''),
+        'user_agent': error_data.get('user_agent', ''),
+        'ip_address': error_data.get('ip_address'),
+        'user_id': error_data.get('user_id', ''),
+        'request_data': error_data.get('request_data', {}),
+        'environment_data': error_data.get('environment_data', {}),
+        'count': error_data.get('count', 1),
+    }
+
+
 def send_error_to_admin(platform_slug, error_data):
     """
     Send error data to the admin dashboard
@@ -20,29 +44,17 @@ def send_error_to_admin(platform_slug, error_data):
                              'http://127.0.0.1:8003/monitoring/webhook/error/')
         
         # Prepare payload
-        payload = {
-            'platform': platform_slug,
-            'error_type': error_data.get('error_type', 'other'),
-            'severity': error_data.get('severity', 'medium'),
-            'message': error_data.get('message', ''),
-            'stack_trace': error_data.get('stack_trace', ''),
-            'url_path': error_data.get('url_path', ''),
-            'user_agent': error_data.get('user_agent', ''),
-            'ip_address': error_data.get('ip_address'),
-            'user_id': error_data.get('user_id', ''),
-            'request_data': error_data.get('request_data', {}),
-            'environment_data': error_data.get('environment_data', {}),
-        }
+        payload = build_error_payload(platform_slug, error_data)
         
         # Send to admin dashboard
-        response = requests.post(
+        response = get_session('admin').post(
             webhook_url,
             json=payload,
             timeout=5,
             headers={'Content-Type': 'application/json'}
         )
         
-        if response.status_code == 200:
+        if response.status_code in [200, 202]:
             logger.info(f'Error sent to admin dashboard: {platform_slug}')
             return True
         else:
@@ -57,14 +69,261 @@ def send_error_to_admin(platform_slug, error_data):
         return False
 
 
+class ErrorBatchSender:
+    """
+    Sends errors to the admin dashboard in batches from a background thread
+    
+    Identical events (same platform, type and message) are aggregated into
+    one event with a count. Batches are posted gzip-compressed to the batch
+    webhook when they are full or the flush interval has passed. The number
+    of distinct pending events is bounded; overflow is dropped and counted,
+    so the calling request never waits for the admin dashboard.
+    """
+    
+    def __init__(self, batch_url=None, batch_size=None, flush_interval=None, max_queue_size=None):
+        self.batch_url = batch_url or getattr(
+            settings, 'ADMIN_DASHBOARD_BATCH_WEBHOOK_URL',
+            'http://127.0.0.1:8003/monitoring/webhook/error/batch/'
+        )
+        self.batch_size = batch_size or getattr(settings, 'ADMIN_ERROR_BATCH_SIZE', 100)
+        self.flush_interval = flush_interval or getattr(settings, 'ADMIN_ERROR_FLUSH_INTERVAL', 5)
+        self.max_pending = max_queue_size or getattr(settings, 'ADMIN_ERROR_QUEUE_SIZE', 1000)
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+        self._worker = None
+    
+    def enqueue(self, platform_slug, error_data, count=1):
+        """
+        Queue an error without blocking
+        
+        Args:
+            platform_slug (str): Platform identifier
+            error_data (dict): Error information
+            count (int): Number of occurrences this event represents
+        
+        Returns:
+            True if queued, False if the queue was full and the event dropped
+        """
+        payload = build_error_payload(platform_slug, error_data)
+        key = (platform_slug, payload['error_type'], payload['message'])
+        
+        with self._condition:
+            existing = self._pending.get(key)
+            if existing:
+                existing['count'] += count
+            elif len(self._pending) >= self.max_pending:
+                dropped_before = self.dropped
+                self.dropped += count
+                if dropped_before == 0 or dropped_before // 100 != self.dropped // 100:
+                    logger.warning(f'Admin error queue full, {self.dropped} events dropped so far')
+                return False
+            else:
+                payload['count'] = count
+                self._pending[key] = payload
+            self._condition.notify()
+        
+        self._ensure_worker()
+        return True
+    
+    def stats(self):
+        """Counters for monitoring the sender itself"""
+        return {
+            'queued': len(self._pending),
+            'sent': self.sent,
+            'failed': self.failed,
+            'dropped': self.dropped,
+        }
+    
+    def _ensure_worker(self):
+        """Start the sender thread on first use"""
+        if self._worker and self._worker.is_alive():
+            return
+        
+        with self._condition:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='admin-error-sender', daemon=True)
+            self._worker.start()
+    
+    def _run(self):
+        """Collect events into batches and send them"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                # Give the batch time to fill up before sending
+                self._condition.wait_for(
+                    lambda: len(self._pending) >= self.batch_size,
+                    timeout=self.flush_interval
+                )
+                events = list(self._pending.values())
+                self._pending = OrderedDict()
+            
+            for i in range(0, len(events), self.batch_size):
+                self._send_batch(events[i:i + self.batch_size])
+    
+    def _send_batch(self, batch):
+        """Post one gzip-compressed batch"""
+        events = sum(event['count'] for event in batch)
+        
+        try:
+            body = gzip.compress(json.dumps(batch).encode('utf-8'))
+            response = get_session('admin').post(
+                self.batch_url,
+                data=body,
+                timeout=10,
+                headers={
+                    'Content-Type': 'application/json',
+                    'Content-Encoding': 'gzip',
+                }
+            )
+            
+            if response.status_code in [200, 202]:
+                self.sent += events
+            else:
+                self.failed += events
+                logger.warning(f'Failed to send error batch to admin dashboard: {response.status_code}')
+                
+        except Exception as e:
+            self.failed += events
+            logger.error(f'Error sending batch to admin dashboard: {e}')
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+    
+    Refills at `rate` tokens per second up to `capacity`.
+    """
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def consume(self, tokens=1):
+        """Take tokens from the bucket; returns False if not enough are left"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+
+class ErrorSampler:
+    """
+    Decides which error responses are reported
+    
+    Each status class (404, other 4xx, 5xx) has its own sampling rate and
+    token-bucket caps, one per (status, path) and one for the whole class.
+    Suppressed occurrences are remembered per (status, path) and added to
+    the count of the next event that gets through.
+    """
+    
+    DEFAULT_POLICIES = {
+        '404': {'sample_rate': 0.1, 'rate': 0.2, 'burst': 5, 'class_rate': 2.0, 'class_burst': 20},
+        '4xx': {'sample_rate': 0.5, 'rate': 0.5, 'burst': 10, 'class_rate': 5.0, 'class_burst': 50},
+        '5xx': {'sample_rate': 1.0, 'rate': 2.0, 'burst': 20, 'class_rate': 20.0, 'class_burst': 200},
+    }
+    
+    def __init__(self, policies=None, max_keys=1000):
+        self.policies = {
+            status_class: {**policy, **(policies or {}).get(status_class, {})}
+            for status_class, policy in self.DEFAULT_POLICIES.items()
+        }
+        self.max_keys = max_keys
+        self._keys = OrderedDict()
+        self._class_buckets = {
+            status_class: TokenBucket(policy['class_rate'], policy['class_burst'])
+            for status_class, policy in self.policies.items()
+        }
+        self._lock = threading.Lock()
+    
+    def status_class(self, status_code):
+        """Map a status code to its policy"""
+        if status_code >= 500:
+            return '5xx'
+        if status_code == 404:
+            return '404'
+        return '4xx'
+    
+    def admit(self, status_code, path):
+        """
+        Check whether an error response should be reported
+        
+        Returns:
+            Number of occurrences to report (0 if suppressed)
+        """
+        status_class = self.status_class(status_code)
+        policy = self.policies[status_class]
+        key = (status_code, path)
+        
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                state = {'bucket': TokenBucket(policy['rate'], policy['burst']), 'suppressed': 0}
+                self._keys[key] = state
+                if len(self._keys) > self.max_keys:
+                    self._keys.popitem(last=False)
+            else:
+                self._keys.move_to_end(key)
+            
+            admitted = (
+                random.random() < policy['sample_rate']
+                and state['bucket'].consume()
+                and self._class_buckets[status_class].consume()
+            )
+            
+            if not admitted:
+                state['suppressed'] += 1
+                return 0
+            
+            count = 1 + state['suppressed']
+            state['suppressed'] = 0
+            return count
+
+
+_batch_sender = None
+_batch_sender_lock = threading.Lock()
+
+
+def get_batch_sender():
+    """Get the process-wide batch sender"""
+    global _batch_sender
+    
+    if _batch_sender is None:
+        with _batch_sender_lock:
+            if _batch_sender is None:
+                _batch_sender = ErrorBatchSender()
+    return _batch_sender
+
+
+def report_error(platform_slug, error_data, batch=False, count=1):
+    """Send an error immediately or hand it to the batch sender"""
+    if batch:
+        return get_batch_sender().enqueue(platform_slug, error_data, count=count)
+    return send_error_to_admin(platform_slug, {**error_data, 'count': count})
+
+
 class AdminErrorHandler(logging.Handler):
     """
     Custom logging handler that sends errors to admin dashboard
+    
+    With batch=True, records are queued and sent by a background thread.
     """
     
-    def __init__(self, platform_slug='main'):
+    def __init__(self, platform_slug='main', batch=False):
         super().__init__()
         self.platform_slug = platform_slug
+        self.batch = batch
     
     def emit(self, record):
         """Send log record to admin dashboard"""
@@ -106,7 +365,7 @@ class AdminErrorHandler(logging.Handler):
                         error_data['error_type'] = '403'
             
             # Send to admin dashboard
-            send_error_to_admin(self.platform_slug, error_data)
+            report_error(self.platform_slug, error_data, batch=self.batch)
             
         except Exception:
             # Don't let logging errors break the application
@@ -148,22 +407,31 @@ def create_manual_error(platform_slug, error_type, message, severity='medium', *
 class AdminErrorTrackingMiddleware:
     """
     Middleware to automatically track errors in Django applications
+    
+    Error responses are sampled and rate-capped per status class and path
+    (see ErrorSampler, configurable via ADMIN_ERROR_SAMPLING) and handed to
+    the background batch sender. Set ADMIN_ERROR_TRACKING_MODE = 'sync' to
+    post each error inside the request instead.
     """
     
     def __init__(self, get_response):
         self.get_response = get_response
         self.platform_slug = getattr(settings, 'PLATFORM_SLUG', 'main')
+        self.batch = getattr(settings, 'ADMIN_ERROR_TRACKING_MODE', 'batch') == 'batch'
+        self.sampler = ErrorSampler(getattr(settings, 'ADMIN_ERROR_SAMPLING', None))
     
     def __call__(self, request):
         response = self.get_response(request)
         
         # Track 4xx and 5xx errors
         if response.status_code >= 400:
-            self.track_error(request, response)
+            count = self.sampler.admit(response.status_code, request.path)
+            if count:
+                self.track_error(request, response, count)
         
         return response
     
-    def track_error(self, request, response):
+    def track_error(self, request, response, count=1):
         """Track error response"""
         try:
             # Determine error type and severity
@@ -200,8 +468,8 @@ class AdminErrorTrackingMiddleware:
                 }
             }
             
-            # Send to admin dashboard (async to avoid blocking)
-            send_error_to_admin(self.platform_slug, error_data)
+            # Send to admin dashboard; count includes the suppressed occurrences
+            report_error(self.platform_slug, error_data, batch=self.batch, count=count)
             
         except Exception as e:
             # Log the error but don't break the response
@@ -233,7 +501,7 @@ class AdminErrorTrackingMiddleware:
                 }
             }
             
-            send_error_to_admin(self.platform_slug, error_data)
+            report_error(self.platform_slug, error_data, batch=self.batch)
             
         except Exception as e:
             logger.error(f'Exception tracking failed: {e}')
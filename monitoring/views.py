@@ -1,13 +1,12 @@
 import json
 import time
-import requests
 import sys
 import os
 from datetime import datetime, timedelta
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.utils import timezone
-from django.db.models import Q, Count, Avg
+from django.db.models import Q, Count
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
@@ -22,10 +21,13 @@ except ImportError:
     Customer = None
 
 from .models import (
-    Platform, SystemHealth, ErrorLog, Alert, 
+    Platform, ErrorLog, Alert, 
     PerformanceMetric, MonitoringSettings,
     FileOperation, SecurityLog, ServerPath
 )
+from .queries import get_customer_stats
+from .summary import get_platform_summaries
+from .rollups import get_health_series, summarize_series
 import logging
 
 logger = logging.getLogger('monitoring')
@@ -35,7 +37,7 @@ logger = logging.getLogger('monitoring')
 def dashboard_home(request):
     """Main dashboard overview"""
     # Get all platforms with latest health status, grouped by environment
-    platforms = Platform.objects.filter(is_active=True).prefetch_related('health_checks').order_by('environment', 'name')
+    platforms = Platform.objects.filter(is_active=True).order_by('environment', 'name')
     
     # Group platforms by environment
     platform_groups = {
@@ -43,30 +45,15 @@ def dashboard_home(request):
         'live': []
     }
     
-    for platform in platforms:
-        latest_health = platform.health_checks.first()
-        
-        # Get error count in last 24h
-        last_24h = timezone.now() - timedelta(hours=24)
-        error_count = platform.errors.filter(
-            last_seen__gte=last_24h,
-            is_resolved=False
-        ).count()
-        
-        # Get active alerts
-        active_alerts = platform.alerts.filter(status='active').count()
-        
-        platform_info = {
-            'platform': platform,
-            'health': latest_health,
-            'error_count_24h': error_count,
-            'active_alerts': active_alerts,
-            'status_class': get_status_class(latest_health.status if latest_health else 'unknown')
-        }
+    platform_overview = get_platform_summaries(platforms)
+    
+    for platform_info in platform_overview:
+        latest_health = platform_info['health']
+        platform_info['status_class'] = get_status_class(latest_health.status if latest_health else 'unknown')
         
         # Add to appropriate environment group
-        if platform.environment in platform_groups:
-            platform_groups[platform.environment].append(platform_info)
+        if platform_info['platform'].environment in platform_groups:
+            platform_groups[platform_info['platform'].environment].append(platform_info)
     
     # Create flat list for backwards compatibility
     platform_status = []
@@ -84,7 +71,7 @@ def dashboard_home(request):
     ).select_related('platform').order_by('-created_at')[:5]
     
     # System overview stats
-    total_platforms = platforms.count()
+    total_platforms = len(platform_overview)
     online_platforms = sum(1 for p in platform_status if p['health'] and p['health'].status == 'online')
     total_errors_24h = sum(p['error_count_24h'] for p in platform_status)
     total_active_alerts = sum(p['active_alerts'] for p in platform_status)
@@ -108,16 +95,7 @@ def dashboard_home(request):
             }
 
     # User group statistics for dashboard
-    user_group_stats = {
-        'total_customers': Customer.objects.count(),
-        'active_customers': Customer.objects.filter(is_active=True).count(),
-        'super_admins': Customer.objects.filter(user_group='super_admin').count(),
-        'beta_users': Customer.objects.filter(user_group='beta_user').count(),
-        'regular_users': Customer.objects.filter(user_group='user').count(),
-        'new_registrations_24h': Customer.objects.filter(
-            created_at__gte=timezone.now() - timedelta(hours=24)
-        ).count(),
-    }
+    user_group_stats = get_customer_stats(Customer)
 
     context = {
         'platform_status': platform_status,
@@ -140,139 +118,52 @@ def dashboard_home(request):
 
 
 def health_check_api(request):
-    """API endpoint for real-time health status"""
-    platforms = Platform.objects.filter(is_active=True)
+    """
+    API endpoint for real-time health status
+
+    Serves the cached health snapshot; ?force=1 runs live probes instead.
+    """
+    from .health_checks import health_engine, health_snapshot
+    
+    force = request.GET.get('force') in ['1', 'true']
+    if force:
+        results = health_engine.run_round()
+        for platform, health_status in results:
+            health_status.update({'age_seconds': 0, 'stale': False})
+    else:
+        results = health_snapshot.get()
     
     platform_data = []
-    for platform in platforms:
-        # Perform health check
-        health_status = perform_health_check(platform)
-        
+    for platform, health_status in results:
         platform_data.append({
             'id': platform.id,
             'name': platform.name,
             'status': health_status['status'],
             'response_time': health_status['response_time'],
+            'timings': health_status.get('timings', {}),
             'last_checked': health_status['checked_at'].isoformat() if health_status['checked_at'] else None,
             'error_message': health_status.get('error_message', ''),
+            'age_seconds': health_status['age_seconds'],
+            'stale': health_status['stale'],
         })
     
+    ages = [p['age_seconds'] for p in platform_data if p['age_seconds'] is not None]
+    
     return JsonResponse({
         'platforms': platform_data,
+        'source': 'live' if force else 'snapshot',
+        'snapshot_age': max(ages) if ages else None,
+        'snapshot_ttl': health_snapshot.ttl,
+        'refreshing': False if force else health_snapshot.is_refreshing(),
         'timestamp': timezone.now().isoformat()
     })
 
 
 def perform_health_check(platform):
     """Perform actual health check for a platform"""
-    from .alert_system import process_health_check_alert
+    from .health_checks import health_engine
     
-    start_time = time.time()
-    
-    try:
-        # Build health check URL
-        health_url = f"{platform.url.rstrip('/')}{platform.health_endpoint}"
-        
-        # Perform request with timeout
-        response = requests.get(health_url, timeout=10)
-        response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-        
-        # Determine status based on response
-        if response.status_code == 200:
-            status = 'online'
-            error_message = ''
-        elif response.status_code in [500, 502, 503, 504]:
-            status = 'error'
-            error_message = f'HTTP {response.status_code}'
-        else:
-            status = 'warning'
-            error_message = f'HTTP {response.status_code}'
-        
-        # Save health check result
-        health_check = SystemHealth.objects.create(
-            platform=platform,
-            status=status,
-            response_time=response_time,
-            status_code=response.status_code,
-            error_message=error_message
-        )
-        
-        # Process alerts for this health check
-        health_result = {
-            'status': status,
-            'response_time': response_time,
-            'status_code': response.status_code,
-            'error_message': error_message,
-            'checked_at': health_check.checked_at
-        }
-        
-        # Trigger alert processing
-        process_health_check_alert(platform, health_result)
-        
-        return health_result
-        
-    except requests.exceptions.Timeout:
-        response_time = (time.time() - start_time) * 1000
-        
-        SystemHealth.objects.create(
-            platform=platform,
-            status='offline',
-            response_time=response_time,
-            error_message='Connection timeout'
-        )
-        
-        # Process alerts for timeout
-        health_result = {
-            'status': 'offline',
-            'response_time': response_time,
-            'error_message': 'Connection timeout',
-            'checked_at': timezone.now()
-        }
-        
-        # Trigger alert processing
-        process_health_check_alert(platform, health_result)
-        
-        return health_result
-        
-    except requests.exceptions.ConnectionError:
-        response_time = (time.time() - start_time) * 1000
-        
-        SystemHealth.objects.create(
-            platform=platform,
-            status='offline',
-            response_time=response_time,
-            error_message='Connection failed'
-        )
-        
-        # Process alerts for connection error
-        health_result = {
-            'status': 'offline',
-            'response_time': response_time,
-            'error_message': 'Connection failed',
-            'checked_at': timezone.now()
-        }
-        
-        # Trigger alert processing
-        process_health_check_alert(platform, health_result)
-        
-        return health_result
-        
-    except Exception as e:
-        response_time = (time.time() - start_time) * 1000
-        
-        SystemHealth.objects.create(
-            platform=platform,
-            status='error',
-            response_time=response_time,
-            error_message=str(e)
-        )
-        
-        return {
-            'status': 'error',
-            'response_time': response_time,
-            'error_message': str(e),
-            'checked_at': timezone.now()
-        }
+    return health_engine.check_platform(platform)
 
 
 @login_required
@@ -352,31 +243,33 @@ def platform_detail(request, platform_id):
     # Recent errors
     recent_errors = platform.errors.filter(
         last_seen__gte=last_24h
-    ).order_by('-last_seen')[:20]
+    ).order_by('-last_seen')
     
     # Performance metrics (if available)
     performance_metrics = platform.metrics.order_by('-created_at')[:10]
     
-    # Calculate uptime for last 24h
-    total_checks = health_checks.count()
-    online_checks = health_checks.filter(status='online').count()
-    uptime_percentage = round((online_checks / total_checks * 100), 2) if total_checks > 0 else 0
-    
-    # Average response time
-    avg_response_time = health_checks.aggregate(
-        avg_time=Avg('response_time')
-    )['avg_time'] or 0
+    # Uptime and response times from the rollups; the range picks the resolution
+    try:
+        hours = int(request.GET.get('hours') or 24)
+    except ValueError:
+        return HttpResponseBadRequest('Ungültiger Zeitraum: hours muss eine ganze Zahl sein')
+    hours = max(1, min(hours, 24 * 365))
+    health_series = get_health_series(platform, timezone.now() - timedelta(hours=hours))
+    health_stats = summarize_series(health_series['buckets'])
     
     context = {
         'platform': platform,
         'health_checks': health_checks,
-        'recent_errors': recent_errors,
+        'health_series': health_series,
+        'recent_errors': recent_errors[:20],
         'performance_metrics': performance_metrics,
         'stats': {
-            'uptime_percentage': uptime_percentage,
-            'avg_response_time': round(avg_response_time, 2),
-            'total_checks_24h': total_checks,
+            'uptime_percentage': health_stats['uptime_percentage'],
+            'avg_response_time': health_stats['avg_response_time'],
+            'p95_response_time': health_stats['p95_response_time'],
+            'total_checks': health_stats['total_checks'],
             'error_count_24h': recent_errors.count(),
+            'range_hours': hours,
         }
     }
     
@@ -385,8 +278,12 @@ def platform_detail(request, platform_id):
 
 @csrf_exempt
 def error_webhook(request):
-    """Webhook endpoint for receiving errors from platforms"""
-    from .alert_system import process_error_alert
+    """
+    Webhook endpoint for receiving errors from platforms
+
+    Events are queued and written in batches; the response is 202 Accepted.
+    """
+    from .error_ingest import error_buffer
     
     if request.method != 'POST':
         return JsonResponse({'error': 'Only POST allowed'}, status=405)
@@ -395,63 +292,127 @@ def error_webhook(request):
         data = json.loads(request.body)
         
         # Get platform
-        platform_slug = data.get('platform')
-        platform = Platform.objects.get(slug=platform_slug)
+        platform_id = error_buffer.get_platform_id(data.get('platform'))
+        if not platform_id:
+            return JsonResponse({'error': 'Platform not found'}, status=404)
         
-        # Create or update error log
-        error_data = {
-            'platform': platform,
-            'error_type': data.get('error_type', 'other'),
-            'severity': data.get('severity', 'medium'),
-            'message': data.get('message', ''),
-            'stack_trace': data.get('stack_trace', ''),
-            'url_path': data.get('url_path', ''),
-            'user_agent': data.get('user_agent', ''),
-            'ip_address': data.get('ip_address'),
-            'user_id': data.get('user_id', ''),
-            'request_data': data.get('request_data', {}),
-            'environment_data': data.get('environment_data', {}),
-        }
+        if not error_buffer.submit(build_error_event(data, platform_id), count=get_event_count(data)):
+            logger.warning(f"Error buffer full, dropped error for {data.get('platform')}")
+            return JsonResponse({'error': 'Error buffer full'}, status=503)
         
-        # Check if similar error exists
-        existing_error = ErrorLog.objects.filter(
-            platform=platform,
-            error_type=error_data['error_type'],
-            message=error_data['message'],
-            is_resolved=False
-        ).first()
+        return JsonResponse({'status': 'accepted'}, status=202)
         
-        if existing_error:
-            # Update existing error
-            existing_error.count += 1
-            existing_error.last_seen = timezone.now()
-            existing_error.save()
-            error_log = existing_error
-            error_id = existing_error.id
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except Exception as e:
+        logger.error(f"Error webhook failed: {e}")
+        return JsonResponse({'error': 'Internal server error'}, status=500)
+
+
+@csrf_exempt
+def error_batch_webhook(request):
+    """
+    Webhook endpoint for receiving a batch of errors
+
+    Accepts a JSON array of error events (or {"platform": ..., "events": [...]}),
+    optionally gzip-compressed with Content-Encoding: gzip.
+    """
+    from .error_ingest import error_buffer
+    
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST allowed'}, status=405)
+    
+    try:
+        body = request.body
+        if request.META.get('HTTP_CONTENT_ENCODING', '').lower() == 'gzip':
+            body = decompress_gzip(body, getattr(settings, 'ERROR_BATCH_MAX_BYTES', 10 * 1024 * 1024))
+        
+        data = json.loads(body)
+        if isinstance(data, dict):
+            default_platform = data.get('platform')
+            events = data.get('events', [])
         else:
-            # Create new error
-            error_log = ErrorLog.objects.create(**error_data)
-            error_id = error_log.id
+            default_platform = None
+            events = data
+        
+        if not isinstance(events, list):
+            return JsonResponse({'error': 'Expected a list of events'}, status=400)
         
-        # Process alerts for this error
-        process_error_alert(error_log)
+        max_events = getattr(settings, 'ERROR_BATCH_MAX_EVENTS', 1000)
+        if len(events) > max_events:
+            return JsonResponse({'error': f'Too many events (max {max_events})'}, status=413)
+        
+        accepted = 0
+        rejected = 0
+        for event in events:
+            if not isinstance(event, dict):
+                rejected += 1
+                continue
+            
+            platform_id = error_buffer.get_platform_id(event.get('platform') or default_platform)
+            if platform_id and error_buffer.submit(build_error_event(event, platform_id), count=get_event_count(event)):
+                accepted += 1
+            else:
+                rejected += 1
         
-        logger.info(f"Error logged for {platform.name}: {error_data['message']}")
+        if rejected:
+            logger.warning(f"Error batch: {rejected} of {len(events)} events rejected")
         
         return JsonResponse({
-            'status': 'success',
-            'error_id': error_id
-        })
+            'status': 'accepted',
+            'accepted': accepted,
+            'rejected': rejected,
+        }, status=202)
         
-    except Platform.DoesNotExist:
-        return JsonResponse({'error': 'Platform not found'}, status=404)
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, UnicodeDecodeError):
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        logger.error(f"Error webhook failed: {e}")
+        logger.error(f"Error batch webhook failed: {e}")
         return JsonResponse({'error': 'Internal server error'}, status=500)
 
 
+def build_error_event(data, platform_id):
+    """Build the buffered error event from webhook data"""
+    return {
+        'platform_id': platform_id,
+        'error_type': data.get('error_type', 'other'),
+        'severity': data.get('severity', 'medium'),
+        'message': data.get('message', ''),
+        'stack_trace': data.get('stack_trace', ''),
+        'url_path': data.get('url_path', ''),
+        'user_agent': data.get('user_agent', ''),
+        'ip_address': data.get('ip_address'),
+        'user_id': data.get('user_id', ''),
+        'request_data': data.get('request_data', {}),
+        'environment_data': data.get('environment_data', {}),
+    }
+
+
+def get_event_count(data):
+    """Number of occurrences an event represents (pre-aggregated by clients)"""
+    try:
+        return max(1, int(data.get('count', 1)))
+    except (TypeError, ValueError):
+        return 1
+
+
+def decompress_gzip(body, max_bytes):
+    """Decompress a gzip request body, refusing anything larger than max_bytes"""
+    import zlib
+    
+    try:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        data = decompressor.decompress(body, max_bytes)
+    except zlib.error:
+        raise ValueError('Invalid gzip body')
+    
+    if decompressor.unconsumed_tail:
+        raise ValueError(f'Decompressed body exceeds {max_bytes} bytes')
+    return data
+
+
 def get_status_class(status):
     """Get CSS class for status"""
     status_classes = {
@@ -604,13 +565,13 @@ def system_status_view(request):
     
     # Application Statistics
     from django.contrib.auth.models import User
+    platform_overview = get_platform_summaries(Platform.objects.all())
     app_stats = {
         'total_users': User.objects.count(),
-        'active_platforms': Platform.objects.filter(is_active=True).count(),
-        'total_errors_24h': ErrorLog.objects.filter(
-            created_at__gte=timezone.now() - timedelta(hours=24)
-        ).count(),
-        'active_alerts': Alert.objects.filter(status='active').count(),
+        'active_platforms': sum(1 for p in platform_overview if p['platform'].is_active),
+        # All errors recorded in the last 24h, resolved or not
+        'total_errors_24h': sum(p['new_errors_24h'] for p in platform_overview),
+        'active_alerts': sum(p['active_alerts'] for p in platform_overview),
     }
     
     context = {